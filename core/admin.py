@@ -1,5 +1,13 @@
 from django.contrib import admin
-from .models import User, Account, Transaction
+from django.db import transaction
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+from .models import User, Account, Transaction, DailyAggregate, CategoryCacheEntry, CategoryKeyword, FAQEntry, RequestProfile
+from core.services.aggregate_service import AggregateService
+from core.utils.faq_cache import faq_cache, normalize_question
+from core.utils.keyword_classifier import keyword_classifier
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
@@ -18,3 +26,159 @@ class TransactionAdmin(admin.ModelAdmin):
     list_display = ('type', 'amount', 'category', 'reason', 'date', 'account', 'user')
     search_fields = ('reason', 'category', 'user__phone_number', 'account__name')
     list_filter = ('type', 'date')
+
+    # Edits and deletes here bypass the serializer, so keep the daily aggregates in step
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            old = [Transaction.objects.select_for_update().get(pk=obj.pk)] if change else []
+            super().save_model(request, obj, form, change)
+            AggregateService.replace(removed=old, added=[obj])
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            old = Transaction.objects.select_for_update().get(pk=obj.pk)
+            super().delete_model(request, obj)
+            AggregateService.replace(removed=[old])
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            old = list(Transaction.objects.select_for_update().filter(pk__in=queryset.values('pk')))
+            super().delete_queryset(request, queryset)
+            AggregateService.replace(removed=old)
+
+@admin.register(DailyAggregate)
+class DailyAggregateAdmin(admin.ModelAdmin):
+    list_display = ('day', 'type', 'category', 'total', 'count', 'account', 'user')
+    search_fields = ('category', 'user__phone_number', 'account__name')
+    list_filter = ('type', 'day')
+    # Maintained from the transactions; rebuild_daily_aggregates recomputes it
+    readonly_fields = ('user', 'account', 'day', 'type', 'category', 'total', 'count')
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(CategoryCacheEntry)
+class CategoryCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ('key', 'category', 'user', 'hits', 'expires_at', 'modified')
+    search_fields = ('key', 'category', 'user__phone_number')
+    list_filter = ('category',)
+
+@admin.register(CategoryKeyword)
+class CategoryKeywordAdmin(admin.ModelAdmin):
+    list_display = ('keyword', 'category', 'language', 'weight', 'status')
+    list_editable = ('category', 'weight', 'status')
+    search_fields = ('keyword', 'category')
+    list_filter = ('category', 'language', 'status')
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        keyword_classifier.invalidate()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        keyword_classifier.invalidate()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        keyword_classifier.invalidate()
+
+@admin.register(FAQEntry)
+class FAQEntryAdmin(admin.ModelAdmin):
+    list_display = ('question', 'source', 'hits', 'status', 'modified')
+    search_fields = ('question', 'answer')
+    list_filter = ('source', 'status')
+    readonly_fields = ('normalized', 'hits')
+    actions = ('deactivate_entries', 'delete_learned_entries')
+
+    def changelist_view(self, request, extra_context=None):
+        stats = faq_cache.stats()
+        self.message_user(
+            request,
+            f"Hit rate since start: {stats['hit_ratio']:.0%} "
+            f"({stats['hits']} hits / {stats['lookups']} lookups, {stats['learned']} learned)"
+        )
+        return super().changelist_view(request, extra_context)
+
+    def save_model(self, request, obj, form, change):
+        obj.normalized = normalize_question(obj.question)
+        super().save_model(request, obj, form, change)
+        faq_cache.invalidate()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        faq_cache.invalidate()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        faq_cache.invalidate()
+
+    @admin.action(description='Deactivate selected entries (stops serving and re-learning them)')
+    def deactivate_entries(self, request, queryset):
+        updated = queryset.update(status=0)
+        faq_cache.invalidate()
+        self.message_user(request, f"Deactivated {updated} entries")
+
+    @admin.action(description='Delete all learned entries (they are re-learned on demand)')
+    def delete_learned_entries(self, request, queryset):
+        deleted, _ = FAQEntry.objects.filter(source='learned').delete()
+        faq_cache.invalidate()
+        self.message_user(request, f"Deleted {deleted} learned entries")
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ('method', 'path', 'status_code', 'duration_ms', 'query_count', 'user', 'requested_by', 'created')
+    search_fields = ('path', 'user__phone_number')
+    list_filter = ('method', 'status_code')
+    fields = ('method', 'path', 'status_code', 'duration_ms', 'query_count', 'user', 'requested_by', 'created', 'downloads', 'profile_summary', 'sql')
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                '<uuid:pk>/download/<str:kind>/',
+                self.admin_site.admin_view(self.download),
+                name='core_requestprofile_download',
+            ),
+        ] + super().get_urls()
+
+    def download(self, request, pk, kind):
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        if kind == 'prof':
+            response = HttpResponse(bytes(profile.pstats), content_type='application/octet-stream')
+        elif kind == 'sql':
+            response = HttpResponse(self._sql_text(profile), content_type='text/plain; charset=utf-8')
+        else:
+            return HttpResponse(status=404)
+        response['Content-Disposition'] = f'attachment; filename="profile-{profile.pk}.{kind}"'
+        return response
+
+    @staticmethod
+    def _sql_text(profile):
+        lines = [f"-- {profile.method} {profile.path}: {profile.query_count} queries ({len(profile.queries)} recorded)"]
+        for query in profile.queries:
+            lines.append(f"\n-- {query['ms']} ms, params {query['params']}")
+            lines.extend(f"--   {frame}" for frame in query['stack'])
+            lines.append(f"{query['sql']};")
+        return '\n'.join(lines) + '\n'
+
+    @admin.display(description='Download')
+    def downloads(self, obj):
+        return format_html(
+            '<a href="{}">cProfile (.prof)</a> &middot; <a href="{}">SQL (.sql)</a>',
+            reverse('admin:core_requestprofile_download', args=(obj.pk, 'prof')),
+            reverse('admin:core_requestprofile_download', args=(obj.pk, 'sql')),
+        )
+
+    @admin.display(description='Top functions')
+    def profile_summary(self, obj):
+        return format_html('<pre>{}</pre>', obj.summary)
+
+    @admin.display(description='SQL')
+    def sql(self, obj):
+        return format_html('<pre>{}</pre>', self._sql_text(obj))
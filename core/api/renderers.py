@@ -0,0 +1,30 @@
+import json
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from core.utils.perf import timed
+
+
+def format_sse(event, data):
+    """Encode one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer that reports its time as `serialize` in Server-Timing."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed('serialize'):
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets views negotiate `Accept: text/event-stream`. Streaming views return
+    their own StreamingHttpResponse; this only renders regular responses
+    (e.g. validation errors) as a single `error` event.
+    """
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return format_sse('error', data).encode(self.charset)
@@ -0,0 +1,53 @@
+from rest_framework import serializers
+from django.conf import settings
+from django.utils import timezone
+from core.models import Account
+from core.services.analytics_service import AnalyticsService
+
+
+class TimeseriesQuerySerializer(serializers.Serializer):
+    """Query parameters of the time series endpoint"""
+    granularity = serializers.ChoiceField(choices=AnalyticsService.GRANULARITIES, default='day')
+    start = serializers.DateField(required=False, help_text="First day (widened to the start of its bucket)")
+    end = serializers.DateField(required=False, help_text="Last day (widened to the end of its bucket); defaults to today")
+    account = serializers.UUIDField(required=False, help_text="Only this account's transactions")
+    type = serializers.ChoiceField(choices=AnalyticsService.TYPES, required=False)
+
+    def validate_account(self, value):
+        if not Account.objects.filter(id=value, user=self.context['request'].user).exists():
+            raise serializers.ValidationError("Invalid account.")
+        return value
+
+    def validate(self, attrs):
+        granularity = attrs['granularity']
+        attrs.setdefault('end', timezone.localdate())
+        attrs.setdefault('start', AnalyticsService.default_start(attrs['end'], granularity))
+        if attrs['start'] > attrs['end']:
+            raise serializers.ValidationError({"start": "Must not be after end."})
+        if len(AnalyticsService.bucket_range(attrs['start'], attrs['end'], granularity)) > settings.ANALYTICS_MAX_BUCKETS:
+            raise serializers.ValidationError(
+                {"start": f"At most {settings.ANALYTICS_MAX_BUCKETS} {granularity} buckets per request."}
+            )
+        return attrs
+
+
+class TimeseriesTotalsSerializer(serializers.Serializer):
+    income = serializers.DecimalField(max_digits=14, decimal_places=2)
+    expense = serializers.DecimalField(max_digits=14, decimal_places=2)
+    save = serializers.DecimalField(max_digits=14, decimal_places=2)
+    net = serializers.DecimalField(max_digits=14, decimal_places=2, help_text="income - expense")
+    count = serializers.IntegerField()
+
+
+class TimeseriesBucketSerializer(TimeseriesTotalsSerializer):
+    start = serializers.DateField(help_text="First day of the bucket")
+
+
+class TimeseriesResponseSerializer(serializers.Serializer):
+    granularity = serializers.CharField()
+    start = serializers.DateField()
+    end = serializers.DateField()
+    account = serializers.UUIDField(allow_null=True)
+    type = serializers.CharField(allow_null=True)
+    buckets = TimeseriesBucketSerializer(many=True)
+    totals = TimeseriesTotalsSerializer()
@@ -18,6 +18,28 @@ class RegisterSerializer(serializers.ModelSerializer):
         model = User
         fields = ('phone_number', 'password', 'first_name', 'initial_amount', 'profile_image')
 
+    # Helper to detect carrier
+    @staticmethod
+    def get_carrier_from_number(number):
+        # Remove spaces and +237
+        clean_number = number.replace(' ', '').replace('+237', '').replace('237', '')
+        
+        if not clean_number.isdigit() or len(clean_number) != 9:
+            return 'momo' # Default fallback
+            
+        prefix = int(clean_number[:2])
+        full_prefix = int(clean_number[:3])
+        
+        # Orange: 69X, 655-659
+        if prefix == 69 or (655 <= full_prefix <= 659):
+            return 'om'
+        
+        # MTN: 67X, 650-654, 680-689
+        if prefix == 67 or (650 <= full_prefix <= 654) or (680 <= full_prefix <= 689):
+            return 'momo'
+            
+        return 'momo' # Default fallback
+
     def create(self, validated_data):
         initial_amount = validated_data.pop('initial_amount')
         password = validated_data.pop('password')
@@ -26,28 +48,7 @@ class RegisterSerializer(serializers.ModelSerializer):
         user.set_password(password)
         user.save()
 
-        # Helper to detect carrier
-        def get_carrier_from_number(number):
-            # Remove spaces and +237
-            clean_number = number.replace(' ', '').replace('+237', '').replace('237', '')
-            
-            if not clean_number.isdigit() or len(clean_number) != 9:
-                return 'momo' # Default fallback
-                
-            prefix = int(clean_number[:2])
-            full_prefix = int(clean_number[:3])
-            
-            # Orange: 69X, 655-659
-            if prefix == 69 or (655 <= full_prefix <= 659):
-                return 'om'
-            
-            # MTN: 67X, 650-654, 680-689
-            if prefix == 67 or (650 <= full_prefix <= 654) or (680 <= full_prefix <= 689):
-                return 'momo'
-                
-            return 'momo' # Default fallback
-
-        carrier = get_carrier_from_number(user.phone_number)
+        carrier = self.get_carrier_from_number(user.phone_number)
 
         # Create initial account (MoMo/OM based on number)
         Account.objects.create(
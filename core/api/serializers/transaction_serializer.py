@@ -1,8 +1,10 @@
-from decimal import Decimal
 from rest_framework import serializers
 from django.db import transaction
 from core.models import Transaction, Account
-from core.utils.ai_helper import categorize_transaction
+from core.services.aggregate_service import AggregateService
+from core.services.categorization_service import CategorizationService
+from core.services.ledger_service import LedgerService, InsufficientFunds
+from core.utils.category_cache import category_cache
 
 class TransactionSerializer(serializers.ModelSerializer):
     account_name = serializers.ReadOnlyField(source='account.name')
@@ -37,31 +39,38 @@ class TransactionSerializer(serializers.ModelSerializer):
         validated_data.pop('account_id') # Remove from data meant for model
         validated_data['user'] = self.context['request'].user
 
-        # AI Categorization if not provided
-        if not validated_data.get('category') and validated_data.get('reason'):
-            validated_data['category'] = categorize_transaction(validated_data['reason'])
+        # AI categorization happens in the background once the row is committed
+        needs_category = not validated_data.get('category') and validated_data.get('reason')
+        if needs_category:
+            validated_data['category'] = Transaction.CATEGORY_PENDING
 
         with transaction.atomic():
+            if needs_category:
+                transaction.on_commit(CategorizationService.enqueue)
+            elif validated_data.get('category') and validated_data.get('reason'):
+                # Remember the user's own choice so future categorization follows
+                # it, but only once the transaction is saved
+                user_id = validated_data['user'].id
+                reason, category = validated_data['reason'], validated_data['category']
+                transaction.on_commit(lambda: category_cache.set_override(user_id, reason, category), robust=True)
+
+            # Balances are changed in the database with conditional UPDATEs;
+            # the earlier funds check in validate() is only a fast path
+            try:
+                if trans_type == 'income':
+                    LedgerService.credit(account.pk, amount)
+                elif trans_type == 'expense':
+                    LedgerService.debit(account.pk, amount)
+                elif trans_type == 'save':
+                    user = self.context['request'].user
+                    LedgerService.lock_user(user)
+                    LedgerService.debit(account.pk, amount)
+                    # Find or create a savings account for the user
+                    savings_account = LedgerService.get_or_create_savings_account(user, account.currency)
+                    LedgerService.credit(savings_account.pk, amount)
+            except InsufficientFunds:
+                raise serializers.ValidationError({"amount": "Insufficient funds."})
+
             ticket = Transaction.objects.create(**validated_data)
-            
-            if trans_type == 'income':
-                account.balance += amount
-            elif trans_type == 'expense':
-                account.balance -= amount
-            elif trans_type == 'save':
-                account.balance -= amount
-                # Find or create a savings account for the user
-                savings_account, created = Account.objects.get_or_create(
-                    user=self.context['request'].user,
-                    type='savings',
-                    defaults={
-                        'name': 'Main Savings',
-                        'number': f'SAV-{self.context["request"].user.phone_number[-4:]}',
-                        'currency': account.currency
-                    }
-                )
-                savings_account.balance += Decimal(str(amount))
-                savings_account.save()
-            
-            account.save()
+            AggregateService.record(ticket)
             return ticket
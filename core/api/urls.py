@@ -4,7 +4,8 @@ from core.api.views.auth_view import RegisterView, CustomTokenObtainPairView, Us
 from core.api.views.account_view import AccountListCreateView, AccountDetailView
 from core.api.views.transaction_view import TransactionListCreateView, DashboardSummaryView
 from core.api.views.extras_view import BudgetLimitViewSet, PushSubscriptionViewSet
-from core.api.views.ai_view import ai_chat
+from core.api.views.ai_view import ai_chat, AIStatusView
+from core.api.views.analytics_view import TimeseriesView
 from rest_framework_simplejwt.views import TokenRefreshView
 
 router = DefaultRouter()
@@ -28,8 +29,12 @@ urlpatterns = [
     # Dashboard
     path('dashboard/summary/', DashboardSummaryView.as_view(), name='dashboard-summary'),
     
+    # Analytics
+    path('analytics/timeseries/', TimeseriesView.as_view(), name='analytics-timeseries'),
+
     # AI Assistant
     path('ai/chat/', ai_chat, name='ai-chat'),
+    path('ai/status/', AIStatusView.as_view(), name='ai-status'),
 
     # Extras (Budget & Push)
     path('', include(router.urls)),
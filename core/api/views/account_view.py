@@ -27,11 +27,9 @@ class AccountListCreateView(generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        logger.debug(f"[ACCOUNT_LIST] Fetching accounts for user: {self.request.user}")
+        logger.debug("[ACCOUNT_LIST] Fetching accounts for user: %s", self.request.user)
         try:
-            queryset = Account.objects.filter(user=self.request.user, status=1)
-            logger.info(f"[ACCOUNT_LIST] Found {queryset.count()} active accounts for user: {self.request.user}")
-            return queryset
+            return Account.objects.filter(user=self.request.user, status=1)
         except Exception as e:
             logger.error(f"[ACCOUNT_LIST] Error fetching accounts: {str(e)}", exc_info=True)
             logger.error(f"[ACCOUNT_LIST] User: {self.request.user}")
@@ -39,9 +37,9 @@ class AccountListCreateView(generics.ListCreateAPIView):
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
-            logger.debug(f"[ACCOUNT] Using CreateAccountSerializer for POST request")
+            logger.debug("[ACCOUNT] Using CreateAccountSerializer for POST request")
             return CreateAccountSerializer
-        logger.debug(f"[ACCOUNT] Using AccountSerializer for GET request")
+        logger.debug("[ACCOUNT] Using AccountSerializer for GET request")
         return AccountSerializer
     
     def list(self, request, *args, **kwargs):
@@ -50,7 +48,7 @@ class AccountListCreateView(generics.ListCreateAPIView):
         try:
             queryset = self.filter_queryset(self.get_queryset())
             serializer = self.get_serializer(queryset, many=True)
-            logger.debug(f"[ACCOUNT_LIST] Returning {len(serializer.data)} accounts")
+            logger.info(f"[ACCOUNT_LIST] Returning {len(serializer.data)} active accounts for user: {request.user}")
             return Response(serializer.data)
             
         except Exception as e:
@@ -60,14 +58,14 @@ class AccountListCreateView(generics.ListCreateAPIView):
     
     def create(self, request, *args, **kwargs):
         logger.info(f"[ACCOUNT_CREATE] Account creation attempt by user: {request.user}")
-        logger.debug(f"[ACCOUNT_CREATE] Request data: {request.data}")
+        logger.debug("[ACCOUNT_CREATE] Request data: %s", request.data)
         
         try:
             serializer = self.get_serializer(data=request.data)
             
             if not serializer.is_valid():
                 logger.warning(f"[ACCOUNT_CREATE] Validation failed: {serializer.errors}")
-                logger.debug(f"[ACCOUNT_CREATE] Invalid data: {request.data}")
+                logger.debug("[ACCOUNT_CREATE] Invalid data: %s", request.data)
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             
             logger.info(f"[ACCOUNT_CREATE] Validation successful, creating account")
@@ -75,7 +73,7 @@ class AccountListCreateView(generics.ListCreateAPIView):
             
             headers = self.get_success_headers(serializer.data)
             logger.info(f"[ACCOUNT_CREATE] Account created successfully: {serializer.data.get('name')}")
-            logger.debug(f"[ACCOUNT_CREATE] Created account data: {serializer.data}")
+            logger.debug("[ACCOUNT_CREATE] Created account data: %s", serializer.data)
             
             return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
             
@@ -93,11 +91,9 @@ class AccountDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        logger.debug(f"[ACCOUNT_DETAIL] Fetching accounts for user: {self.request.user}")
+        logger.debug("[ACCOUNT_DETAIL] Fetching accounts for user: %s", self.request.user)
         try:
-            queryset = Account.objects.filter(user=self.request.user)
-            logger.debug(f"[ACCOUNT_DETAIL] User has {queryset.count()} total accounts")
-            return queryset
+            return Account.objects.filter(user=self.request.user)
         except Exception as e:
             logger.error(f"[ACCOUNT_DETAIL] Error fetching account queryset: {str(e)}", exc_info=True)
             logger.error(f"[ACCOUNT_DETAIL] User: {self.request.user}")
@@ -105,18 +101,18 @@ class AccountDetailView(generics.RetrieveUpdateDestroyAPIView):
     
     def retrieve(self, request, *args, **kwargs):
         logger.info(f"[ACCOUNT_RETRIEVE] Account retrieval request from user: {request.user}")
-        logger.debug(f"[ACCOUNT_RETRIEVE] Account ID: {kwargs.get('pk')}")
+        logger.debug("[ACCOUNT_RETRIEVE] Account ID: %s", kwargs.get('pk'))
         
         try:
             instance = self.get_object()
             serializer = self.get_serializer(instance)
             logger.info(f"[ACCOUNT_RETRIEVE] Account retrieved: {instance.name}")
-            logger.debug(f"[ACCOUNT_RETRIEVE] Account data: {serializer.data}")
+            logger.debug("[ACCOUNT_RETRIEVE] Account data: %s", serializer.data)
             return Response(serializer.data)
             
         except Account.DoesNotExist:
             logger.warning(f"[ACCOUNT_RETRIEVE] Account not found: {kwargs.get('pk')}")
-            logger.debug(f"[ACCOUNT_RETRIEVE] User: {request.user}")
+            logger.debug("[ACCOUNT_RETRIEVE] User: %s", request.user)
             return Response(
                 {"error": "Account not found"},
                 status=status.HTTP_404_NOT_FOUND
@@ -128,29 +124,29 @@ class AccountDetailView(generics.RetrieveUpdateDestroyAPIView):
     
     def update(self, request, *args, **kwargs):
         logger.info(f"[ACCOUNT_UPDATE] Account update attempt by user: {request.user}")
-        logger.debug(f"[ACCOUNT_UPDATE] Account ID: {kwargs.get('pk')}, Data: {request.data}")
+        logger.debug("[ACCOUNT_UPDATE] Account ID: %s, Data: %s", kwargs.get('pk'), request.data)
         
         try:
             partial = kwargs.pop('partial', False)
             instance = self.get_object()
-            logger.debug(f"[ACCOUNT_UPDATE] Updating account: {instance.name}")
+            logger.debug("[ACCOUNT_UPDATE] Updating account: %s", instance.name)
             
             serializer = self.get_serializer(instance, data=request.data, partial=partial)
             
             if not serializer.is_valid():
                 logger.warning(f"[ACCOUNT_UPDATE] Validation failed: {serializer.errors}")
-                logger.debug(f"[ACCOUNT_UPDATE] Invalid data: {request.data}")
+                logger.debug("[ACCOUNT_UPDATE] Invalid data: %s", request.data)
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             
             self.perform_update(serializer)
             logger.info(f"[ACCOUNT_UPDATE] Account updated successfully: {instance.name}")
-            logger.debug(f"[ACCOUNT_UPDATE] Updated data: {serializer.data}")
+            logger.debug("[ACCOUNT_UPDATE] Updated data: %s", serializer.data)
             
             return Response(serializer.data)
             
         except Account.DoesNotExist:
             logger.warning(f"[ACCOUNT_UPDATE] Account not found: {kwargs.get('pk')}")
-            logger.debug(f"[ACCOUNT_UPDATE] User: {request.user}")
+            logger.debug("[ACCOUNT_UPDATE] User: %s", request.user)
             return Response(
                 {"error": "Account not found"},
                 status=status.HTTP_404_NOT_FOUND
@@ -162,13 +158,13 @@ class AccountDetailView(generics.RetrieveUpdateDestroyAPIView):
 
     def perform_destroy(self, instance):
         logger.info(f"[ACCOUNT_DELETE] Soft delete attempt for account: {instance.name}")
-        logger.debug(f"[ACCOUNT_DELETE] Account ID: {instance.id}, User: {self.request.user}")
+        logger.debug("[ACCOUNT_DELETE] Account ID: %s, User: %s", instance.id, self.request.user)
         
         try:
             instance.status = 0  # Soft delete
             instance.save()
             logger.info(f"[ACCOUNT_DELETE] Account soft deleted successfully: {instance.name}")
-            logger.debug(f"[ACCOUNT_DELETE] Account ID: {instance.id}")
+            logger.debug("[ACCOUNT_DELETE] Account ID: %s", instance.id)
             
         except Exception as e:
             logger.error(f"[ACCOUNT_DELETE] Soft delete failed: {str(e)}", exc_info=True)
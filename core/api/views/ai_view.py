@@ -1,23 +1,66 @@
+import inspect
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
-from drf_spectacular.utils import extend_schema, OpenApiExample
+from rest_framework.views import APIView
+from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiParameter
 
 from core.api.serializers.ai_serializer import ChatRequestSerializer, ChatResponseSerializer
-from core.models import Transaction, Account
-from utils.ai_service import get_ai_service
+from core.api.renderers import EventStreamRenderer, TimedJSONRenderer, format_sse
+from core.services.ai_context_service import AIContextService
+from core.utils.faq_cache import faq_cache, needs_user_data
+from core.utils.llm_client import get_llm_client
+from utils.ai_service import AIServiceError, AIStreamError, get_ai_service
 
 logger = logging.getLogger(__name__)
 
 
+class AsyncAPIView(APIView):
+    """
+    APIView whose handlers are coroutines. Authentication, permissions and
+    content negotiation still run through DRF (in a thread, since they may
+    hit the database); the handler itself runs on the event loop, so under
+    ASGI a request waiting on I/O doesn't hold a worker.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if inspect.isawaitable(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
 @extend_schema(
     summary="AI Financial Chat",
-    description="Ask questions about your finances in natural language. The AI will analyze your transactions and accounts to provide helpful answers.",
+    description="Ask questions about your finances in natural language. The AI will analyze your transactions and accounts to provide helpful answers. Pass `?stream=1` to receive the answer as Server-Sent Events: `token` events with `{\"delta\": ...}` as text is generated, then one `done` event with the full response. If generation fails part-way, an `error` event with `{\"error\": true, \"detail\": ...}` replaces `done` and the tokens already sent should be discarded.",
     request=ChatRequestSerializer,
     responses={200: ChatResponseSerializer},
+    parameters=[
+        OpenApiParameter('stream', bool, description='Stream the answer as text/event-stream'),
+    ],
     examples=[
         OpenApiExample(
             'Simple Question',
@@ -37,90 +80,145 @@ logger = logging.getLogger(__name__)
     ],
     tags=['AI Assistant']
 )
-@api_view(['POST'])
-@permission_classes([IsAuthenticated])
-def ai_chat(request):
-    """
-    AI-powered financial chat assistant
-    
-    Processes natural language questions about user's finances and returns
-    intelligent responses based on transaction history and account data.
-    """
-    logger.info(f"[AI_CHAT] Request from user: {request.user}")
-    
-    # Validate request
-    serializer = ChatRequestSerializer(data=request.data)
-    if not serializer.is_valid():
-        logger.warning(f"[AI_CHAT] Invalid request: {serializer.errors}")
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    
-    question = serializer.validated_data['question']
-    logger.info(f"[AI_CHAT] Question: {question}")
-    
-    try:
-        # Gather user's financial context
-        context = _build_user_context(request.user)
+class AIChatView(AsyncAPIView):
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [TimedJSONRenderer, BrowsableAPIRenderer, EventStreamRenderer]
+
+    async def post(self, request):
+        """
+        AI-powered financial chat assistant
         
-        # Get AI service and process question
-        ai_service = get_ai_service()
-        answer = ai_service.chat(question, context)
+        Processes natural language questions about user's finances and returns
+        intelligent responses based on transaction history and account data.
+        """
+        logger.info(f"[AI_CHAT] Request from user: {request.user}")
         
-        # Prepare response
-        response_data = {
-            'question': question,
-            'answer': answer,
-            'timestamp': datetime.now()
-        }
+        # Validate request
+        serializer = ChatRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            logger.warning(f"[AI_CHAT] Invalid request: {serializer.errors}")
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
-        logger.info(f"[AI_CHAT] Successfully processed question for user: {request.user}")
-        return Response(response_data, status=status.HTTP_200_OK)
+        question = serializer.validated_data['question']
+        logger.info(f"[AI_CHAT] Question: {question}")
         
-    except Exception as e:
-        logger.error(f"[AI_CHAT] Error processing question: {str(e)}", exc_info=True)
-        return Response(
-            {
-                'error': 'Failed to process your question',
-                'detail': 'Please try again or rephrase your question'
-            },
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
+        try:
+            stream = request.query_params.get('stream') in ('1', 'true')
+            
+            # How-to questions don't depend on the user's data, so they are
+            # answered from the FAQ cache when a similar question is known
+            general = not needs_user_data(question)
+            if general:
+                cached = await sync_to_async(faq_cache.lookup)(question)
+                if cached is not None:
+                    logger.info(f"[AI_CHAT] Answered from FAQ cache for user: {request.user}")
+                    if stream:
+                        return _event_stream(_cached_answer(question, cached))
+                    return Response(
+                        {'question': question, 'answer': cached, 'timestamp': datetime.now()},
+                        status=status.HTTP_200_OK
+                    )
+            
+            # Gather user's financial context (aggregated in SQL, cached per user)
+            context = None if general else await AIContextService.aget(request.user)
+            
+            # Get AI service and process question
+            ai_service = get_ai_service()
+            
+            if stream:
+                return _event_stream(_stream_answer(ai_service, question, context, request.user))
+            
+            try:
+                answer = await ai_service.achat(question, context)
+            except AIServiceError:
+                answer = ai_service.ERROR_MESSAGE
+            else:
+                # Only an answer the model actually completed is shared with other users
+                if general:
+                    await sync_to_async(faq_cache.learn)(question, answer)
+            
+            # Prepare response
+            response_data = {
+                'question': question,
+                'answer': answer,
+                'timestamp': datetime.now()
+            }
+            
+            logger.info(f"[AI_CHAT] Successfully processed question for user: {request.user}")
+            return Response(response_data, status=status.HTTP_200_OK)
+            
+        except Exception as e:
+            logger.error(f"[AI_CHAT] Error processing question: {str(e)}", exc_info=True)
+            return Response(
+                {
+                    'error': 'Failed to process your question',
+                    'detail': 'Please try again or rephrase your question'
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
 
 
-def _build_user_context(user) -> dict:
+ai_chat = AIChatView.as_view()
+
+
+@extend_schema(
+    summary="AI Provider Status",
+    description="Staff only. Circuit breaker state, call counters and recent latency (seconds) of the shared LLM client in this worker process, plus the FAQ answer cache hit rate.",
+    responses={200: dict},
+    tags=['AI Assistant']
+)
+class AIStatusView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            'llm': get_llm_client().stats(),
+            'faq_cache': faq_cache.stats(),
+        })
+
+
+def _event_stream(events):
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Don't let a proxy buffer the stream
+    return response
+
+
+async def _cached_answer(question, answer):
+    """Send a cached answer as a single `token` event followed by `done`"""
+    yield format_sse('token', {'delta': answer})
+    yield format_sse('done', {
+        'question': question,
+        'answer': answer,
+        'timestamp': datetime.now().isoformat()
+    })
+
+
+async def _stream_answer(ai_service, question, context, user):
     """
-    Build comprehensive financial context for the user
-    
-    Args:
-        user: The authenticated user
-    
-    Returns:
-        Dictionary containing user's financial data
+    Yield the answer as SSE `token` events, then a final `done` event, or an
+    `error` event if the stream fails; only a complete answer is learned
     """
-    # Get user's accounts
-    accounts = Account.objects.filter(user=user).values(
-        'id', 'name', 'type', 'balance'
-    )
-    
-    # Get recent transactions (last 30 days)
-    thirty_days_ago = datetime.now() - timedelta(days=30)
-    transactions = Transaction.objects.filter(
-        user=user,
-        date__gte=thirty_days_ago
-    ).order_by('-date').values(
-        'id', 'type', 'amount', 'reason', 'date', 'account__name'
-    )
-    
-    # Calculate total balance
-    total_balance = sum(float(acc['balance']) for acc in accounts)
-    
-    # Build context dictionary
-    context = {
-        'user_name': user.first_name or 'User',
-        'accounts': list(accounts),
-        'transactions': list(transactions),
-        'total_balance': total_balance
-    }
-    
-    logger.debug(f"[AI_CHAT] Built context: {len(accounts)} accounts, {len(transactions)} transactions")
+    parts = []
+    try:
+        async for delta in ai_service.achat_stream(question, context):
+            parts.append(delta)
+            yield format_sse('token', {'delta': delta})
+    except AIStreamError:
+        logger.warning(f"[AI_CHAT] Stream failed after {len(parts)} tokens for user: {user}")
+        yield format_sse('error', {
+            'error': True,
+            'detail': ai_service.ERROR_MESSAGE,
+            'timestamp': datetime.now().isoformat()
+        })
+        return
     
-    return context
+    answer = ''.join(parts)
+    yield format_sse('done', {
+        'question': question,
+        'answer': answer,
+        'timestamp': datetime.now().isoformat()
+    })
+    if context is None:
+        await sync_to_async(faq_cache.learn)(question, answer)
+    logger.info(f"[AI_CHAT] Successfully streamed answer for user: {user}")
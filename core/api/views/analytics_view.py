@@ -0,0 +1,59 @@
+import logging
+from datetime import timedelta
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from drf_spectacular.utils import extend_schema
+from core.api.serializers.analytics_serializer import TimeseriesQuerySerializer, TimeseriesResponseSerializer
+from core.services.analytics_service import AnalyticsService
+
+logger = logging.getLogger(__name__)
+
+
+@extend_schema(
+    summary="Income and Expense Time Series",
+    description=(
+        "Income, expense and savings totals per day, week (starting Monday) or month, for graphs. "
+        "The range is widened to whole buckets and empty buckets are returned with zeros. "
+        "Ranges that ended before today carry an ETag; send it back in If-None-Match to get a 304 "
+        "while the user's transactions are unchanged."
+    ),
+    parameters=[TimeseriesQuerySerializer],
+    responses={200: TimeseriesResponseSerializer},
+    tags=['Analytics']
+)
+class TimeseriesView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        logger.info(f"[ANALYTICS] Time series request from user: {request.user}")
+
+        query = TimeseriesQuerySerializer(data=request.query_params, context={'request': request})
+        if not query.is_valid():
+            logger.warning(f"[ANALYTICS] Invalid query: {query.errors}")
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+        params = query.validated_data
+        granularity = params['granularity']
+
+        series, etag = AnalyticsService.timeseries(
+            request.user, params['start'], params['end'], granularity,
+            account_id=params.get('account'), type=params.get('type'),
+        )
+        if etag is not None and etag in request.headers.get('If-None-Match', ''):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        buckets = series['buckets']
+        response = Response(TimeseriesResponseSerializer({
+            'granularity': granularity,
+            'start': buckets[0]['start'],
+            'end': AnalyticsService.next_bucket(buckets[-1]['start'], granularity) - timedelta(days=1),
+            'account': params.get('account'),
+            'type': params.get('type'),
+            **series,
+        }).data)
+        if etag is not None:
+            # Closed ranges still change when a transaction is back-dated, so revalidate
+            response['ETag'] = etag
+            response['Cache-Control'] = 'private, no-cache'
+        logger.debug("[ANALYTICS] Returning %s %s buckets", len(buckets), granularity)
+        return response
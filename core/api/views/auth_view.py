@@ -35,14 +35,14 @@ class RegisterView(generics.CreateAPIView):
     
     def create(self, request, *args, **kwargs):
         logger.info(f"[REGISTER] Registration attempt started")
-        logger.debug(f"[REGISTER] Request data: {request.data}")
+        logger.debug("[REGISTER] Request data: %s", request.data)
         
         try:
             serializer = self.get_serializer(data=request.data)
             
             if not serializer.is_valid():
                 logger.warning(f"[REGISTER] Validation failed: {serializer.errors}")
-                logger.debug(f"[REGISTER] Invalid data: {request.data}")
+                logger.debug("[REGISTER] Invalid data: %s", request.data)
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             
             logger.info(f"[REGISTER] Validation successful, creating user")
@@ -50,7 +50,7 @@ class RegisterView(generics.CreateAPIView):
             
             headers = self.get_success_headers(serializer.data)
             logger.info(f"[REGISTER] User created successfully: {serializer.data.get('phone_number')}")
-            logger.debug(f"[REGISTER] Created user data: {serializer.data}")
+            logger.debug("[REGISTER] Created user data: %s", serializer.data)
             
             return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
             
@@ -70,17 +70,17 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     
     def post(self, request, *args, **kwargs):
         logger.info(f"[LOGIN] Login attempt started")
-        logger.debug(f"[LOGIN] Login attempt for user: {request.data.get('phone_number', 'N/A')}")
+        logger.debug("[LOGIN] Login attempt for user: %s", request.data.get('phone_number', 'N/A'))
         
         try:
             response = super().post(request, *args, **kwargs)
             
             if response.status_code == 200:
                 logger.info(f"[LOGIN] Login successful for user: {request.data.get('phone_number', 'N/A')}")
-                logger.debug(f"[LOGIN] Tokens generated successfully")
+                logger.debug("[LOGIN] Tokens generated successfully")
             else:
                 logger.warning(f"[LOGIN] Login failed for user: {request.data.get('phone_number', 'N/A')}")
-                logger.debug(f"[LOGIN] Response status: {response.status_code}, data: {response.data}")
+                logger.debug("[LOGIN] Response status: %s, data: %s", response.status_code, response.data)
             
             return response
             
@@ -94,7 +94,7 @@ class UserDetailView(generics.RetrieveUpdateAPIView):
     serializer_class = UserSerializer
     
     def get_object(self):
-        logger.debug(f"[USER_DETAIL] Retrieving user object for: {self.request.user}")
+        logger.debug("[USER_DETAIL] Retrieving user object for: %s", self.request.user)
         return self.request.user
     
     def retrieve(self, request, *args, **kwargs):
@@ -103,7 +103,7 @@ class UserDetailView(generics.RetrieveUpdateAPIView):
         try:
             instance = self.get_object()
             serializer = self.get_serializer(instance)
-            logger.debug(f"[USER_DETAIL] User data retrieved: {serializer.data}")
+            logger.debug("[USER_DETAIL] User data retrieved: %s", serializer.data)
             return Response(serializer.data)
             
         except Exception as e:
@@ -113,7 +113,7 @@ class UserDetailView(generics.RetrieveUpdateAPIView):
     
     def update(self, request, *args, **kwargs):
         logger.info(f"[USER_UPDATE] User update attempt for: {request.user}")
-        logger.debug(f"[USER_UPDATE] Update data: {request.data}")
+        logger.debug("[USER_UPDATE] Update data: %s", request.data)
         
         try:
             partial = kwargs.pop('partial', False)
@@ -122,12 +122,12 @@ class UserDetailView(generics.RetrieveUpdateAPIView):
             
             if not serializer.is_valid():
                 logger.warning(f"[USER_UPDATE] Validation failed: {serializer.errors}")
-                logger.debug(f"[USER_UPDATE] Invalid data: {request.data}")
+                logger.debug("[USER_UPDATE] Invalid data: %s", request.data)
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             
             self.perform_update(serializer)
             logger.info(f"[USER_UPDATE] User updated successfully: {request.user}")
-            logger.debug(f"[USER_UPDATE] Updated data: {serializer.data}")
+            logger.debug("[USER_UPDATE] Updated data: %s", serializer.data)
             
             return Response(serializer.data)
             
@@ -0,0 +1,22 @@
+import hmac
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from core.utils.metrics import registry
+
+
+@require_GET
+def metrics(request):
+    """
+    Prometheus scrape endpoint. Plain Django rather than DRF: scrapers send
+    no JWT and authenticate with `Authorization: Bearer <METRICS_TOKEN>`
+    instead. Without a token the endpoint is only served in DEBUG.
+    """
+    if not settings.METRICS_TOKEN:
+        if not settings.DEBUG:
+            return HttpResponse(status=403)
+    else:
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        if not hmac.compare_digest(supplied, settings.METRICS_TOKEN):
+            return HttpResponse(status=401)
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,5 +1,6 @@
 import logging
-from rest_framework import generics, permissions
+from rest_framework import generics, permissions, serializers
+from rest_framework.exceptions import NotFound
 from django.db.models import Sum
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -7,12 +8,20 @@ from drf_spectacular.utils import extend_schema, OpenApiExample
 from core.models import Transaction, Account
 from core.api.serializers.transaction_serializer import TransactionSerializer
 from core.api.serializers.dashboard_serializer import DashboardSummarySerializer
+from core.api.pagination import TransactionCursorPagination
+from core.utils.log import lazy
 
 logger = logging.getLogger(__name__)
 
+
+def _account_balance(account_id, user):
+    """Debug-log helper; only queried when DEBUG logging is enabled."""
+    return Account.objects.filter(id=account_id, user=user).values_list('balance', flat=True).first()
+
+
 @extend_schema(
     summary="List or Create Transactions",
-    description="Create a new transaction (updates account balance) or list history.",
+    description="Create a new transaction (updates account balance) or list history, newest first, using cursor pagination.",
     examples=[
         OpenApiExample(
             'Create Expense Example',
@@ -31,13 +40,13 @@ logger = logging.getLogger(__name__)
 class TransactionListCreateView(generics.ListCreateAPIView):
     serializer_class = TransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TransactionCursorPagination
 
     def get_queryset(self):
-        logger.debug(f"[TRANSACTION_LIST] Fetching transactions for user: {self.request.user}")
+        logger.debug("[TRANSACTION_LIST] Fetching transactions for user: %s", self.request.user)
         try:
-            queryset = Transaction.objects.filter(user=self.request.user).order_by('-date')
-            logger.info(f"[TRANSACTION_LIST] Found {queryset.count()} transactions for user: {self.request.user}")
-            return queryset
+            # account_name is read from the account of every row
+            return Transaction.objects.filter(user=self.request.user).select_related('account').order_by('-date', 'id')
         except Exception as e:
             logger.error(f"[TRANSACTION_LIST] Error fetching transactions: {str(e)}", exc_info=True)
             logger.error(f"[TRANSACTION_LIST] User: {self.request.user}")
@@ -48,10 +57,15 @@ class TransactionListCreateView(generics.ListCreateAPIView):
         
         try:
             queryset = self.filter_queryset(self.get_queryset())
-            serializer = self.get_serializer(queryset, many=True)
-            logger.debug(f"[TRANSACTION_LIST] Returning {len(serializer.data)} transactions")
-            return Response(serializer.data)
-            
+            page = self.paginate_queryset(queryset)
+            serializer = self.get_serializer(page, many=True)
+            logger.debug("[TRANSACTION_LIST] Returning %s transactions", len(serializer.data))
+            return self.get_paginated_response(serializer.data)
+
+        except NotFound as e:
+            # A stale or edited cursor is the client's mistake, not a server error
+            logger.warning(f"[TRANSACTION_LIST] Rejected cursor: {e}")
+            raise
         except Exception as e:
             logger.error(f"[TRANSACTION_LIST] Failed to list transactions: {str(e)}", exc_info=True)
             logger.error(f"[TRANSACTION_LIST] User: {request.user}")
@@ -59,44 +73,37 @@ class TransactionListCreateView(generics.ListCreateAPIView):
     
     def create(self, request, *args, **kwargs):
         logger.info(f"[TRANSACTION_CREATE] Transaction creation attempt by user: {request.user}")
-        logger.debug(f"[TRANSACTION_CREATE] Request data: {request.data}")
+        logger.debug("[TRANSACTION_CREATE] Request data: %s", request.data)
         
         try:
             serializer = self.get_serializer(data=request.data)
             
             if not serializer.is_valid():
                 logger.warning(f"[TRANSACTION_CREATE] Validation failed: {serializer.errors}")
-                logger.debug(f"[TRANSACTION_CREATE] Invalid data: {request.data}")
+                logger.debug("[TRANSACTION_CREATE] Invalid data: %s", request.data)
                 return Response(serializer.errors, status=400)
             
             logger.info(f"[TRANSACTION_CREATE] Validation successful, creating transaction")
-            logger.debug(f"[TRANSACTION_CREATE] Transaction type: {request.data.get('type')}, Amount: {request.data.get('amount')}")
+            logger.debug("[TRANSACTION_CREATE] Transaction type: %s, Amount: %s", request.data.get('type'), request.data.get('amount'))
             
-            # Log account balance before transaction
             account_id = request.data.get('account_id')
-            if account_id:
-                try:
-                    account = Account.objects.get(id=account_id, user=request.user)
-                    logger.debug(f"[TRANSACTION_CREATE] Account balance before: {account.balance}")
-                except Account.DoesNotExist:
-                    logger.error(f"[TRANSACTION_CREATE] Account not found: {account_id}")
+            logger.debug("[TRANSACTION_CREATE] Account balance before: %s", lazy(_account_balance, account_id, request.user))
             
             self.perform_create(serializer)
             
-            # Log account balance after transaction
-            if account_id:
-                try:
-                    account.refresh_from_db()
-                    logger.debug(f"[TRANSACTION_CREATE] Account balance after: {account.balance}")
-                except Exception as e:
-                    logger.warning(f"[TRANSACTION_CREATE] Could not refresh account balance: {str(e)}")
+            logger.debug("[TRANSACTION_CREATE] Account balance after: %s", lazy(_account_balance, account_id, request.user))
             
             headers = self.get_success_headers(serializer.data)
             logger.info(f"[TRANSACTION_CREATE] Transaction created successfully: {serializer.data.get('type')} - {serializer.data.get('amount')}")
-            logger.debug(f"[TRANSACTION_CREATE] Created transaction data: {serializer.data}")
+            logger.debug("[TRANSACTION_CREATE] Created transaction data: %s", serializer.data)
             
             return Response(serializer.data, status=201, headers=headers)
             
+        except serializers.ValidationError as e:
+            # Raised when a concurrent write drained the account after validation
+            logger.warning(f"[TRANSACTION_CREATE] Rejected at commit: {e.detail}")
+            return Response(e.detail, status=400)
+
         except Exception as e:
             logger.error(f"[TRANSACTION_CREATE] Transaction creation failed: {str(e)}", exc_info=True)
             logger.error(f"[TRANSACTION_CREATE] User: {request.user}, Data: {request.data}")
@@ -118,22 +125,22 @@ class DashboardSummaryView(APIView):
         
         try:
             user = request.user
-            logger.debug(f"[DASHBOARD] Fetching accounts for user: {user}")
+            logger.debug("[DASHBOARD] Fetching accounts for user: %s", user)
             
-            accounts = Account.objects.filter(user=user, status=1)
-            account_count = accounts.count()
+            balances = list(Account.objects.filter(user=user, status=1).values_list('balance', flat=True))
+            account_count = len(balances)
             logger.info(f"[DASHBOARD] Found {account_count} active accounts")
             
-            logger.debug(f"[DASHBOARD] Calculating total balance")
-            total_balance = sum(acc.balance for acc in accounts)
+            logger.debug("[DASHBOARD] Calculating total balance")
+            total_balance = sum(balances)
             logger.info(f"[DASHBOARD] Total balance calculated: {total_balance}")
             
             # Recent transactions
-            logger.debug(f"[DASHBOARD] Fetching recent transactions")
-            recent_transactions = Transaction.objects.filter(user=user).order_by('-date')[:5]
-            logger.info(f"[DASHBOARD] Found {recent_transactions.count()} recent transactions")
+            logger.debug("[DASHBOARD] Fetching recent transactions")
+            recent_transactions = Transaction.objects.filter(user=user).select_related('account').order_by('-date')[:5]
             
             recent_serializer = TransactionSerializer(recent_transactions, many=True)
+            logger.info(f"[DASHBOARD] Found {len(recent_serializer.data)} recent transactions")
             
             response_data = {
                 "total_balance": total_balance,
@@ -141,7 +148,7 @@ class DashboardSummaryView(APIView):
                 "recent_transactions": recent_serializer.data
             }
             
-            logger.debug(f"[DASHBOARD] Response data prepared: {response_data}")
+            logger.debug("[DASHBOARD] Response data prepared: %s", response_data)
             logger.info(f"[DASHBOARD] Dashboard summary completed successfully for user: {user}")
             
             return Response(response_data)
@@ -3,3 +3,16 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from django.conf import settings
+        from core import signals  # noqa: F401
+        if settings.PERF_INSTRUMENTATION_ENABLED:
+            from core.utils import perf
+            perf.install()
+        if settings.PROFILER_ENABLED:
+            from core.utils import profiler
+            profiler.install()
+        if settings.METRICS_MULTIPROC_DIR:
+            from core.utils.metrics import registry
+            registry.start_flusher()
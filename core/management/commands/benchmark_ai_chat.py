@@ -0,0 +1,112 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.management.stubs import StubLLMHandler, free_port, percentile, start_stub
+from core.models import User, Account
+
+MODES = (
+    ('sync', 'flowfunds_back.wsgi:application', 'sync'),
+    ('asgi', 'flowfunds_back.asgi:application', 'uvicorn_worker.UvicornWorker'),
+)
+
+
+class Command(BaseCommand):
+    help = 'Compares AI chat throughput under sync gunicorn workers and ASGI (uvicorn) workers against a stub LLM'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100, help='Number of chat requests per mode')
+        parser.add_argument('--concurrency', type=int, default=50, help='Chat requests in flight')
+        parser.add_argument('--latency', type=float, default=1.0, help='Stub LLM latency in seconds')
+        parser.add_argument('--workers', type=int, default=2, help='Server worker processes')
+
+    def handle(self, *args, **options):
+        stub, stub_url = start_stub(StubLLMHandler, latency=options['latency'])
+
+        phone = f'bench-{int(time.time() * 1000)}'[-20:]
+        user = User.objects.create_user(phone, 'benchmark')
+        Account.objects.create(user=user, name='MoMo', number='000', type='momo', balance=50000)
+        token = str(RefreshToken.for_user(user).access_token)
+
+        env = dict(
+            os.environ,
+            DEEPSEEK_BASE_URL=stub_url,
+            DEEPSEEK_API_KEY='benchmark',
+        )
+        try:
+            for label, app, worker_class in MODES:
+                self._run_mode(label, app, worker_class, env, token, options)
+        finally:
+            user.delete()
+            stub.shutdown()
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
+
+    def _run_mode(self, label, app, worker_class, env, token, options):
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', app, '-k', worker_class,
+             '-w', str(options['workers']), '-b', f'127.0.0.1:{port}', '--timeout', '120'],
+            cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        base = f'http://127.0.0.1:{port}/api'
+        headers = {'Authorization': f'Bearer {token}'}
+        try:
+            self._wait_ready(f'{base}/accounts/', headers)
+
+            chat_latencies = []
+            accounts_latencies = []
+            stop = threading.Event()
+
+            def chat(_):
+                start = time.perf_counter()
+                requests.post(f'{base}/ai/chat/', json={'question': 'How much did I spend this week?'},
+                              headers=headers, timeout=300).raise_for_status()
+                chat_latencies.append(time.perf_counter() - start)
+
+            def probe_accounts():
+                # Plain CRUD traffic running alongside the chat load
+                while not stop.is_set():
+                    start = time.perf_counter()
+                    requests.get(f'{base}/accounts/', headers=headers, timeout=300)
+                    accounts_latencies.append(time.perf_counter() - start)
+                    stop.wait(0.1)
+
+            # One unmeasured wave, so every worker has loaded the LLM SDK and opened its connections
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+                list(pool.map(chat, range(options['concurrency'])))
+            chat_latencies.clear()
+
+            prober = threading.Thread(target=probe_accounts)
+            start = time.perf_counter()
+            prober.start()
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+                list(pool.map(chat, range(options['requests'])))
+            elapsed = time.perf_counter() - start
+            stop.set()
+            prober.join()
+
+            self.stdout.write(
+                f'{label:>5} ({options["workers"]} workers): {len(chat_latencies) / elapsed:,.1f} chats/sec, '
+                f'chat p50 {percentile(chat_latencies, 50):.2f}s p95 {percentile(chat_latencies, 95):.2f}s, '
+                f'/api/accounts/ under load p50 {percentile(accounts_latencies, 50) * 1000:.0f}ms '
+                f'p95 {percentile(accounts_latencies, 95) * 1000:.0f}ms'
+            )
+        finally:
+            server.terminate()
+            server.wait()
+
+    def _wait_ready(self, url, headers, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                requests.get(url, headers=headers, timeout=5)
+                return
+            except requests.RequestException:
+                time.sleep(0.2)
+        raise CommandError(f'Server did not start listening on {url}')
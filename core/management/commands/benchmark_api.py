@@ -0,0 +1,308 @@
+import base64
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from py_vapid import Vapid
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.management import population, routes
+from core.management.commands.benchmark_ai_chat import MODES
+from core.management.stubs import StubLLMHandler, StubPushHandler, free_port, percentile, start_stub
+from core.models import User, Account, BudgetLimit, PushSubscription, Transaction
+from core.services.notification_service import NotificationService
+
+
+class Command(BaseCommand):
+    help = (
+        'Seeds a user population, drives every route in core/api/urls.py at a given concurrency '
+        'against stub LLM and push services, and writes throughput and p50/p95/p99 latency as JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='Users to seed (an existing population is reused)')
+        parser.add_argument('--transactions', type=int, default=500, help='Average transactions per seeded user')
+        parser.add_argument('--fresh', action='store_true', help='Delete any existing population and seed a new one')
+        parser.add_argument('--cleanup', action='store_true', help='Delete the population when done')
+        parser.add_argument('--sample', type=int, default=500, help='Seeded users the requests are spread over')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint')
+        parser.add_argument('--concurrency', type=int, default=8, help='Requests in flight')
+        parser.add_argument(
+            '--server', choices=('none', 'sync', 'asgi'), default='none',
+            help='none: in-process test client; sync/asgi: a local gunicorn with sync or uvicorn workers',
+        )
+        parser.add_argument('--workers', type=int, default=2, help='gunicorn workers for --server')
+        parser.add_argument('--llm-latency', type=float, default=0.2, help='Stub LLM latency in seconds')
+        parser.add_argument('--push-latency', type=float, default=0.05, help='Stub push service latency in seconds')
+        parser.add_argument(
+            '--jobs', action='store_true',
+            help='Also time the morning and evening reminder jobs (pushes to every subscription, so only '
+                 'allowed when the database holds nothing but the benchmark population)',
+        )
+        parser.add_argument('--output', default='benchmark_api.json', help='Where to write the JSON results')
+
+    def handle(self, *args, **options):
+        missing = routes.missing_routes()
+        if missing:
+            raise CommandError(f'No entry in core/management/routes.py for {", ".join(missing)}')
+        llm_stub, llm_url = start_stub(StubLLMHandler, latency=options['llm_latency'])
+        push_stub, push_url = start_stub(StubPushHandler, latency=options['push_latency'])
+        # The LLM client is created on first use and picks these up
+        settings.DEEPSEEK_BASE_URL = llm_url
+        settings.DEEPSEEK_API_KEY = 'benchmark'
+
+        server = context = None
+        try:
+            self._prepare_population(options, push_url)
+            context = self._context(options, push_url)
+
+            if options['server'] == 'none':
+                make_session, base = _ClientSession, ''
+            else:
+                server, base = self._start_server(options, llm_url)
+                make_session = requests.Session
+
+            results = {'meta': self._meta(options), 'endpoints': {}, 'jobs': {}}
+            self.stdout.write(f'{"endpoint":<46} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"errors":>6}')
+            for name, _, method, path, body, who in routes.ROUTES:
+                result = self._drive(make_session, base, method, path, body, who, context, options)
+                results['endpoints'][name] = result
+                self._write_row(name, result)
+
+            if options['jobs']:
+                results['jobs'] = self._run_jobs(push_url)
+
+            with open(options['output'], 'w') as out:
+                json.dump(results, out, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Benchmark complete, results written to {options["output"]}'))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+            llm_stub.shutdown()
+            push_stub.shutdown()
+            if context is not None:
+                # Users the register run created, so delete_population() finds them
+                User.objects.filter(
+                    phone_number__startswith=f'{population.PREFIX}r{context["run"]}', created__gte=context['started'],
+                ).update(is_seeded=True)
+            if options['cleanup']:
+                population.delete_population()
+
+    def _prepare_population(self, options, push_url):
+        if options['fresh']:
+            population.delete_population()
+        existing = population.population_size()
+        if existing:
+            self.stdout.write(f'Reusing {existing:,} seeded users (--fresh to reseed)')
+        else:
+            start = time.perf_counter()
+            population.seed_population(
+                options['users'], options['transactions'], push_endpoint=f'{push_url}/push/',
+                log=lambda message: self.stdout.write(message),
+            )
+            self.stdout.write(f'Seeded in {time.perf_counter() - start:.1f}s')
+        # A reused population still points at an earlier run's stub
+        PushSubscription.objects.filter(user__in=population.seeded_users()).update(endpoint=f'{push_url}/push/')
+
+    def _context(self, options, push_url):
+        """Tokens and object ids for the sampled users, so requests don't query for them."""
+        users = list(
+            population.seeded_users().order_by('?')[:options['sample']]
+        )
+        if not users:
+            raise CommandError('No seeded users to benchmark with')
+        ids = [user.pk for user in users]
+        accounts = dict(Account.objects.filter(user_id__in=ids).exclude(type='cash').values_list('user_id', 'pk'))
+        # Only some of the population has budget limits and push subscriptions;
+        # the detail routes need one for every sampled user
+        limits = dict(BudgetLimit.objects.filter(user_id__in=ids).values_list('user_id', 'pk'))
+        limits.update((limit.user_id, limit.pk) for limit in BudgetLimit.objects.bulk_create([
+            BudgetLimit(user_id=pk, category='Food', amount=Decimal('60000')) for pk in ids if pk not in limits
+        ]))
+        subscriptions = dict(PushSubscription.objects.filter(user_id__in=ids).values_list('user_id', 'pk'))
+        p256dh, auth = population.subscription_keys()
+        subscriptions.update((subscription.user_id, subscription.pk) for subscription in PushSubscription.objects.bulk_create([
+            PushSubscription(user_id=user.pk, endpoint=f'{push_url}/push/{user.phone_number}', p256dh=p256dh, auth=auth)
+            for user in users if user.pk not in subscriptions
+        ]))
+
+        # Every DELETE request removes an account of its own
+        run = f'{int(time.time()) % 100000:05d}'
+        spares = [account.pk for account in Account.objects.bulk_create([
+            Account(user_id=users[i % len(users)].pk, name='Spare', number=f'S{run}{i}', type='cash')
+            for i in range(options['requests'])
+        ])]
+
+        staff, _ = User.objects.get_or_create(
+            phone_number=f'{population.PREFIX}staff', is_seeded=True,
+            defaults={'is_staff': True, 'first_name': 'Bench staff'},
+        )
+        context = {
+            'started': datetime.now(dt_timezone.utc),
+            'users': [],
+            'staff_token': str(RefreshToken.for_user(staff).access_token),
+            'spares': spares,
+            'push_url': push_url,
+            'run': run,
+        }
+        for user in users:
+            refresh = RefreshToken.for_user(user)
+            context['users'].append({
+                'id': user.pk,
+                'phone_number': user.phone_number,
+                'token': str(refresh.access_token),
+                'refresh': str(refresh),
+                'account': accounts[user.pk],
+                'limit': limits[user.pk],
+                'subscription': subscriptions[user.pk],
+            })
+        return context
+
+    def _drive(self, make_session, base, method, path, body, who, context, options):
+        users = context['users']
+        run = context['run']
+        counter = iter(range(options['requests']))
+        counter_lock = threading.Lock()
+        latencies, errors = [], []
+
+        def worker():
+            session = make_session()
+            try:
+                while True:
+                    with counter_lock:
+                        i = next(counter, None)
+                    if i is None:
+                        return
+                    user = users[i % len(users)]
+                    request = dict(
+                        user, password=population.PASSWORD, spare=context['spares'][i], push_url=context['push_url'],
+                        new_phone=f'{population.PREFIX}r{run}{i:06d}', new_number=f'B{run}{i}',
+                    )
+                    headers = {}
+                    if who == 'user':
+                        headers['Authorization'] = f'Bearer {user["token"]}'
+                    elif who == 'staff':
+                        headers['Authorization'] = f'Bearer {context["staff_token"]}'
+                    start = time.perf_counter()
+                    try:
+                        status = session.request(
+                            method, f'{base}{path(request)}', json=body(request) if body else None,
+                            headers=headers, timeout=300,
+                        ).status_code
+                    except Exception:
+                        status = 599
+                    latencies.append(time.perf_counter() - start)
+                    if status >= 400:
+                        errors.append(status)
+            finally:
+                session.close()
+                connections.close_all()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            for future in [pool.submit(worker) for _ in range(options['concurrency'])]:
+                future.result()
+        elapsed = time.perf_counter() - start
+
+        return {
+            'requests': len(latencies),
+            'errors': len(errors),
+            'error_statuses': sorted(set(errors)),
+            'seconds': round(elapsed, 3),
+            'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+            'latency_ms': {
+                'mean': round(statistics.fmean(latencies) * 1000, 1) if latencies else 0.0,
+                'p50': round(percentile(latencies, 50) * 1000, 1),
+                'p95': round(percentile(latencies, 95) * 1000, 1),
+                'p99': round(percentile(latencies, 99) * 1000, 1),
+                'max': round(max(latencies, default=0.0) * 1000, 1),
+            },
+        }
+
+    def _run_jobs(self, push_url):
+        if PushSubscription.objects.exclude(user__in=population.seeded_users()).exists():
+            raise CommandError('--jobs would push to subscriptions outside the benchmark population')
+        vapid = Vapid()
+        vapid.generate_keys()
+        raw_key = vapid.private_key.private_numbers().private_value.to_bytes(32, 'big')
+        os.environ['VAPID_PRIVATE_KEY'] = base64.urlsafe_b64encode(raw_key).strip(b'=').decode('ascii')
+
+        jobs = {}
+        for name, job in (('send_reminders --type=morning', NotificationService.send_morning_reminders),
+                          ('send_reminders --type=evening', NotificationService.send_evening_summary)):
+            start = time.perf_counter()
+            sent = job()
+            elapsed = time.perf_counter() - start
+            jobs[name] = {'sent': sent, 'seconds': round(elapsed, 3), 'pushes_per_second': round(sent / elapsed, 1) if elapsed else 0.0}
+            self.stdout.write(f'{name:<46} {sent:,} sent in {elapsed:.2f}s')
+        return jobs
+
+    def _start_server(self, options, llm_url):
+        app, worker_class = {label: (app, worker) for label, app, worker in MODES}[options['server']]
+        port = free_port()
+        env = dict(os.environ, DEEPSEEK_BASE_URL=llm_url, DEEPSEEK_API_KEY='benchmark')
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', app, '-k', worker_class,
+             '-w', str(options['workers']), '-b', f'127.0.0.1:{port}', '--timeout', '120'],
+            cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        base = f'http://127.0.0.1:{port}'
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                requests.get(f'{base}/api/auth/me/', timeout=5)
+                return server, base
+            except requests.RequestException:
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError(f'Server did not start listening on {base}')
+
+    def _meta(self, options):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True,
+            ).stdout.strip() or None
+        except OSError:
+            commit = None
+        return {
+            'started': datetime.now(dt_timezone.utc).isoformat(),
+            'git_commit': commit,
+            'database': connection.vendor,
+            'population': {'users': population.population_size(), 'transactions': Transaction.objects.count()},
+            **{key: options[key] for key in ('server', 'workers', 'concurrency', 'requests', 'sample', 'llm_latency', 'push_latency')},
+        }
+
+    def _write_row(self, name, result):
+        latency = result['latency_ms']
+        self.stdout.write(
+            f'{name:<46} {result["throughput_rps"]:>8.1f} {latency["p50"]:>8.1f} {latency["p95"]:>8.1f} '
+            f'{latency["p99"]:>8.1f} {result["errors"]:>6}'
+        )
+
+
+class _ClientSession:
+    """Django test client with the small part of the requests.Session API used here."""
+
+    def __init__(self):
+        self.client = Client(HTTP_HOST='localhost', raise_request_exception=False)
+
+    def request(self, method, url, json=None, headers=None, timeout=None):
+        kwargs = {'headers': headers or {}}
+        if json is not None:
+            kwargs.update(data=json, content_type='application/json')
+        return getattr(self.client, method.lower())(url, **kwargs)
+
+    def close(self):
+        pass
+
@@ -0,0 +1,88 @@
+import time
+import threading
+from collections import Counter
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIClient
+from core.models import User, Account, Transaction
+
+
+class Command(BaseCommand):
+    help = 'Fires parallel expenses at one account and checks throughput and the final balance'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent writers')
+        parser.add_argument('--requests', type=int, default=50, help='Expenses posted per writer')
+        parser.add_argument('--amount', type=str, default='100.00', help='Amount of each expense')
+        parser.add_argument('--initial-balance', type=str, help='Starting balance (default: enough for half the requests)')
+        parser.add_argument('--type', type=str, default='expense', choices=['expense', 'save'], help='Transaction type to post')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark user and its rows')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING('SQLite serializes writers; run against PostgreSQL for meaningful numbers'))
+
+        threads = options['threads']
+        per_thread = options['requests']
+        amount = Decimal(options['amount'])
+        total_requests = threads * per_thread
+        initial = Decimal(options['initial_balance']) if options.get('initial_balance') else amount * (total_requests // 2)
+
+        phone = f'bench-{int(time.time() * 1000)}'[-20:]
+        user = User.objects.create_user(phone, 'benchmark')
+        account = Account.objects.create(user=user, name='Benchmark', number=phone, type='momo', balance=initial)
+
+        statuses = Counter()
+        statuses_lock = threading.Lock()
+        barrier = threading.Barrier(threads)
+
+        def writer():
+            client = APIClient(HTTP_HOST='localhost')
+            client.force_authenticate(user)
+            local = Counter()
+            barrier.wait()
+            try:
+                for _ in range(per_thread):
+                    response = client.post('/api/transactions/', {
+                        'type': options['type'],
+                        'amount': str(amount),
+                        'reason': 'Benchmark',
+                        'category': 'Benchmark',
+                        'account_id': str(account.id),
+                        'date': timezone.now().isoformat(),
+                    }, format='json')
+                    local[response.status_code] += 1
+            finally:
+                connection.close()
+                with statuses_lock:
+                    statuses.update(local)
+
+        workers = [threading.Thread(target=writer) for _ in range(threads)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+
+        account.refresh_from_db()
+        created = Transaction.objects.filter(account=account).count()
+        expected = initial - amount * created
+
+        self.stdout.write(f'Writers: {threads} x {per_thread} {options["type"]} of {amount} (initial balance {initial})')
+        self.stdout.write(f'Throughput: {total_requests / elapsed:,.1f} requests/sec over {elapsed:.2f}s')
+        self.stdout.write(f'Responses: {dict(statuses)}')
+        self.stdout.write(f'Transactions created: {created}, final balance: {account.balance}, expected: {expected}')
+
+        if not options['keep']:
+            user.delete()
+
+        if not statuses[201]:
+            raise CommandError(f'No expense was created (responses {dict(statuses)}); nothing was measured')
+        if created != statuses[201]:
+            raise CommandError(f'{statuses[201]} requests succeeded but {created} transactions exist')
+        if account.balance != expected or account.balance < 0:
+            raise CommandError('Balance mismatch: concurrent updates were lost or overdrawn')
+        self.stdout.write(self.style.SUCCESS('Final balance is consistent'))
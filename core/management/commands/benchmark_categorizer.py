@@ -0,0 +1,60 @@
+import time
+from collections import Counter
+from django.core.management.base import BaseCommand
+from core.utils.keyword_classifier import keyword_classifier
+
+# Representative reasons as typed by users, in English and French, including
+# ones the keyword table is not expected to know.
+SAMPLE_CORPUS = [
+    'Lunch', 'lunch with colleagues', 'Taxi', 'taxi to work', 'moto', 'Bendskin marché',
+    'loyer', 'Loyer janvier', 'House rent', 'MTN airtime', 'Orange forfait internet',
+    'Recharge crédit', 'ENEO facture', 'Camwater', 'water bill', 'Salary', 'Salaire',
+    'Prime fin d\'année', 'Pharmacie', 'hospital consultation', 'Médicaments',
+    'Cinema', 'Soirée', 'Netflix', 'Chaussures', 'Pagne', 'New phone', 'Tontine',
+    'Njangi contribution', 'Groceries', 'Courses supermarché', 'Poisson braisé',
+    'Beignets haricot', 'Carburant', 'Essence', 'Billet bus Douala', 'Snack bar',
+    'Gift for mum', 'Church offering', 'School fees', 'Frais de scolarité',
+    'Transfer to Paul', 'Cotisation', 'Barber', 'Coiffure', 'Repair', 'Misc',
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the local keyword classifier: throughput and LLM fallback rate'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000, help='Passes over the corpus')
+        parser.add_argument('--file', type=str, help='Corpus file with one reason per line')
+        parser.add_argument('--show-misses', action='store_true', help='List reasons that would go to the LLM')
+
+    def handle(self, *args, **options):
+        corpus = SAMPLE_CORPUS
+        if options.get('file'):
+            with open(options['file'], encoding='utf-8') as fh:
+                corpus = [line.strip() for line in fh if line.strip()]
+
+        # Compile the automaton outside the timed loop
+        keyword_classifier.invalidate()
+        keyword_classifier.classify('warmup')
+
+        results = {reason: keyword_classifier.classify(reason) for reason in corpus}
+
+        iterations = options['iterations']
+        start = time.perf_counter()
+        for _ in range(iterations):
+            for reason in corpus:
+                keyword_classifier.classify(reason)
+        elapsed = time.perf_counter() - start
+
+        classified = iterations * len(corpus)
+        misses = [reason for reason, category in results.items() if category is None]
+        fallback_rate = len(misses) / len(corpus) if corpus else 0.0
+        categories = Counter(category for category in results.values() if category)
+
+        self.stdout.write(f'Corpus size: {len(corpus)} reasons x {iterations} iterations')
+        self.stdout.write(f'Throughput: {classified / elapsed:,.0f} reasons/sec ({elapsed * 1e6 / classified:.1f} us/reason)')
+        self.stdout.write(f'LLM fallback rate: {fallback_rate:.1%} ({len(misses)}/{len(corpus)})')
+        self.stdout.write(f'Matched categories: {dict(categories)}')
+        if options.get('show_misses'):
+            for reason in misses:
+                self.stdout.write(f'  -> LLM: {reason}')
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
@@ -0,0 +1,74 @@
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+from django.db import connection
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.models import User, Account, Transaction
+
+
+class Command(BaseCommand):
+    help = 'Reports SQL queries and median latency per API endpoint for one seeded user, in-process'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help='Requests per endpoint')
+        parser.add_argument('--transactions', type=int, default=500, help='Transactions to seed for the user')
+
+    def handle(self, *args, **options):
+        phone = f'bench-{int(time.time() * 1000)}'[-20:]
+        user = User.objects.create_user(phone, 'benchmark', first_name='Bench')
+        try:
+            accounts = [
+                Account.objects.create(user=user, name=name, number=f'{phone[-6:]}{i}', type=kind, balance=Decimal('1000000'))
+                for i, (name, kind) in enumerate((('MoMo', 'momo'), ('Orange Money', 'om'), ('Cash', 'cash')))
+            ]
+            now = timezone.now()
+            Transaction.objects.bulk_create([
+                Transaction(
+                    user=user, account=accounts[i % len(accounts)], type='expense', amount=Decimal(500 + i),
+                    category='Food', reason='Lunch', date=now - timedelta(hours=i),
+                )
+                for i in range(options['transactions'])
+            ])
+
+            client = Client(HTTP_HOST='localhost', HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+            account_url = f'/api/accounts/{accounts[0].pk}/'
+            endpoints = (
+                ('GET', '/api/auth/me/', None),
+                ('GET', '/api/accounts/', None),
+                ('POST', '/api/accounts/', lambda i: {'name': f'Bench {i}', 'number': f'B{i}', 'type': 'bank', 'initial_balance': 0}),
+                ('GET', account_url, None),
+                ('PATCH', account_url, lambda i: {'name': f'MoMo {i}'}),
+                ('GET', '/api/transactions/', None),
+                ('POST', '/api/transactions/', lambda i: {
+                    'type': 'income', 'amount': 1000, 'category': 'Salary', 'reason': 'Salary',
+                    'date': now.isoformat(), 'account_id': str(accounts[1].pk),
+                }),
+                ('GET', '/api/dashboard/summary/', None),
+                ('GET', '/api/budget-limits/', None),
+            )
+
+            self.stdout.write(f'{"endpoint":<48} {"queries":>7} {"p50 ms":>8}')
+            for method, url, payload in endpoints:
+                queries = []
+                latencies = []
+                for i in range(options['iterations']):
+                    kwargs = {'data': payload(i), 'content_type': 'application/json'} if payload else {}
+                    connection.queries_log.clear()  # bounded deque; a full one breaks the capture
+                    with CaptureQueriesContext(connection) as ctx:
+                        start = time.perf_counter()
+                        response = getattr(client, method.lower())(url, **kwargs)
+                        latencies.append(time.perf_counter() - start)
+                    if response.status_code >= 400:
+                        self.stderr.write(f'{method} {url} returned {response.status_code}')
+                    queries.append(len(ctx.captured_queries))
+                self.stdout.write(
+                    f'{method + " " + url.replace(str(accounts[0].pk), "<id>"):<48} '
+                    f'{statistics.median(queries):>7.0f} {statistics.median(latencies) * 1000:>8.1f}'
+                )
+        finally:
+            user.delete()
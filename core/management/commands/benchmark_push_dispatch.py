@@ -0,0 +1,70 @@
+import base64
+import os
+import time
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from django.core.management.base import BaseCommand
+from py_vapid import Vapid
+from core.management.stubs import StubPushHandler, start_stub
+from core.models import User, PushSubscription
+from core.services.notification_service import PushDispatcher
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).strip(b'=').decode('ascii')
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks push dispatch against a local stub push endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscriptions', type=int, default=200, help='Number of subscriptions to notify')
+        parser.add_argument('--latency', type=float, default=0.05, help='Stub endpoint latency in seconds')
+        parser.add_argument('--gone-rate', type=float, default=0.05, help='Fraction of pushes answered 410 Gone')
+        parser.add_argument('--workers', type=int, default=8, help='Pool size for the concurrent run')
+
+    def handle(self, *args, **options):
+        server, stub_url = start_stub(StubPushHandler, latency=options['latency'], gone_rate=options['gone_rate'])
+        endpoint = f'{stub_url}/push/'
+
+        vapid = Vapid()
+        vapid.generate_keys()
+
+        phone = f'bench-{int(time.time() * 1000)}'[-20:]
+        user = User.objects.create_user(phone, 'benchmark')
+        try:
+            for label, workers in (('sequential', 1), ('concurrent', options['workers'])):
+                self._seed(user, endpoint, options['subscriptions'])
+                subscriptions = list(PushSubscription.objects.filter(user=user))
+
+                start = time.perf_counter()
+                sent = PushDispatcher(max_workers=workers, vapid=vapid).send_many(
+                    (sub, 'Benchmark notification', 'FlowFunds') for sub in subscriptions
+                )
+                elapsed = time.perf_counter() - start
+
+                remaining = PushSubscription.objects.filter(user=user).count()
+                self.stdout.write(
+                    f'{label:>10} ({workers} workers): {len(subscriptions) / elapsed:,.1f} pushes/sec, '
+                    f'{elapsed:.2f}s total, {sent} delivered, {len(subscriptions) - remaining} gone removed'
+                )
+        finally:
+            user.delete()
+            server.shutdown()
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
+
+    def _seed(self, user, endpoint, count):
+        PushSubscription.objects.filter(user=user).delete()
+        rows = []
+        for i in range(count):
+            key = ec.generate_private_key(ec.SECP256R1()).public_key().public_bytes(
+                encoding=serialization.Encoding.X962,
+                format=serialization.PublicFormat.UncompressedPoint,
+            )
+            rows.append(PushSubscription(
+                user=user,
+                endpoint=f'{endpoint}{i}',
+                p256dh=_b64(key),
+                auth=_b64(os.urandom(16)),
+            ))
+        PushSubscription.objects.bulk_create(rows)
@@ -0,0 +1,79 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Modules that should only be imported when a request or job needs them
+LAZY_MODULES = ('openai', 'httpx', 'pywebpush', 'py_vapid')
+
+# Runs in a fresh interpreter, like a newly forked worker before its first request
+PROBE = f'''
+import json, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+setup_done = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+urls_done = time.perf_counter()
+
+rss_kb = 0
+try:
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                rss_kb = int(line.split()[1])
+except OSError:
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+print(json.dumps({{
+    'setup': setup_done - started,
+    'urls': urls_done - setup_done,
+    'rss_mb': rss_kb / 1024,
+    'loaded': [name for name in {LAZY_MODULES!r} if name in sys.modules],
+}}))
+'''
+
+
+class Command(BaseCommand):
+    help = 'Measures worker startup: django.setup(), URLconf load and resident memory in fresh interpreters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to start')
+        parser.add_argument('--max-startup-ms', type=float, default=None, help='Fail if median setup + URLconf time exceeds this')
+        parser.add_argument('--max-rss-mb', type=float, default=None, help='Fail if median RSS exceeds this')
+
+    def handle(self, *args, **options):
+        samples = []
+        for _ in range(options['runs']):
+            result = subprocess.run(
+                [sys.executable, '-c', PROBE],
+                cwd=settings.BASE_DIR, env=os.environ.copy(), capture_output=True, text=True,
+            )
+            if result.returncode != 0:
+                raise CommandError(f'Startup probe failed:\n{result.stderr}')
+            samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+
+        setup_ms = statistics.median(s['setup'] for s in samples) * 1000
+        urls_ms = statistics.median(s['urls'] for s in samples) * 1000
+        rss_mb = statistics.median(s['rss_mb'] for s in samples)
+        loaded = sorted({name for s in samples for name in s['loaded']})
+
+        self.stdout.write(
+            f'median of {len(samples)} runs: django.setup() {setup_ms:.0f}ms, URLconf {urls_ms:.0f}ms, '
+            f'total {setup_ms + urls_ms:.0f}ms, RSS {rss_mb:.1f} MB'
+        )
+        self.stdout.write(f'heavy modules imported at startup: {", ".join(loaded) or "none"}')
+
+        failures = []
+        if options['max_startup_ms'] is not None and setup_ms + urls_ms > options['max_startup_ms']:
+            failures.append(f'startup {setup_ms + urls_ms:.0f}ms > {options["max_startup_ms"]:.0f}ms')
+        if options['max_rss_mb'] is not None and rss_mb > options['max_rss_mb']:
+            failures.append(f'RSS {rss_mb:.1f} MB > {options["max_rss_mb"]:.1f} MB')
+        if failures:
+            raise CommandError('Startup regression: ' + '; '.join(failures))
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
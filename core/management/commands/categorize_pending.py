@@ -0,0 +1,29 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from core.services.categorization_service import CategorizationService
+
+class Command(BaseCommand):
+    help = 'Categorizes transactions still waiting for an AI category'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Transactions per batch')
+        parser.add_argument('--loop', action='store_true', help='Keep polling the queue (standalone worker)')
+
+    def handle(self, *args, **options):
+        batch_size = options.get('batch_size') or settings.CATEGORIZATION_BATCH_SIZE
+
+        if not options.get('loop'):
+            count = CategorizationService.drain(batch_size)
+            self.stdout.write(self.style.SUCCESS(f'Successfully categorized {count} transactions'))
+            return
+
+        self.stdout.write('Categorization worker started, press CTRL-C to stop')
+        try:
+            while True:
+                count = CategorizationService.drain(batch_size)
+                if count:
+                    self.stdout.write(f'Categorized {count} transactions')
+                time.sleep(settings.CATEGORIZATION_POLL_INTERVAL)
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS('Categorization worker stopped'))
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from core.utils.category_cache import category_cache
+
+class Command(BaseCommand):
+    help = 'Deletes expired entries from the category memo cache'
+
+    def handle(self, *args, **options):
+        count = category_cache.prune()
+        self.stdout.write(self.style.SUCCESS(f'Successfully pruned {count} expired cache entries'))
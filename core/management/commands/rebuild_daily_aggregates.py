@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.models import User
+from core.services.aggregate_service import AggregateService
+
+class Command(BaseCommand):
+    help = 'Recomputes the daily aggregates from the transactions (backfill and repair)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', default=[], help='Only this phone number (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Aggregate rows written per INSERT')
+
+    def handle(self, *args, **options):
+        users = None
+        if options['user']:
+            users = User.objects.filter(phone_number__in=options['user'])
+            missing = set(options['user']) - set(users.values_list('phone_number', flat=True))
+            if missing:
+                raise CommandError(f'Unknown phone number: {", ".join(sorted(missing))}')
+
+        count = AggregateService.rebuild(users, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Successfully rebuilt {count} daily aggregate rows'))
@@ -0,0 +1,40 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+from core.models import Transaction
+from core.services.categorization_service import CategorizationService
+
+class Command(BaseCommand):
+    help = 'Re-runs categorization over existing transactions in batched LLM calls'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--category', action='append', default=[], help='Only transactions in this category (repeatable)')
+        parser.add_argument('--missing', action='store_true', help='Include transactions without a category')
+        parser.add_argument('--all', action='store_true', help='Recategorize every transaction')
+        parser.add_argument('--since-hours', type=int, help='Only transactions created in the last N hours')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows read from the database per round')
+        parser.add_argument('--batch-size', type=int, help='Reasons per LLM call')
+        parser.add_argument('--concurrency', type=int, help='LLM calls in flight at once')
+        parser.add_argument('--skip-cache', action='store_true', help='Ignore cached categories (user overrides still apply)')
+
+    def handle(self, *args, **options):
+        queryset = Transaction.objects.exclude(category=Transaction.CATEGORY_PENDING)
+        if not options['all']:
+            selection = Q(category__in=options['category']) if options['category'] else Q(pk__in=[])
+            if options['missing']:
+                selection |= Q(category__isnull=True) | Q(category='')
+            if not options['category'] and not options['missing']:
+                raise CommandError('Please specify --category, --missing or --all')
+            queryset = queryset.filter(selection)
+        if options.get('since_hours'):
+            queryset = queryset.filter(created__gte=timezone.now() - timedelta(hours=options['since_hours']))
+
+        processed, changed = CategorizationService.recategorize(
+            queryset,
+            chunk_size=options['chunk_size'],
+            batch_size=options.get('batch_size'),
+            concurrency=options.get('concurrency'),
+            skip_cache=options['skip_cache'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Successfully recategorized {processed} transactions ({changed} changed)'))
@@ -0,0 +1,49 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from core.management import population
+
+
+class Command(BaseCommand):
+    help = (
+        'Generates a realistic population of users, accounts and transactions for scale testing '
+        '(COPY on PostgreSQL, bulk_create elsewhere)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='Users to seed')
+        parser.add_argument('--transactions', type=int, default=1000, help='Average transactions per user')
+        parser.add_argument('--days', type=int, default=365, help='Days of history, ending yesterday')
+        parser.add_argument('--offset', type=int, default=0, help='First user index, to grow an existing population')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed gives the same rows')
+        parser.add_argument('--chunk-rows', type=int, default=200_000, help='Transactions written per database transaction')
+        parser.add_argument('--method', choices=('auto', 'copy', 'orm'), default='auto', help='auto: COPY on PostgreSQL')
+        parser.add_argument('--fresh', action='store_true', help='Delete the existing seeded population first')
+        parser.add_argument('--check', action='store_true', help='Verify every account balance against its transactions')
+
+    def handle(self, *args, **options):
+        if options['offset'] + options['users'] > population.MAX_USERS:
+            raise CommandError(f'--offset plus --users must stay within {population.MAX_USERS:,}')
+        if options['method'] == 'copy' and connection.vendor != 'postgresql':
+            raise CommandError(f'--method=copy needs PostgreSQL, not {connection.vendor}')
+        if options['fresh']:
+            self.stdout.write(f'Deleted the previous population ({population.delete_population():,} rows)')
+
+        start = time.perf_counter()
+        created = population.seed_population(
+            options['users'], options['transactions'], days=options['days'], offset=options['offset'],
+            method=options['method'], chunk_rows=options['chunk_rows'], seed=options['seed'],
+            log=lambda message: self.stdout.write(message),
+        )
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {created["users"]:,} users, {created["accounts"]:,} accounts and '
+            f'{created["transactions"]:,} transactions in {elapsed:.1f}s '
+            f'({created["transactions"] / elapsed * 60:,.0f} transactions/minute)'
+        ))
+
+        if options['check']:
+            mismatched = population.balance_mismatches().count()
+            if mismatched:
+                raise CommandError(f'{mismatched:,} seeded accounts have a balance that differs from their transactions')
+            self.stdout.write(self.style.SUCCESS('Every seeded account balance matches its transactions'))
@@ -0,0 +1,405 @@
+"""
+Synthetic users, accounts and transactions for load and scale tests.
+
+Phone numbers use the MTN and Orange prefixes in roughly their market
+shares, so every user's first account gets the carrier RegisterSerializer
+would give it. Transactions follow a weighted category mix, with more
+spending on Fridays, Saturdays and around payday and little at night;
+salaried users are paid at the end of each month. Each account also gets
+an opening deposit sized so that its balance is exactly the sum of its
+transactions and never ends below zero.
+
+Seeded users have is_seeded set, a flag no API or admin form can write,
+so a population can be found, reused and removed again without touching
+real users. On PostgreSQL the rows are streamed into the tables with COPY,
+one database transaction per chunk; other databases fall back to
+bulk_create. The daily aggregates of each chunk's users are rebuilt in
+the same database transaction.
+"""
+import base64
+import os
+import random
+import uuid
+from bisect import bisect_right
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from itertools import accumulate, islice
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from core.api.serializers.auth_serializer import RegisterSerializer
+from core.models import User, Account, Transaction, BudgetLimit, PushSubscription, DailyAggregate
+from core.services.aggregate_service import AggregateService
+
+SEED_LAST_NAME = 'Seed'
+# Phone numbers of the users the benchmarks register or create for themselves
+PREFIX = 'bench'
+PASSWORD = 'benchmark'
+# Suffixes are unique per index, so this many users fit in one population
+MAX_USERS = 1_000_000
+
+PHONE_PREFIXES = (
+    # (first three digits, weight): MTN 67X, 650-654, 680-689; Orange 69X, 655-659
+    *((str(p), 6) for p in range(670, 680)),
+    *((str(p), 2) for p in range(650, 655)),
+    *((str(p), 1) for p in range(680, 690)),
+    *((str(p), 5) for p in range(690, 700)),
+    *((str(p), 2) for p in range(655, 660)),
+)
+_PREFIX_TABLE = tuple(prefix for prefix, weight in PHONE_PREFIXES for _ in range(weight))
+
+FIRST_NAMES = (
+    'Jean', 'Marie', 'Paul', 'Aicha', 'Ibrahim', 'Brice', 'Carine', 'Samuel', 'Fatima', 'Yannick',
+    'Blaise', 'Estelle', 'Hamadou', 'Sandrine', 'Franck', 'Mireille', 'Moussa', 'Christelle', 'Boris', 'Nadege',
+)
+BANKS = ('Afriland First Bank', 'SCB Cameroun', 'Societe Generale', 'Ecobank', 'UBA')
+
+EXPENSES = (
+    # (category, reasons, low, mode, high amount, weight, share paid in cash)
+    ('Food', ('Lunch', 'Ndole au restaurant', 'Marche Mokolo', 'Boulangerie', 'Beignets haricots'), 300, 1500, 15000, 34, 0.6),
+    ('Transport', ('Taxi', 'Moto-taxi', 'Bus Yaounde-Douala', 'Carburant'), 150, 500, 12000, 24, 0.8),
+    ('Utilities', ('ENEO electricity bill', 'CAMWATER', 'Internet box', 'Credit de communication'), 500, 5000, 40000, 10, 0.1),
+    ('Shopping', ('Vetements', 'Supermarche', 'Telephone', 'Quincaillerie'), 1000, 7500, 120000, 9, 0.4),
+    ('Entertainment', ('Cinema', 'Snack bar', 'Match de football', 'Abonnement TV'), 1000, 3000, 25000, 7, 0.5),
+    ('Health', ('Pharmacie', 'Consultation', 'Laboratoire'), 1000, 5000, 60000, 5, 0.4),
+    ('Rent', ('Loyer',), 25000, 60000, 200000, 1, 0.2),
+    ('Other', ('Tontine', 'Cotisation famille', 'Transfert'), 1000, 10000, 100000, 10, 0.2),
+)
+BUSINESS_INCOME = ('Business', ('Vente boutique', 'Commission', 'Vente marche', 'Prestation'), 2000, 15000, 150000)
+BUSINESS_SHARE = 0.08
+SALARY = ('Salary', 'Salaire', 60000, 150000, 600000)
+SALARIED_SHARE = 0.45
+# Users who also have the other carrier's wallet, a bank account
+SECOND_WALLET_SHARE = 0.35
+BANK_SHARE = 0.2
+BUDGET_SHARE = 0.4
+BUDGET_CATEGORIES = ('Food', 'Transport', 'Entertainment', 'Shopping')
+SUBSCRIBED_SHARE = 0.3
+
+# Relative activity by weekday (Monday first) and by local hour
+WEEKDAY_WEIGHTS = (1.0, 0.9, 0.95, 1.0, 1.25, 1.4, 0.8)
+HOUR_WEIGHTS = (
+    0.1, 0.05, 0.05, 0.05, 0.1, 0.4, 1.0, 2.0, 2.5, 2.0, 1.8, 2.0,
+    3.0, 2.8, 1.8, 1.6, 1.8, 2.4, 3.0, 3.2, 2.6, 1.8, 1.0, 0.4,
+)
+# Spending picks up once salaries land
+PAYDAY_WEIGHT = 1.3
+WAT = dt_timezone(timedelta(hours=1))
+
+USER_COLUMNS = (
+    'id', 'password', 'phone_number', 'first_name', 'last_name', 'is_superuser', 'is_staff', 'is_active',
+    'is_seeded', 'status', 'created', 'modified', 'activate_date',
+)
+ACCOUNT_COLUMNS = (
+    'id', 'user_id', 'name', 'number', 'type', 'balance', 'currency', 'status', 'created', 'modified', 'activate_date',
+)
+TRANSACTION_COLUMNS = (
+    'id', 'user_id', 'account_id', 'type', 'amount', 'category', 'reason', 'date',
+    'status', 'created', 'modified', 'activate_date',
+)
+BUDGET_COLUMNS = ('id', 'user_id', 'category', 'amount', 'period', 'status', 'created', 'modified', 'activate_date')
+SUBSCRIPTION_COLUMNS = ('id', 'user_id', 'endpoint', 'p256dh', 'auth', 'status', 'created', 'modified', 'activate_date')
+
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).strip(b'=').decode('ascii')
+
+
+def subscription_keys():
+    """A valid (p256dh, auth) pair for push subscriptions; stub endpoints don't decrypt."""
+    p256dh = _b64(ec.generate_private_key(ec.SECP256R1()).public_key().public_bytes(
+        encoding=serialization.Encoding.X962,
+        format=serialization.PublicFormat.UncompressedPoint,
+    ))
+    return p256dh, _b64(os.urandom(16))
+
+
+def phone_number(index):
+    """A Cameroonian number unique to `index` (below MAX_USERS)."""
+    prefix = _PREFIX_TABLE[(index * 2654435761) % len(_PREFIX_TABLE)]
+    return f'{prefix}{(index * 7919 + 104729) % MAX_USERS:06d}'
+
+
+class _Generator:
+    """Builds one user's rows; every user draws from its own seeded RNG."""
+
+    def __init__(self, days, seed, push_endpoint):
+        self.seed = seed
+        self.push_endpoint = push_endpoint
+        self.password = make_password(PASSWORD)
+        # One key pair serves every user
+        self.p256dh, self.auth = subscription_keys()
+        today = timezone.now().astimezone(WAT).date()
+        self.day_starts = [
+            datetime.combine(today - timedelta(days=offset), time(), tzinfo=WAT) for offset in range(days, 0, -1)
+        ]
+        self.start = self.day_starts[0]
+        self.day_cum = list(accumulate(
+            WEEKDAY_WEIGHTS[day.weekday()] * (PAYDAY_WEIGHT if day.day >= 25 or day.day <= 3 else 1.0)
+            for day in self.day_starts
+        ))
+        self.hour_cum = list(accumulate(HOUR_WEIGHTS))
+        self.expense_cum = list(accumulate(row[5] for row in EXPENSES))
+        # First day of every month in the period; salaries land on the 25th-28th
+        self.months = sorted({day.replace(day=1) for day in self.day_starts})
+
+    def user(self, index, transactions):
+        """(user, accounts, transactions, budget limits, subscriptions) rows for one user."""
+        rng = random.Random(self.seed * MAX_USERS + index)
+        new_id = lambda: uuid.UUID(int=rng.getrandbits(128), version=4)
+        number = phone_number(index)
+        carrier = RegisterSerializer.get_carrier_from_number(number)
+        joined = self.start - timedelta(days=rng.randrange(1, 400), seconds=rng.randrange(86400))
+        user_id = new_id()
+        user = (
+            user_id, self.password, number, rng.choice(FIRST_NAMES), SEED_LAST_NAME, False, False, True, True,
+            1, joined, joined, joined,
+        )
+
+        # [id, name, number, type, balance]; balances are summed as rows are generated
+        wallet = [new_id(), 'My Account', number, carrier, 0]
+        cash = [new_id(), 'Cash Account', number, 'cash', 0]
+        accounts = [wallet, cash]
+        if rng.random() < SECOND_WALLET_SHARE:
+            other = 'om' if carrier == 'momo' else 'momo'
+            accounts.append([new_id(), 'Orange Money' if other == 'om' else 'MTN MoMo', number, other, 0])
+        bank = None
+        if rng.random() < BANK_SHARE:
+            bank = [new_id(), rng.choice(BANKS), f'{rng.randrange(10 ** 10):010d}', 'bank', 0]
+            accounts.append(bank)
+        digital = [account for account in accounts if account is not cash]
+
+        rows = []
+
+        def add(account, kind, amount, category, reason, when):
+            account[4] += amount if kind == 'income' else -amount
+            rows.append((
+                new_id(), user_id, account[0], kind, amount, category, reason, when, 1, when, when, when,
+            ))
+
+        day_total, hour_total = self.day_cum[-1], self.hour_cum[-1]
+        count = max(1, round(transactions * rng.lognormvariate(-0.125, 0.5)))
+        for _ in range(count):
+            day = self.day_starts[bisect_right(self.day_cum, rng.random() * day_total)]
+            when = day + timedelta(
+                hours=bisect_right(self.hour_cum, rng.random() * hour_total), seconds=rng.randrange(3600),
+            )
+            if rng.random() < BUSINESS_SHARE:
+                category, reasons, low, mode, high = BUSINESS_INCOME
+                add(wallet, 'income', _amount(rng, low, mode, high), category, rng.choice(reasons), when)
+                continue
+            category, reasons, low, mode, high, weight, cash_share = \
+                EXPENSES[bisect_right(self.expense_cum, rng.random() * self.expense_cum[-1])]
+            account = cash if rng.random() < cash_share else (wallet if rng.random() < 0.7 else rng.choice(digital))
+            add(account, 'expense', _amount(rng, low, mode, high), category, rng.choice(reasons), when)
+
+        if rng.random() < SALARIED_SHARE:
+            category, reason, low, mode, high = SALARY
+            salary = _amount(rng, low, mode, high, step=5000)
+            for month in self.months:
+                when = month.replace(day=rng.randrange(25, 29)) + timedelta(hours=rng.randrange(8, 17))
+                if self.start <= when < self.day_starts[-1] + timedelta(days=1):
+                    add(bank or wallet, 'income', salary, category, reason, when)
+
+        opened = self.start + timedelta(hours=8)
+        for account in accounts:
+            deposit = max(0, -account[4]) + rng.randrange(0, 100000, 500)
+            if deposit:
+                add(account, 'income', deposit, 'Other', 'Opening balance', opened)
+
+        account_rows = [
+            (account_id, user_id, name, number, kind, f'{balance}.00', 'XAF', 1, joined, joined, joined)
+            for account_id, name, number, kind, balance in accounts
+        ]
+        limits = [
+            (new_id(), user_id, category, _amount(rng, 10000, 30000, 150000, step=5000), 'monthly', 1, joined, joined, joined)
+            for category in (rng.sample(BUDGET_CATEGORIES, rng.randint(1, 3)) if rng.random() < BUDGET_SHARE else ())
+        ]
+        subscriptions = [
+            (new_id(), user_id, f'{self.push_endpoint}{number}', self.p256dh, self.auth, 1, joined, joined, joined)
+        ] if rng.random() < SUBSCRIBED_SHARE else []
+        return user, account_rows, rows, limits, subscriptions
+
+
+def _amount(rng, low, mode, high, step=25):
+    """Whole XAF, rounded the way cash prices are."""
+    return max(step, round(rng.triangular(low, high, mode) / step) * step)
+
+
+def _copy_value(value):
+    if value is None:
+        return '\\N'
+    if value is True:
+        return 't'
+    if value is False:
+        return 'f'
+    if isinstance(value, str):
+        return value.translate(_COPY_ESCAPES)
+    return str(value)
+
+
+def _copy_lines(rows, batch=500):
+    """COPY text-format lines for `rows`, joined `batch` rows at a time."""
+    rows = iter(rows)
+    while True:
+        lines = ''.join('\t'.join(map(_copy_value, row)) + '\n' for row in islice(rows, batch))
+        if not lines:
+            return
+        yield lines
+
+
+class _CopyStream:
+    """File-like COPY source for psycopg2 that formats rows as they're read."""
+
+    def __init__(self, rows):
+        self._lines = _copy_lines(rows)
+        self._buffer = ''
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            lines = next(self._lines, '')
+            if not lines:
+                break
+            self._buffer += lines
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    readline = read
+
+
+def _copy(model, columns, rows):
+    """Stream `rows` into the model's table with COPY."""
+    sql = 'COPY {} ({}) FROM STDIN'.format(
+        connection.ops.quote_name(model._meta.db_table),
+        ', '.join(connection.ops.quote_name(model._meta.get_field(column).column) for column in columns),
+    )
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        if hasattr(raw, 'copy_expert'):
+            # psycopg2
+            raw.copy_expert(sql, _CopyStream(rows), size=65536)
+        else:
+            # psycopg 3
+            with raw.copy(sql) as copy:
+                for lines in _copy_lines(rows):
+                    copy.write(lines)
+
+
+def _bulk_create(model, columns, rows, batch_size=5000):
+    model.objects.bulk_create(
+        [model(**dict(zip(columns, row))) for row in rows], batch_size=batch_size,
+    )
+
+
+def seed_population(users, transactions, days=90, offset=0, push_endpoint='http://127.0.0.1:9/push/',
+                    method='auto', chunk_rows=200_000, seed=0, log=None):
+    """
+    Seed users `offset` .. `offset + users - 1` with about `transactions`
+    transactions each over the last `days` days. Numbers that already
+    belong to a user are skipped. `method` is 'copy', 'orm' or 'auto' (COPY
+    on PostgreSQL). Returns {'users', 'accounts', 'transactions'} created.
+    """
+    if offset + users > MAX_USERS:
+        raise ValueError(f'A population holds at most {MAX_USERS:,} users')
+    if method == 'auto':
+        method = 'copy' if connection.vendor == 'postgresql' else 'orm'
+    if method == 'copy' and connection.vendor != 'postgresql':
+        raise ValueError('COPY needs PostgreSQL')
+    generator = _Generator(days, seed, push_endpoint)
+    users_per_chunk = max(1, chunk_rows // max(1, transactions))
+    created = {'users': 0, 'accounts': 0, 'transactions': 0}
+
+    for start in range(offset, offset + users, users_per_chunk):
+        indexes = range(start, min(offset + users, start + users_per_chunk))
+        taken = set(User.objects.filter(
+            phone_number__in=[phone_number(index) for index in indexes],
+        ).values_list('phone_number', flat=True))
+        user_rows, account_rows, limit_rows, subscription_rows = [], [], [], []
+
+        def transaction_rows():
+            for index in indexes:
+                if phone_number(index) in taken:
+                    continue
+                user, accounts, rows, limits, subscriptions = generator.user(index, transactions)
+                user_rows.append(user)
+                account_rows.extend(accounts)
+                limit_rows.extend(limits)
+                subscription_rows.extend(subscriptions)
+                created['transactions'] += len(rows)
+                yield from rows
+
+        with transaction.atomic():
+            if method == 'copy':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL synchronous_commit TO OFF')
+                # Transactions stream in first: the users and their balances are
+                # known once they're generated, and foreign keys are checked at commit
+                _copy(Transaction, TRANSACTION_COLUMNS, transaction_rows())
+                _copy(User, USER_COLUMNS, user_rows)
+                _copy(Account, ACCOUNT_COLUMNS, account_rows)
+                _copy(BudgetLimit, BUDGET_COLUMNS, limit_rows)
+                _copy(PushSubscription, SUBSCRIPTION_COLUMNS, subscription_rows)
+            else:
+                rows = list(transaction_rows())
+                _bulk_create(User, USER_COLUMNS, user_rows)
+                _bulk_create(Account, ACCOUNT_COLUMNS, account_rows)
+                _bulk_create(BudgetLimit, BUDGET_COLUMNS, limit_rows)
+                _bulk_create(PushSubscription, SUBSCRIPTION_COLUMNS, subscription_rows)
+                _bulk_create(Transaction, TRANSACTION_COLUMNS, rows)
+            if user_rows:
+                AggregateService.rebuild(User.objects.filter(pk__in=[user[0] for user in user_rows]))
+        created['users'] += len(user_rows)
+        created['accounts'] += len(account_rows)
+        if log:
+            log(f'seeded {indexes.stop - offset:,}/{users:,} users, {created["transactions"]:,} transactions')
+    return created
+
+
+def seeded_users():
+    """Users created by seed_population() (not ones registered during a run)."""
+    return User.objects.filter(is_seeded=True).exclude(phone_number__startswith=PREFIX)
+
+
+def population_size():
+    return seeded_users().count()
+
+
+def balance_mismatches():
+    """Seeded accounts whose balance differs from the sum of their transactions."""
+    signed = Case(
+        When(transactions__type='income', then=F('transactions__amount')),
+        default=-F('transactions__amount'),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+    return (
+        Account.objects.filter(user__in=seeded_users())
+        .annotate(total=Coalesce(Sum(signed), Value(0), output_field=DecimalField(max_digits=14, decimal_places=2)))
+        .exclude(balance=F('total'))
+    )
+
+
+def delete_population():
+    """
+    Remove the seeded users and the ones the benchmarks registered, with
+    everything they own. Returns the number of rows deleted.
+    """
+    users = User.objects.filter(is_seeded=True)
+    with transaction.atomic():
+        # Bulk deletes; the collector would load every row to send signals
+        # that only drop the AI context caches of users about to go anyway
+        deleted = 0
+        sql, params = users.values('pk').query.get_compiler(connection=connection).as_sql()
+        with connection.cursor() as cursor:
+            for model in (DailyAggregate, Transaction, Account):
+                cursor.execute(
+                    f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)} WHERE user_id IN ({sql})', params,
+                )
+                deleted += cursor.rowcount
+        return deleted + users.delete()[0]
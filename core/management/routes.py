@@ -0,0 +1,76 @@
+"""
+The API routes, as one table shared by benchmark_api and the query budget
+tests, and the route templates of core/api/urls.py it has to cover.
+
+Each entry is (route, query budget, method, path, body, who). path and
+body are called with a context dict holding, for the requesting user:
+phone_number, password, refresh (a refresh token), and the ids of an
+account, a spare account to delete, a budget limit and a push
+subscription; plus new_phone and new_number, unique per request, and
+push_url. who is 'user', 'staff' or None for no token.
+"""
+import re
+from django.urls import URLPattern, URLResolver
+from django.utils import timezone
+from core.api import urls
+
+PREFIX = '/api/'
+# Router regexes to route syntax: ^budget-limits/(?P<pk>[^/.]+)/$ -> budget-limits/<pk>/
+_GROUP = re.compile(r'\(\?P<(\w+)>[^)]*\)')
+
+ROUTES = (
+    ('POST /api/auth/register/', 4, 'POST', lambda c: '/api/auth/register/', lambda c: {
+        'phone_number': c['new_phone'], 'password': c['password'], 'first_name': 'New', 'initial_amount': 1000,
+    }, None),
+    ('POST /api/auth/login/', 1, 'POST', lambda c: '/api/auth/login/', lambda c: {
+        'phone_number': c['phone_number'], 'password': c['password'],
+    }, None),
+    ('POST /api/auth/refresh/', 1, 'POST', lambda c: '/api/auth/refresh/', lambda c: {'refresh': c['refresh']}, None),
+    ('GET /api/auth/me/', 1, 'GET', lambda c: '/api/auth/me/', None, 'user'),
+    ('GET /api/accounts/', 2, 'GET', lambda c: '/api/accounts/', None, 'user'),
+    ('POST /api/accounts/', 2, 'POST', lambda c: '/api/accounts/', lambda c: {
+        'name': 'Bank', 'number': c['new_number'], 'type': 'bank', 'initial_balance': 0,
+    }, 'user'),
+    ('GET /api/accounts/<uuid:pk>/', 2, 'GET', lambda c: f'/api/accounts/{c["account"]}/', None, 'user'),
+    ('PATCH /api/accounts/<uuid:pk>/', 3, 'PATCH', lambda c: f'/api/accounts/{c["account"]}/', lambda c: {'name': 'MoMo'}, 'user'),
+    ('DELETE /api/accounts/<uuid:pk>/', 3, 'DELETE', lambda c: f'/api/accounts/{c["spare"]}/', None, 'user'),
+    ('GET /api/transactions/', 2, 'GET', lambda c: '/api/transactions/', None, 'user'),
+    ('POST /api/transactions/', 14, 'POST', lambda c: '/api/transactions/', lambda c: {
+        'type': 'expense', 'amount': 500, 'category': 'Transport', 'reason': 'Taxi',
+        'date': timezone.now().isoformat(), 'account_id': str(c['account']),
+    }, 'user'),
+    ('GET /api/analytics/timeseries/', 2, 'GET', lambda c: '/api/analytics/timeseries/', None, 'user'),
+    ('GET /api/dashboard/summary/', 3, 'GET', lambda c: '/api/dashboard/summary/', None, 'user'),
+    ('POST /api/ai/chat/', 4, 'POST', lambda c: '/api/ai/chat/', lambda c: {
+        'question': 'How much did I spend on food this month?',
+    }, 'user'),
+    ('GET /api/ai/status/', 1, 'GET', lambda c: '/api/ai/status/', None, 'staff'),
+    ('GET /api/budget-limits/', 2, 'GET', lambda c: '/api/budget-limits/', None, 'user'),
+    ('POST /api/budget-limits/', 2, 'POST', lambda c: '/api/budget-limits/', lambda c: {
+        'category': 'Transport', 'amount': 20000, 'period': 'monthly',
+    }, 'user'),
+    ('GET /api/budget-limits/<pk>/', 2, 'GET', lambda c: f'/api/budget-limits/{c["limit"]}/', None, 'user'),
+    ('GET /api/push-subscriptions/', 2, 'GET', lambda c: '/api/push-subscriptions/', None, 'user'),
+    ('POST /api/push-subscriptions/', 7, 'POST', lambda c: '/api/push-subscriptions/', lambda c: {
+        'endpoint': f'{c["push_url"]}/push/new', 'p256dh': 'key', 'auth': 'auth',
+    }, 'user'),
+    ('GET /api/push-subscriptions/<pk>/', 2, 'GET', lambda c: f'/api/push-subscriptions/{c["subscription"]}/', None, 'user'),
+)
+
+
+def api_routes(patterns=None, prefix=PREFIX):
+    """Every route template under /api/, e.g. '/api/accounts/<uuid:pk>/'."""
+    routes = set()
+    for pattern in urls.urlpatterns if patterns is None else patterns:
+        route = _GROUP.sub(r'<\1>', str(pattern.pattern).removeprefix('^').removesuffix('$'))
+        if isinstance(pattern, URLResolver):
+            routes |= api_routes(pattern.url_patterns, prefix + route)
+        elif isinstance(pattern, URLPattern) and route and 'format' not in pattern.pattern.regex.groupindex:
+            # Skips the router's API root and its .json/.api format suffix variants
+            routes.add(prefix + route)
+    return routes
+
+
+def missing_routes():
+    """Routes of the URLconf with no entry in ROUTES, sorted."""
+    return sorted(api_routes() - {route.split(' ', 1)[1] for route, *_ in ROUTES})
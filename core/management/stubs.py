@@ -0,0 +1,88 @@
+"""
+Local stand-ins for the LLM provider and push services, plus small
+helpers shared by the benchmark commands.
+"""
+import json
+import random
+import socket
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    """Answers OpenAI-style chat completions after a fixed delay."""
+    protocol_version = 'HTTP/1.1'
+    latency = 1.0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        time.sleep(self.latency)
+        body = json.dumps({
+            'id': 'bench',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': 'deepseek-chat',
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': 'You spent 12,000 XAF this week.'},
+                'finish_reason': 'stop',
+            }],
+            'usage': {'prompt_tokens': 900, 'completion_tokens': 10, 'total_tokens': 910},
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubPushHandler(BaseHTTPRequestHandler):
+    """Accepts Web Push deliveries; `gone_rate` of them are answered 410 Gone."""
+    protocol_version = 'HTTP/1.1'
+    latency = 0.05
+    gone_rate = 0.0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        time.sleep(self.latency)
+        status = 410 if random.random() < self.gone_rate else 201
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops bursts of connections, and each retry costs the client a second
+    request_queue_size = 128
+
+
+def start_stub(handler, **attributes):
+    """
+    Serve `handler` (with class attributes such as latency overridden) on a
+    free local port from a daemon thread. Returns (server, base_url).
+    """
+    handler = type(handler.__name__, (handler,), attributes)
+    server = _StubServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def percentile(samples, pct):
+    if len(samples) < 2:
+        return samples[0] if samples else 0.0
+    return statistics.quantiles(samples, n=100, method='inclusive')[pct - 1]
@@ -0,0 +1,246 @@
+import logging
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.urls import Resolver404, resolve
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from whitenoise.middleware import WhiteNoiseMiddleware
+from core.models import RequestProfile, User
+from core.utils import perf
+from core.utils.metrics import http_requests, http_request_duration, http_request_queries
+from core.utils.profiler import ProfileSession
+
+logger = logging.getLogger(__name__)
+
+
+class ServerTimingMiddleware:
+    """
+    Records DB, LLM, push and serialization time for each request, returns
+    them in a Server-Timing header, writes one [PERF] log line and feeds the
+    per-route /metrics histograms. Removed from the stack entirely when
+    PERF_INSTRUMENTATION_ENABLED is off.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PERF_INSTRUMENTATION_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = perf.Metrics()
+        token = perf.bind(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            perf.unbind(token)
+        return self._finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = perf.Metrics()
+        token = perf.bind(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            perf.unbind(token)
+        return self._finish(request, response, metrics)
+
+    def _finish(self, request, response, metrics):
+        total = metrics.elapsed
+        response['Server-Timing'] = metrics.server_timing(total)
+        match = request.resolver_match
+        route = f"/{match.route}" if match else request.path
+        perf.report(f"{request.method} {route}", metrics, total, status=response.status_code)
+
+        # Unmatched paths share one label so scanners can't grow the series
+        label = route if match else 'unmatched'
+        http_requests.inc(method=request.method, route=label, status=response.status_code)
+        http_request_duration.observe(total, method=request.method, route=label)
+        http_request_queries.observe(metrics.counts['db'], method=request.method, route=label)
+        return response
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware that can also run async. WhiteNoise itself is
+    sync-only, so under ASGI Django would adapt every request through a
+    thread for it, AI chat included. Here only static file hits leave the
+    event loop, to open and send the file.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            response = await sync_to_async(self.serve)(static_file, request)
+            # Read the file in the thread pool too, rather than have Django buffer it
+            response.streaming_content = _read_in_thread(response.streaming_content)
+            return response
+        return await self.get_response(request)
+
+
+async def _read_in_thread(chunks):
+    chunks = iter(chunks)
+    read = sync_to_async(next, thread_sensitive=False)
+    while (chunk := await read(chunks, None)) is not None:
+        yield chunk
+
+
+class ProfilerMiddleware:
+    """
+    Profiles single requests for staff. A staff user adds `X-Profile: 1`
+    (or `?_profile=1`) to any API call; the view then runs under cProfile
+    with its SQL recorded, the result is saved as a RequestProfile for
+    download from the admin and its id is returned in X-Profile-Id. Adding
+    `X-Profile-As: <phone number>` to a GET runs it as that user, to see
+    their data shape; the saved profile keeps their data, so that needs
+    superuser or the PROFILE_AS_PERMISSIONS. Requests without the flag only
+    pay a header and a substring lookup.
+
+    Sync views are profiled in the thread they run in; async views (AI
+    chat) on the event loop, so under ASGI other coroutines may show up.
+    """
+    sync_capable = True
+    async_capable = True
+    # Plain is_staff grants no model permissions, so it can't read other users' data
+    PROFILE_AS_PERMISSIONS = ('core.add_requestprofile', 'core.view_transaction')
+
+    def __init__(self, get_response):
+        if not settings.PROFILER_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self._requested(request):
+            return self.get_response(request)
+        session = self._start(request)
+        if session is None:
+            return self.get_response(request)
+        with session.bound():
+            response = self.get_response(request)
+        return self._save(request, response, session)
+
+    async def __acall__(self, request):
+        if not self._requested(request):
+            return await self.get_response(request)
+        session = await sync_to_async(self._start)(request)
+        if session is None:
+            return await self.get_response(request)
+        with session.bound():
+            if self._is_async_view(request):
+                with session.profiling():
+                    response = await self.get_response(request)
+            else:
+                response = await self.get_response(request)
+        return await sync_to_async(self._save)(request, response, session)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        session = getattr(request, '_profile_session', None)
+        if session is None or session.profiled or iscoroutinefunction(view_func):
+            return None
+        with session.profiling():
+            response = view_func(request, *view_args, **view_kwargs)
+            if hasattr(response, 'render') and callable(response.render):
+                response = response.render()
+        return response
+
+    @staticmethod
+    def _requested(request):
+        if request.META.get('HTTP_X_PROFILE') == '1':
+            return True
+        # The substring check keeps unflagged requests from parsing the query string
+        return '_profile=' in request.META.get('QUERY_STRING', '') and request.GET.get('_profile') == '1'
+
+    @staticmethod
+    def _is_async_view(request):
+        try:
+            return iscoroutinefunction(resolve(request.path_info).func)
+        except Resolver404:
+            return False
+
+    @staticmethod
+    def _authenticate(request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return user
+        try:
+            result = JWTAuthentication().authenticate(request)
+        except (InvalidToken, AuthenticationFailed):
+            return None
+        return result[0] if result else None
+
+    def _start(self, request):
+        """Return a ProfileSession if a staff user asked for one, else None."""
+        staff = self._authenticate(request)
+        if staff is None or not staff.is_staff:
+            return None
+        subject = staff
+        phone_number = request.headers.get('X-Profile-As')
+        if phone_number:
+            if request.method not in ('GET', 'HEAD'):
+                logger.warning(f"[PROFILE] {staff.phone_number} tried to {request.method} as {phone_number}, not profiled")
+                return None
+            if not staff.has_perms(self.PROFILE_AS_PERMISSIONS):
+                logger.warning(f"[PROFILE] {staff.phone_number} may not profile as {phone_number}, not profiled")
+                return None
+            subject = User.objects.filter(phone_number=phone_number).first()
+            if subject is None:
+                logger.warning(f"[PROFILE] Unknown user for X-Profile-As: {phone_number}")
+                return None
+            # DRF authenticates the request as this user instead of the token's
+            request._force_auth_user = subject
+        session = ProfileSession()
+        session.requested_by = staff
+        session.user = subject
+        request._profile_session = session
+        return session
+
+    def _save(self, request, response, session):
+        profile = RequestProfile.objects.create(
+            method=request.method,
+            path=request.get_full_path()[:500],
+            status_code=response.status_code,
+            duration_ms=session.duration * 1000,
+            query_count=session.query_count,
+            user=session.user,
+            requested_by=session.requested_by,
+            summary=session.summary() if session.profiled else 'No Python profile was captured for this request.',
+            queries=session.queries,
+            pstats=session.dump(),
+        )
+        stale = RequestProfile.objects.values_list('pk', flat=True)[settings.PROFILER_KEEP:]
+        RequestProfile.objects.filter(pk__in=list(stale)).delete()
+        logger.info(
+            f"[PROFILE] {request.method} {request.path} profiled for {session.requested_by.phone_number} "
+            f"as {session.user.phone_number}: {profile.duration_ms:.0f} ms, {profile.query_count} queries"
+        )
+        response['X-Profile-Id'] = str(profile.pk)
+        return response
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-17 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_transaction_user_date_id_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('category', 'Pending')), fields=['created'], name='core_txn_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0.1 on 2026-10-17 10:15
+
+import django.db.models.deletion
+import django_extensions.db.fields
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_transaction_pending_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryCacheEntry',
+            fields=[
+                ('created', django_extensions.db.fields.CreationDateTimeField(auto_now_add=True, verbose_name='created')),
+                ('modified', django_extensions.db.fields.ModificationDateTimeField(auto_now=True, verbose_name='modified')),
+                ('status', models.IntegerField(choices=[(0, 'Inactive'), (1, 'Active')], default=1, verbose_name='status')),
+                ('activate_date', models.DateTimeField(blank=True, help_text='keep empty for an immediate activation', null=True)),
+                ('deactivate_date', models.DateTimeField(blank=True, help_text='keep empty for indefinite activation', null=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('key', models.CharField(max_length=255)),
+                ('category', models.CharField(max_length=100)),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='category_overrides', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['expires_at'], name='core_catcache_expires_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('user__isnull', True)), fields=('key',), name='core_catcache_global_key_uniq'), models.UniqueConstraint(condition=models.Q(('user__isnull', False)), fields=('key', 'user'), name='core_catcache_user_key_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-17 11:00
+
+import django_extensions.db.fields
+import uuid
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_categorycacheentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryKeyword',
+            fields=[
+                ('created', django_extensions.db.fields.CreationDateTimeField(auto_now_add=True, verbose_name='created')),
+                ('modified', django_extensions.db.fields.ModificationDateTimeField(auto_now=True, verbose_name='modified')),
+                ('status', models.IntegerField(choices=[(0, 'Inactive'), (1, 'Active')], default=1, verbose_name='status')),
+                ('activate_date', models.DateTimeField(blank=True, help_text='keep empty for an immediate activation', null=True)),
+                ('deactivate_date', models.DateTimeField(blank=True, help_text='keep empty for indefinite activation', null=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('keyword', models.CharField(max_length=100)),
+                ('category', models.CharField(max_length=100)),
+                ('language', models.CharField(choices=[('en', 'English'), ('fr', 'French')], default='en', max_length=2)),
+                ('weight', models.DecimalField(decimal_places=2, default=Decimal('1.00'), max_digits=4)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('keyword', 'category'), name='core_catkeyword_uniq')],
+            },
+        ),
+    ]
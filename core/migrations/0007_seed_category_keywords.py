@@ -0,0 +1,96 @@
+from django.db import migrations
+
+# Curated starter set for the local classifier. Keywords are stored in the
+# normalized form used for matching (lowercase, no accents or punctuation).
+KEYWORDS = {
+    'Food': {
+        'en': [
+            'food', 'lunch', 'breakfast', 'dinner', 'restaurant', 'groceries',
+            'grocery', 'bread', 'rice', 'snack', 'snacks', 'meal', 'fish',
+            'chicken', 'meat', 'market food', 'supermarket', 'drinks', 'water',
+        ],
+        'fr': [
+            'nourriture', 'repas', 'dejeuner', 'petit dejeuner', 'diner',
+            'restaurant', 'resto', 'pain', 'riz', 'poisson', 'poulet', 'viande',
+            'marche', 'beignets', 'plantain', 'manioc', 'ndole', 'eru', 'soya',
+            'boisson', 'boissons', 'courses', 'epicerie', 'supermarche',
+        ],
+    },
+    'Transport': {
+        'en': [
+            'taxi', 'bus', 'transport', 'fuel', 'petrol', 'gas station', 'uber',
+            'yango', 'bike', 'motorbike', 'ticket', 'train', 'flight', 'parking',
+        ],
+        'fr': [
+            'moto', 'bendskin', 'carburant', 'essence', 'gasoil', 'car',
+            'agence de voyage', 'billet', 'voyage', 'stationnement', 'peage',
+        ],
+    },
+    'Rent': {
+        'en': ['rent', 'house rent', 'landlord', 'lease', 'deposit rent'],
+        'fr': ['loyer', 'bailleur', 'proprietaire', 'caution', 'chambre', 'studio'],
+    },
+    'Utilities': {
+        'en': [
+            'electricity', 'power bill', 'water bill', 'internet', 'wifi',
+            'airtime', 'data bundle', 'bundle', 'phone credit', 'light bill',
+            'canal', 'tv subscription',
+        ],
+        'fr': [
+            'eneo', 'camwater', 'electricite', 'facture', 'credit', 'forfait',
+            'recharge', 'abonnement', 'internet', 'courant',
+        ],
+    },
+    'Health': {
+        'en': ['hospital', 'pharmacy', 'doctor', 'medicine', 'drugs', 'clinic', 'dentist'],
+        'fr': ['hopital', 'pharmacie', 'medecin', 'medicament', 'medicaments', 'clinique', 'consultation'],
+    },
+    'Entertainment': {
+        'en': ['movie', 'cinema', 'party', 'concert', 'game', 'games', 'netflix', 'bar', 'club'],
+        'fr': ['cinema', 'fete', 'soiree', 'jeux', 'sortie', 'snack bar', 'boite'],
+    },
+    'Shopping': {
+        'en': ['clothes', 'shoes', 'shopping', 'dress', 'phone', 'laptop', 'electronics'],
+        'fr': ['vetements', 'chaussures', 'habits', 'pagne', 'telephone', 'achat', 'achats'],
+    },
+    'Salary': {
+        'en': ['salary', 'pay', 'payday', 'wages', 'paycheck', 'bonus'],
+        'fr': ['salaire', 'paie', 'prime', 'remuneration'],
+    },
+    'Investment': {
+        'en': ['investment', 'shares', 'stocks', 'savings plan', 'crypto'],
+        'fr': ['investissement', 'tontine', 'njangi', 'epargne', 'actions'],
+    },
+}
+
+
+def seed_keywords(apps, schema_editor):
+    CategoryKeyword = apps.get_model('core', 'CategoryKeyword')
+    rows = []
+    seen = set()
+    for category, languages in KEYWORDS.items():
+        for language, keywords in languages.items():
+            for keyword in keywords:
+                if (keyword, category) in seen:
+                    continue
+                seen.add((keyword, category))
+                rows.append(CategoryKeyword(keyword=keyword, category=category, language=language))
+    CategoryKeyword.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+def unseed_keywords(apps, schema_editor):
+    CategoryKeyword = apps.get_model('core', 'CategoryKeyword')
+    for category, languages in KEYWORDS.items():
+        for keywords in languages.values():
+            CategoryKeyword.objects.filter(category=category, keyword__in=keywords).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_categorykeyword'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_keywords, unseed_keywords),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0.1 on 2026-10-17 14:00
+
+import django_extensions.db.fields
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_seed_category_keywords'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FAQEntry',
+            fields=[
+                ('created', django_extensions.db.fields.CreationDateTimeField(auto_now_add=True, verbose_name='created')),
+                ('modified', django_extensions.db.fields.ModificationDateTimeField(auto_now=True, verbose_name='modified')),
+                ('status', models.IntegerField(choices=[(0, 'Inactive'), (1, 'Active')], default=1, verbose_name='status')),
+                ('activate_date', models.DateTimeField(blank=True, help_text='keep empty for an immediate activation', null=True)),
+                ('deactivate_date', models.DateTimeField(blank=True, help_text='keep empty for indefinite activation', null=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('question', models.CharField(max_length=500)),
+                ('normalized', models.CharField(db_index=True, max_length=500)),
+                ('answer', models.TextField()),
+                ('source', models.CharField(choices=[('curated', 'Curated'), ('learned', 'Learned')], default='curated', max_length=10)),
+                ('hits', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'FAQ entry',
+                'verbose_name_plural': 'FAQ entries',
+            },
+        ),
+    ]
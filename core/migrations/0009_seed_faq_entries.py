@@ -0,0 +1,63 @@
+from django.db import migrations
+
+# Curated answers taken from the assistant's system prompt. `normalized` is
+# the token form produced by core.utils.faq_cache.normalize_question.
+ENTRIES = [
+    (
+        'What is this app about?',
+        'about what',
+        "FlowFunds helps you track your money across all your accounts - MoMo, Orange Money, Cash, and Bank. "
+        "You can record income and expenses, then see graphs showing where your money goes. "
+        "Want me to show you how to get started?",
+    ),
+    (
+        'How do I add money?',
+        'add how i money',
+        "To record income, tap 'Add Transaction', choose 'Income', enter the amount and reason "
+        "(like 'Salary' or 'Gift'), then select which account received it. That's it!",
+    ),
+    (
+        'How do I track expenses?',
+        'expense how i track',
+        "Same as income but choose 'Expense' instead. Enter the amount, what you spent on "
+        "(like 'Transport' or 'Food'), and which account you paid from. FlowFunds will track it all for you.",
+    ),
+    (
+        'How do I add a new account?',
+        'account add how i new',
+        "Go to the Accounts page and add a new account, then pick its type: MoMo, Orange Money, Cash, or Bank. "
+        "Your transactions can then be recorded against it.",
+    ),
+    (
+        'How do I save money?',
+        'how i money save',
+        "Use the 'Save' transaction type to move money from one of your accounts into savings. "
+        "Even a small amount every week adds up!",
+    ),
+]
+
+
+def seed_entries(apps, schema_editor):
+    FAQEntry = apps.get_model('core', 'FAQEntry')
+    FAQEntry.objects.bulk_create([
+        FAQEntry(question=question, normalized=normalized, answer=answer, source='curated')
+        for question, normalized, answer in ENTRIES
+    ])
+
+
+def unseed_entries(apps, schema_editor):
+    FAQEntry = apps.get_model('core', 'FAQEntry')
+    FAQEntry.objects.filter(
+        source='curated', question__in=[question for question, _, _ in ENTRIES]
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_faqentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_entries, unseed_entries),
+    ]
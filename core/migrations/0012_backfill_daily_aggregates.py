@@ -0,0 +1,41 @@
+# Generated by Django 6.0.1 on 2026-10-17 18:00
+
+from django.db import migrations
+from django.db.models import Count, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+
+BATCH_SIZE = 5000
+
+
+def backfill_aggregates(apps, schema_editor):
+    # Same grouping as AggregateService.rebuild, against the historical models
+    Transaction = apps.get_model('core', 'Transaction')
+    DailyAggregate = apps.get_model('core', 'DailyAggregate')
+    rows = (
+        Transaction.objects
+        .annotate(day=TruncDate('date'), bucket_category=Coalesce('category', Value('')))
+        .values('user_id', 'account_id', 'day', 'type', 'bucket_category')
+        .annotate(total=Sum('amount'), count=Count('id'))
+        .order_by()
+    )
+    batch = []
+    for row in rows.iterator(chunk_size=BATCH_SIZE):
+        batch.append(DailyAggregate(
+            user_id=row['user_id'], account_id=row['account_id'], day=row['day'], type=row['type'],
+            category=row['bucket_category'], total=row['total'], count=row['count'],
+        ))
+        if len(batch) >= BATCH_SIZE:
+            DailyAggregate.objects.bulk_create(batch)
+            batch = []
+    DailyAggregate.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_dailyaggregate'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_aggregates, migrations.RunPython.noop),
+    ]
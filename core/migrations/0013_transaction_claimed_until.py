@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_backfill_daily_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0.1 on 2026-10-17 20:00
+
+from django.db import migrations
+
+
+def renormalize_entries(apps, schema_editor):
+    # Uses the live tokenizer on purpose: `normalized` must match what
+    # lookups produce, and function words such as 'how' and 'i' were dropped
+    from core.utils.faq_cache import normalize_question
+
+    FAQEntry = apps.get_model('core', 'FAQEntry')
+    for entry in FAQEntry.objects.only('id', 'question', 'normalized'):
+        normalized = normalize_question(entry.question)
+        if normalized != entry.normalized:
+            FAQEntry.objects.filter(pk=entry.pk).update(normalized=normalized)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_transaction_claimed_until'),
+    ]
+
+    operations = [
+        migrations.RunPython(renormalize_entries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 21:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_renormalize_faq_entries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='is_seeded',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
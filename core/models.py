@@ -31,6 +31,8 @@ class User(AbstractBaseUser, PermissionsMixin, FlowFundsBaseModel):
     
     is_staff = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
+    # Synthetic users of the load tests; set only by core.management.population
+    is_seeded = models.BooleanField(default=False, editable=False)
 
     objects = UserManager()
 
@@ -68,6 +70,9 @@ class Transaction(FlowFundsBaseModel):
         ('save', 'Save'),
     )
 
+    # Placeholder stored until the background worker assigns a real category
+    CATEGORY_PENDING = 'Pending'
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='transactions')
     account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='transactions')
     type = models.CharField(max_length=10, choices=TRANSACTION_TYPES)
@@ -75,10 +80,59 @@ class Transaction(FlowFundsBaseModel):
     category = models.CharField(max_length=100, blank=True, null=True)
     reason = models.CharField(max_length=255)
     date = models.DateTimeField()
+    # Set while a categorization worker has the pending row in an LLM call
+    claimed_until = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Backs keyset pagination of the history endpoint on (-date, id)
+            models.Index(fields=['user', '-date', 'id'], name='core_txn_user_date_id_idx'),
+            # Queue scan for the categorization worker
+            models.Index(
+                fields=['created'],
+                name='core_txn_pending_idx',
+                condition=models.Q(category='Pending'),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.type} - {self.amount} - {self.reason}"
 
+class DailyAggregate(FlowFundsBaseModel):
+    """
+    Sum and count of a user's transactions per account, local day, type and
+    category, so summaries read a row per day instead of every transaction.
+
+    Incremented in the same database transaction as each new transaction
+    (see core.services.aggregate_service); rebuild_daily_aggregates
+    recomputes it from the transactions. Uncategorized is stored as ''.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_aggregates')
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='daily_aggregates')
+    day = models.DateField()
+    type = models.CharField(max_length=10, choices=Transaction.TRANSACTION_TYPES)
+    category = models.CharField(max_length=100, blank=True, default='')
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Target of the upsert increments
+            models.UniqueConstraint(
+                fields=['user', 'account', 'day', 'type', 'category'],
+                name='core_dailyagg_key_uniq',
+            ),
+        ]
+        indexes = [
+            # Day-range reads across all of a user's accounts
+            models.Index(fields=['user', 'day'], name='core_dailyagg_user_day_idx'),
+            # Evening summary reads one day for everyone
+            models.Index(fields=['day', 'type'], name='core_dailyagg_day_type_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.type} {self.category or '-'}: {self.total} ({self.count})"
+
 class BudgetLimit(FlowFundsBaseModel):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='budget_limits')
     category = models.CharField(max_length=100)
@@ -96,3 +150,106 @@ class PushSubscription(FlowFundsBaseModel):
 
     def __str__(self):
         return f"Subscription for {self.user.phone_number}"
+
+class CategoryCacheEntry(FlowFundsBaseModel):
+    """
+    Memoized category for a normalized transaction reason.
+
+    Rows without a user are shared across everyone; rows with a user are
+    overrides recorded from that user's own choices and always win.
+    """
+    key = models.CharField(max_length=255)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='category_overrides')
+    category = models.CharField(max_length=100)
+    hits = models.PositiveIntegerField(default=0)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['key'],
+                condition=models.Q(user__isnull=True),
+                name='core_catcache_global_key_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['key', 'user'],
+                condition=models.Q(user__isnull=False),
+                name='core_catcache_user_key_uniq',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at'], name='core_catcache_expires_idx'),
+        ]
+
+    def __str__(self):
+        owner = self.user.phone_number if self.user_id else 'global'
+        return f"{self.key} -> {self.category} ({owner})"
+
+class CategoryKeyword(FlowFundsBaseModel):
+    """
+    Keyword or phrase that maps a transaction reason to a category locally,
+    without asking the LLM. Only active rows are used by the classifier.
+    """
+    LANGUAGES = (
+        ('en', 'English'),
+        ('fr', 'French'),
+    )
+
+    keyword = models.CharField(max_length=100)
+    category = models.CharField(max_length=100)
+    language = models.CharField(max_length=2, choices=LANGUAGES, default='en')
+    weight = models.DecimalField(max_digits=4, decimal_places=2, default=Decimal('1.00'))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['keyword', 'category'], name='core_catkeyword_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.keyword} -> {self.category}"
+
+class FAQEntry(FlowFundsBaseModel):
+    """
+    Answer to an app how-to question that doesn't depend on the user's data.
+    Curated entries are written by admins; learned entries are stored from
+    context-free LLM answers. Only active entries are served.
+    """
+    SOURCES = (
+        ('curated', 'Curated'),
+        ('learned', 'Learned'),
+    )
+
+    question = models.CharField(max_length=500)
+    normalized = models.CharField(max_length=500, db_index=True)
+    answer = models.TextField()
+    source = models.CharField(max_length=10, choices=SOURCES, default='curated')
+    hits = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'FAQ entry'
+        verbose_name_plural = 'FAQ entries'
+
+    def __str__(self):
+        return self.question
+
+class RequestProfile(FlowFundsBaseModel):
+    """
+    cProfile output and SQL of one API request, captured on demand by a
+    staff member (see core.middleware.ProfilerMiddleware).
+    """
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    query_count = models.PositiveIntegerField(default=0)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='request_profiles')
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    summary = models.TextField(blank=True)
+    queries = models.JSONField(default=list)
+    pstats = models.BinaryField()
+
+    class Meta:
+        ordering = ['-created']
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
@@ -0,0 +1,143 @@
+import logging
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+from django.db import connection, transaction
+from django.db.models import Count, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+from core.models import DailyAggregate, Transaction
+
+logger = logging.getLogger(__name__)
+
+
+class AggregateService:
+    """
+    Keeps DailyAggregate in step with the transactions.
+
+    Changes are applied as upsert increments, INSERT ... ON CONFLICT DO
+    UPDATE SET total = total + excluded.total, so concurrent writers to the
+    same day add up instead of overwriting each other. Call them inside the
+    atomic block that writes the transactions.
+    """
+    COLUMNS = ('id', 'created', 'modified', 'status', 'activate_date', 'user', 'account', 'day', 'type', 'category', 'total', 'count')
+    KEY = ('user', 'account', 'day', 'type', 'category')
+
+    @staticmethod
+    def key(transaction_row, category=None):
+        """(user_id, account_id, day, type, category) of a transaction."""
+        return (
+            transaction_row.user_id,
+            transaction_row.account_id,
+            timezone.localdate(transaction_row.date),
+            transaction_row.type,
+            (transaction_row.category if category is None else category) or '',
+        )
+
+    @staticmethod
+    def record(transaction_row):
+        """Count a newly created transaction."""
+        AggregateService.apply({AggregateService.key(transaction_row): (transaction_row.amount, 1)})
+
+    @staticmethod
+    def replace(removed=(), added=()):
+        """
+        Subtract the `removed` transactions and count the `added` ones, for
+        edits (the row before and after) and deletes.
+        """
+        deltas = defaultdict(lambda: [Decimal('0'), 0])
+        for rows, sign in ((removed, -1), (added, 1)):
+            for row in rows:
+                delta = deltas[AggregateService.key(row)]
+                delta[0] += sign * row.amount
+                delta[1] += sign
+        AggregateService.apply({key: tuple(delta) for key, delta in deltas.items() if delta != [0, 0]})
+
+    @staticmethod
+    def recategorize(changes):
+        """
+        Move transactions between categories. `changes` is an iterable of
+        (transaction, old category, new category); the transactions need
+        user_id, account_id, date, type and amount.
+        """
+        deltas = defaultdict(lambda: [Decimal('0'), 0])
+        for row, old, new in changes:
+            if (old or '') == (new or ''):
+                continue
+            for category, sign in ((old, -1), (new, 1)):
+                delta = deltas[AggregateService.key(row, category=category or '')]
+                delta[0] += sign * row.amount
+                delta[1] += sign
+        AggregateService.apply({key: tuple(delta) for key, delta in deltas.items() if delta != [0, 0]})
+
+    @staticmethod
+    def apply(deltas):
+        """
+        Add {(user_id, account_id, day, type, category): (total, count)} to
+        the aggregates in one statement. Rows that negative deltas leave
+        empty are deleted, so readers never see a category with no
+        transactions in it.
+        """
+        if not deltas:
+            return
+        fields = [DailyAggregate._meta.get_field(name) for name in AggregateService.COLUMNS]
+        now = timezone.now()
+        params = []
+        # Sorted, so concurrent upserts lock the rows they share in the same order
+        for key, (total, count) in sorted(deltas.items()):
+            values = (uuid.uuid4(), now, now, 1, now, *key, total, count)
+            params.extend(field.get_db_prep_save(value, connection) for field, value in zip(fields, values))
+
+        quote = connection.ops.quote_name
+        table = quote(DailyAggregate._meta.db_table)
+        row = '(' + ', '.join(['%s'] * len(fields)) + ')'
+        key_columns = ', '.join(quote(DailyAggregate._meta.get_field(name).column) for name in AggregateService.KEY)
+        total, count, modified = quote('total'), quote('count'), quote('modified')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(quote(field.column) for field in fields)}) "
+                f"VALUES {', '.join([row] * len(deltas))} "
+                f"ON CONFLICT ({key_columns}) DO UPDATE SET "
+                f"{total} = {table}.{total} + excluded.{total}, "
+                f"{count} = {table}.{count} + excluded.{count}, "
+                f"{modified} = excluded.{modified}",
+                params,
+            )
+        if any(count < 0 for _, count in deltas.values()):
+            DailyAggregate.objects.filter(
+                user_id__in={key[0] for key in deltas}, day__in={key[2] for key in deltas}, count=0,
+            ).delete()
+
+    @staticmethod
+    def rebuild(users=None, batch_size=5000):
+        """
+        Recompute the aggregates of `users` (a User queryset, or everyone)
+        from their transactions. Returns the number of rows written.
+        """
+        with transaction.atomic():
+            aggregates = DailyAggregate.objects.all()
+            transactions = Transaction.objects.all()
+            if users is not None:
+                aggregates = aggregates.filter(user__in=users)
+                transactions = transactions.filter(user__in=users)
+            aggregates.delete()
+
+            rows = (
+                transactions
+                .annotate(day=TruncDate('date'), bucket_category=Coalesce('category', Value('')))
+                .values('user_id', 'account_id', 'day', 'type', 'bucket_category')
+                .annotate(total=Sum('amount'), count=Count('id'))
+                .order_by()
+            )
+            written, batch = 0, []
+            for row in rows.iterator(chunk_size=batch_size):
+                batch.append(DailyAggregate(
+                    user_id=row['user_id'], account_id=row['account_id'], day=row['day'], type=row['type'],
+                    category=row['bucket_category'], total=row['total'], count=row['count'],
+                ))
+                if len(batch) >= batch_size:
+                    written += len(DailyAggregate.objects.bulk_create(batch))
+                    batch = []
+            written += len(DailyAggregate.objects.bulk_create(batch))
+        logger.info(f"[AGGREGATES] Rebuilt {written} daily aggregate rows")
+        return written
@@ -0,0 +1,138 @@
+import logging
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+from django.utils import timezone
+from core.models import Account, DailyAggregate, Transaction
+from core.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class AIContextService:
+    """
+    Builds the financial context sent with AI chat questions.
+
+    Totals are aggregated in the database and only the rows the prompt
+    shows are fetched, so the cost doesn't grow with the user's history.
+    The result is cached per user and dropped whenever one of their
+    transactions or accounts changes (in every worker only with the shared
+    Redis cache; see REDIS_URL).
+    """
+    WINDOW_DAYS = 30
+
+    @staticmethod
+    def cache_key(user_id):
+        return f"ai_context:{user_id}"
+
+    @staticmethod
+    def get(user):
+        key = AIContextService.cache_key(user.pk)
+        context = cache.get(key)
+        if context is None:
+            metrics.cache_lookups.inc(cache='ai_context', result='miss')
+            context = AIContextService.build(user)
+            cache.set(key, context, settings.AI_CONTEXT_CACHE_TTL)
+        else:
+            metrics.cache_lookups.inc(cache='ai_context', result='hit')
+            logger.debug("[AI_CONTEXT] Cache hit for user: %s", user.pk)
+        return context
+
+    @staticmethod
+    def invalidate(user_id):
+        cache.delete(AIContextService.cache_key(user_id))
+
+    @staticmethod
+    def invalidate_many(user_ids):
+        cache.delete_many([AIContextService.cache_key(user_id) for user_id in set(user_ids)])
+
+    @staticmethod
+    async def aget(user):
+        """Async variant of get() for async views; same cache entry."""
+        key = AIContextService.cache_key(user.pk)
+        context = await cache.aget(key)
+        if context is None:
+            metrics.cache_lookups.inc(cache='ai_context', result='miss')
+            context = await AIContextService.abuild(user)
+            await cache.aset(key, context, settings.AI_CONTEXT_CACHE_TTL)
+        else:
+            metrics.cache_lookups.inc(cache='ai_context', result='hit')
+            logger.debug("[AI_CONTEXT] Cache hit for user: %s", user.pk)
+        return context
+
+    @staticmethod
+    def _querysets(user):
+        # Deterministic ordering keeps the rendered prompt byte-stable
+        accounts = Account.objects.filter(user=user).order_by('created', 'id').values(
+            'id', 'name', 'type', 'balance'
+        )
+
+        # Totals by type and by category over the last WINDOW_DAYS local days,
+        # from the daily aggregates (about one row per day and category)
+        totals = (
+            DailyAggregate.objects
+            .filter(user=user, day__gt=timezone.localdate() - timedelta(days=AIContextService.WINDOW_DAYS))
+            .values('type', 'category')
+            .annotate(total=Sum('total'), count=Sum('count'))
+            .order_by()
+        )
+
+        since = timezone.now() - timedelta(days=AIContextService.WINDOW_DAYS)
+        transactions = Transaction.objects.filter(user=user, date__gte=since).order_by('-date', 'id').values(
+            'id', 'type', 'amount', 'reason', 'date', 'account__name'
+        )[:settings.AI_CONTEXT_TRANSACTION_LIMIT]
+        return accounts, totals, transactions
+
+    @staticmethod
+    def build(user):
+        accounts, totals, transactions = AIContextService._querysets(user)
+        return AIContextService._assemble(user, list(accounts), list(totals), list(transactions))
+
+    @staticmethod
+    async def abuild(user):
+        accounts, totals, transactions = AIContextService._querysets(user)
+        return AIContextService._assemble(
+            user,
+            [row async for row in accounts],
+            [row async for row in totals],
+            [row async for row in transactions],
+        )
+
+    @staticmethod
+    def _assemble(user, accounts, totals, transactions):
+        totals_by_type = {}
+        categories = []
+        transaction_count = 0
+        for row in totals:
+            totals_by_type[row['type']] = totals_by_type.get(row['type'], Decimal('0')) + row['total']
+            transaction_count += row['count']
+            if row['type'] == 'expense':
+                categories.append({
+                    'category': row['category'] or 'Uncategorized',
+                    'total': row['total'],
+                    'count': row['count'],
+                })
+        categories.sort(key=lambda c: (-c['total'], c['category']))
+
+        total_income = totals_by_type.get('income', Decimal('0'))
+        total_expenses = totals_by_type.get('expense', Decimal('0'))
+
+        context = {
+            'user_name': user.first_name or 'User',
+            'accounts': accounts,
+            'transactions': transactions,
+            'total_balance': sum((acc['balance'] for acc in accounts), Decimal('0')),
+            'metrics': {
+                'total_income': total_income,
+                'total_expenses': total_expenses,
+                'total_saved': totals_by_type.get('save', Decimal('0')),
+                'net_change': total_income - total_expenses,
+                'transaction_count': transaction_count,
+            },
+            'categories': categories,
+        }
+
+        logger.debug("[AI_CHAT] Built context: %s accounts, %s transactions", len(accounts), transaction_count)
+        return context
@@ -0,0 +1,155 @@
+import hashlib
+import logging
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import DateField, F, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from core.models import DailyAggregate, Transaction
+from core.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class AnalyticsService:
+    """
+    Income and expense totals per day, week or month.
+
+    The buckets come from one GROUP BY over the daily aggregates, truncated
+    to the week or month (date_trunc on PostgreSQL), so a month reads about
+    30 rows per type and category; empty buckets are filled with zeros here. A range that ended before today can still change
+    when a transaction is back-dated, so cached results are keyed on a
+    per-user version that every transaction write replaces.
+    """
+    GRANULARITIES = ('day', 'week', 'month')
+    # Buckets returned when no start date is given
+    DEFAULT_BUCKETS = {'day': 30, 'week': 12, 'month': 12}
+    TYPES = [choice for choice, _ in Transaction.TRANSACTION_TYPES]
+
+    @staticmethod
+    def bucket_start(day, granularity):
+        """First day of the bucket holding `day` (weeks start on Monday, like date_trunc)."""
+        if granularity == 'week':
+            return day - timedelta(days=day.weekday())
+        if granularity == 'month':
+            return day.replace(day=1)
+        return day
+
+    @staticmethod
+    def next_bucket(day, granularity):
+        if granularity == 'week':
+            return day + timedelta(weeks=1)
+        if granularity == 'month':
+            return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+        return day + timedelta(days=1)
+
+    @staticmethod
+    def bucket_range(start, end, granularity):
+        """Widen [start, end] to whole buckets; returns the bucket starts."""
+        starts = []
+        current = AnalyticsService.bucket_start(start, granularity)
+        while current <= end:
+            starts.append(current)
+            current = AnalyticsService.next_bucket(current, granularity)
+        return starts
+
+    @staticmethod
+    def default_start(end, granularity):
+        start = AnalyticsService.bucket_start(end, granularity)
+        for _ in range(AnalyticsService.DEFAULT_BUCKETS[granularity] - 1):
+            start = AnalyticsService.bucket_start(start - timedelta(days=1), granularity)
+        return start
+
+    @staticmethod
+    def timeseries(user, start, end, granularity, account_id=None, type=None):
+        """
+        ({'buckets': [...], 'totals': {...}}, etag) for the user's transactions
+        between the start of `start`'s bucket and the end of `end`'s. Ranges
+        that ended before today are served from the cache and get an ETag
+        that changes with the data; open ranges get None.
+        """
+        starts = AnalyticsService.bucket_range(start, end, granularity)
+        closed = AnalyticsService.next_bucket(starts[-1], granularity) <= timezone.localdate()
+        if not closed:
+            return AnalyticsService.build(user, starts, granularity, account_id, type), None
+
+        key = AnalyticsService.cache_key(user.pk, starts[0], granularity, len(starts), account_id, type)
+        result = cache.get(key)
+        if result is None:
+            metrics.cache_lookups.inc(cache='analytics', result='miss')
+            result = AnalyticsService.build(user, starts, granularity, account_id, type)
+            cache.set(key, result, settings.ANALYTICS_CACHE_TTL)
+        else:
+            metrics.cache_lookups.inc(cache='analytics', result='hit')
+            logger.debug("[ANALYTICS] Cache hit for user: %s", user.pk)
+        return result, f'"{hashlib.md5(key.encode()).hexdigest()}"'
+
+    @staticmethod
+    def build(user, starts, granularity, account_id=None, type=None):
+        queryset = DailyAggregate.objects.filter(
+            user=user, day__gte=starts[0], day__lt=AnalyticsService.next_bucket(starts[-1], granularity),
+        )
+        if account_id:
+            queryset = queryset.filter(account_id=account_id)
+        if type:
+            queryset = queryset.filter(type=type)
+        bucket = F('day') if granularity == 'day' else Trunc('day', granularity, output_field=DateField())
+        rows = (
+            queryset
+            .annotate(bucket=bucket)
+            .values('bucket', 'type')
+            .annotate(total=Sum('total'), count=Sum('count'))
+            .order_by()
+        )
+
+        buckets = {
+            bucket: {'start': bucket, **{kind: Decimal('0') for kind in AnalyticsService.TYPES}, 'count': 0}
+            for bucket in starts
+        }
+        for row in rows:
+            bucket = buckets[row['bucket']]
+            bucket[row['type']] += row['total']
+            bucket['count'] += row['count']
+
+        totals = {kind: Decimal('0') for kind in AnalyticsService.TYPES}
+        totals['count'] = 0
+        for bucket in buckets.values():
+            bucket['net'] = bucket['income'] - bucket['expense']
+            for field in totals:
+                totals[field] += bucket[field]
+        totals['net'] = totals['income'] - totals['expense']
+        return {'buckets': list(buckets.values()), 'totals': totals}
+
+    # Cache versioning
+
+    @staticmethod
+    def version_key(user_id):
+        return f"analytics_version:{user_id}"
+
+    @staticmethod
+    def version(user_id):
+        """
+        Current version of the user's analytics. A missing version (never
+        set, invalidated or evicted) is replaced by a random one, so entries
+        cached under an older version can't be served again.
+        """
+        key = AnalyticsService.version_key(user_id)
+        version = cache.get(key)
+        if version is None:
+            # add() so that concurrent first readers settle on one version
+            version = uuid.uuid4().hex
+            cache.add(key, version, None)
+            version = cache.get(key, version)
+        return version
+
+    @staticmethod
+    def invalidate(user_id):
+        cache.delete(AnalyticsService.version_key(user_id))
+
+    @staticmethod
+    def cache_key(user_id, start, granularity, buckets, account_id, type):
+        params = f"{start.isoformat()}:{granularity}:{buckets}:{account_id or ''}:{type or ''}"
+        return f"analytics:{user_id}:{AnalyticsService.version(user_id)}:{hashlib.md5(params.encode()).hexdigest()}"
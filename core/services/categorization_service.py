@@ -0,0 +1,226 @@
+import logging
+import threading
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from core.models import Transaction
+from core.services.aggregate_service import AggregateService
+from core.services.ai_context_service import AIContextService
+from core.utils.ai_helper import categorize_transactions
+from core.utils.category_cache import category_cache
+from core.utils.log import lazy
+
+logger = logging.getLogger(__name__)
+
+
+class CategorizationWorker(threading.Thread):
+    """
+    In-process daemon that drains pending transactions in batches.
+
+    The Transaction table itself is the queue: rows are written with the
+    pending category and picked up here, so no external broker is needed.
+    """
+
+    def __init__(self):
+        super().__init__(name='categorization-worker', daemon=True)
+        self._wake = threading.Event()
+
+    def wake(self):
+        self._wake.set()
+
+    def run(self):
+        while True:
+            self._wake.wait(timeout=settings.CATEGORIZATION_POLL_INTERVAL)
+            self._wake.clear()
+            try:
+                CategorizationService.drain()
+            except Exception as e:
+                logger.error(f"[CATEGORIZE] Worker batch failed: {str(e)}", exc_info=True)
+            finally:
+                # Connections are per-thread; don't keep one open while idle
+                connections.close_all()
+
+
+class CategorizationService:
+    _worker = None
+    _worker_lock = threading.Lock()
+
+    @staticmethod
+    def enqueue():
+        """
+        Wake the background worker. Call after the pending rows are committed.
+        """
+        if not settings.CATEGORIZATION_WORKER_ENABLED:
+            return
+        CategorizationService._get_worker().wake()
+
+    @staticmethod
+    def _get_worker():
+        with CategorizationService._worker_lock:
+            worker = CategorizationService._worker
+            if worker is None or not worker.is_alive():
+                worker = CategorizationWorker()
+                worker.start()
+                CategorizationService._worker = worker
+            return worker
+
+    @staticmethod
+    def process_pending(batch_size=None):
+        """
+        Categorize one batch of pending transactions.
+
+        Returns the number of transactions picked from the queue.
+        """
+        batch_size = batch_size or settings.CATEGORIZATION_BATCH_SIZE
+        pending = CategorizationService._claim(batch_size)
+        if not pending:
+            return 0
+        try:
+            categorized = CategorizationService._categorize_claimed(pending)
+        except Exception:
+            # Hand the batch back rather than leaving it until the claim expires
+            Transaction.objects.filter(
+                id__in=[pk for pk, _, _ in pending], category=Transaction.CATEGORY_PENDING
+            ).update(claimed_until=None)
+            raise
+        logger.debug("[CATEGORIZE] Category cache stats: %s", lazy(category_cache.stats))
+        return categorized
+
+    @staticmethod
+    def _claim(batch_size):
+        """
+        Claim the oldest unclaimed pending rows in a short transaction, so the
+        worker in every web process and the cron job don't pay for the same
+        LLM calls. Claims left by a crashed worker expire after
+        CATEGORIZATION_CLAIM_TIMEOUT.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            pending = list(
+                Transaction.objects.select_for_update(skip_locked=True)
+                .filter(Q(claimed_until__isnull=True) | Q(claimed_until__lt=now), category=Transaction.CATEGORY_PENDING)
+                .order_by('created')
+                .values_list('id', 'reason', 'user_id')[:batch_size]
+            )
+            if pending:
+                Transaction.objects.filter(id__in=[pk for pk, _, _ in pending]).update(
+                    claimed_until=now + timedelta(seconds=settings.CATEGORIZATION_CLAIM_TIMEOUT),
+                )
+        return pending
+
+    @staticmethod
+    def _categorize_claimed(pending):
+        """Categorize claimed (id, reason, user_id) rows. Returns how many there were."""
+        ids_by_reason = defaultdict(list)
+        for pk, reason, user_id in pending:
+            ids_by_reason[(user_id, reason)].append(pk)
+
+        # One batched call for the whole queue batch; repeats across users are
+        # collapsed by the cache and the batch de-duplication
+        keys = list(ids_by_reason)
+        categories = categorize_transactions(
+            [reason for _, reason in keys],
+            user_ids=[user_id for user_id, _ in keys],
+        )
+
+        category_by_id = {}
+        for key, category in zip(keys, categories):
+            if not category or category == Transaction.CATEGORY_PENDING:
+                category = 'Other'
+            category_by_id.update(dict.fromkeys(ids_by_reason[key], category))
+
+        with transaction.atomic():
+            # Only touch rows still pending, so concurrent workers stay idempotent
+            # and each row moves its daily aggregate exactly once
+            rows = list(
+                Transaction.objects.select_for_update()
+                .filter(id__in=category_by_id, category=Transaction.CATEGORY_PENDING)
+                .only('user_id', 'account_id', 'date', 'type', 'amount')
+            )
+            CategorizationService._move(
+                (row, Transaction.CATEGORY_PENDING, category_by_id[row.pk]) for row in rows
+            )
+        # Bulk updates skip model signals, so drop cached AI context here
+        AIContextService.invalidate_many(user_id for _, _, user_id in pending)
+
+        logger.info(f"[CATEGORIZE] Categorized {len(pending)} transactions ({len(ids_by_reason)} distinct reasons)")
+        return len(pending)
+
+    @staticmethod
+    def recategorize(queryset, chunk_size=1000, batch_size=None, concurrency=None, skip_cache=False):
+        """
+        Re-run categorization over existing transactions (backfills, imports,
+        re-categorizing "Other"). Walks the queryset in id order so it can run
+        over any number of rows. Returns (processed, changed).
+        """
+        processed = changed = 0
+        last_id = None
+        while True:
+            chunk = queryset.order_by('id')
+            if last_id is not None:
+                chunk = chunk.filter(id__gt=last_id)
+            rows = list(chunk.values_list('id', 'reason', 'user_id', 'category')[:chunk_size])
+            if not rows:
+                return processed, changed
+            last_id = rows[-1][0]
+
+            categories = categorize_transactions(
+                [reason for _, reason, _, _ in rows],
+                user_ids=[user_id for _, _, user_id, _ in rows],
+                batch_size=batch_size,
+                concurrency=concurrency,
+                skip_cache=skip_cache,
+            )
+
+            new_categories = {
+                pk: category
+                for (pk, _, _, old_category), category in zip(rows, categories)
+                if category and category != old_category
+            }
+            if new_categories:
+                with transaction.atomic():
+                    # Re-read under lock so the aggregates move from the current category
+                    locked = list(
+                        Transaction.objects.select_for_update()
+                        .filter(id__in=new_categories)
+                        .only('user_id', 'account_id', 'date', 'type', 'amount', 'category')
+                    )
+                    changes = [
+                        (row, row.category, new_categories[row.pk])
+                        for row in locked if row.category != new_categories[row.pk]
+                    ]
+                    CategorizationService._move(changes)
+                changed += len(changes)
+                AIContextService.invalidate_many(user_id for _, _, user_id, _ in rows)
+
+            processed += len(rows)
+            logger.info(f"[CATEGORIZE] Recategorized {processed} transactions so far, {changed} changed")
+
+    @staticmethod
+    def _move(changes):
+        """
+        Apply (transaction, old category, new category) changes: one UPDATE per
+        new category plus the matching daily aggregate increments. Call inside
+        the atomic block that locked the transactions.
+        """
+        changes = list(changes)
+        ids_by_category = defaultdict(list)
+        for row, _, category in changes:
+            ids_by_category[category].append(row.pk)
+        for category, ids in ids_by_category.items():
+            Transaction.objects.filter(id__in=ids).update(category=category)
+        AggregateService.recategorize(changes)
+
+    @staticmethod
+    def drain(batch_size=None):
+        """Process batches until the queue is empty. Returns the total processed."""
+        batch_size = batch_size or settings.CATEGORIZATION_BATCH_SIZE
+        total = 0
+        while True:
+            processed = CategorizationService.process_pending(batch_size)
+            total += processed
+            if processed < batch_size:
+                return total
@@ -0,0 +1,59 @@
+from django.db.models import F
+from core.models import Account, User
+
+
+class InsufficientFunds(Exception):
+    pass
+
+
+class LedgerService:
+    """
+    Balance mutations as single-statement UPDATEs on the database value, so
+    concurrent writers can't overwrite each other with stale Python copies.
+
+    Lock order when several rows are involved: user row, then source
+    account, then savings account.
+    """
+
+    @staticmethod
+    def credit(account_id, amount):
+        Account.objects.filter(pk=account_id).update(balance=F('balance') + amount)
+
+    @staticmethod
+    def debit(account_id, amount):
+        """
+        Subtract `amount` only if the account can cover it. The funds check
+        and the write happen in one statement under the row lock.
+        """
+        updated = Account.objects.filter(pk=account_id, balance__gte=amount).update(
+            balance=F('balance') - amount
+        )
+        if not updated:
+            raise InsufficientFunds()
+
+    @staticmethod
+    def lock_user(user):
+        """Serialize per-user operations (e.g. savings account creation)."""
+        list(User.objects.select_for_update().filter(pk=user.pk).values_list('pk', flat=True))
+
+    @staticmethod
+    def get_or_create_savings_account(user, currency):
+        """
+        Return the user's main savings account, creating it if needed. Call
+        inside an atomic block after lock_user() so two requests can't both
+        create one.
+        """
+        savings_account = (
+            Account.objects.filter(user=user, type='savings')
+            .order_by('created')
+            .first()
+        )
+        if savings_account is None:
+            savings_account = Account.objects.create(
+                user=user,
+                type='savings',
+                name='Main Savings',
+                number=f'SAV-{user.phone_number[-4:]}',
+                currency=currency,
+            )
+        return savings_account
@@ -1,79 +1,233 @@
-from pywebpush import webpush, WebPushException
+from pywebpush import webpush, WebPusher, WebPushException
+from py_vapid import Vapid
 from django.conf import settings
-from core.models import PushSubscription, Transaction
-from core.utils.ai_helper import categorize_transaction, generate_daily_insight
+from django.db.models import Exists, OuterRef, Sum
+from django.utils import timezone
+from core.models import DailyAggregate, PushSubscription
+from core.utils import metrics
+from core.utils.perf import timed
+from core.utils.ai_helper import categorize_transaction, generate_daily_insights
 from decouple import config
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 import json
-from datetime import datetime
+import logging
+import os
+import threading
+import time
+import requests
+from collections import defaultdict
 
-class NotificationService:
-    @staticmethod
-    def send_push_notification(subscription, message_body, title="FlowFunds"):
+logger = logging.getLogger(__name__)
+
+
+def _load_vapid(private_key):
+    """Parse VAPID_PRIVATE_KEY as webpush() does: a path to a key file, or the key itself."""
+    if os.path.isfile(private_key):
+        return Vapid.from_file(private_key)
+    return Vapid.from_string(private_key=private_key)
+
+
+class PushDispatcher:
+    """
+    Sends a run's worth of push notifications over a bounded thread pool.
+
+    The VAPID key is read and parsed on the first send of a run, so runs
+    with nothing to send don't need it, and the signed VAPID header is
+    reused per push-service origin (the JWT is valid for 12 hours). Each
+    origin gets its own pooled HTTP session. Subscriptions answered with
+    410 Gone are collected and deleted in one query at the end.
+    """
+
+    def __init__(self, max_workers=None, vapid=None, timeout=None):
+        self.max_workers = max_workers or settings.PUSH_DISPATCH_WORKERS
+        self.timeout = timeout or settings.PUSH_TIMEOUT
+        self.vapid = vapid
+        self.vapid_sub = config('VAPID_MAILTO', default='mailto:admin@example.com')
+        self._sessions = {}
+        self._vapid_headers = {}
+        self._lock = threading.Lock()
+        self._gone = []
+
+    def _origin(self, endpoint):
+        url = urlparse(endpoint)
+        return f"{url.scheme}://{url.netloc}"
+
+    def _session(self, origin):
+        with self._lock:
+            session = self._sessions.get(origin)
+            if session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.max_workers)
+                session.mount(origin, adapter)
+                self._sessions[origin] = session
+            return session
+
+    def _headers(self, origin):
+        with self._lock:
+            headers = self._vapid_headers.get(origin)
+            if headers is None:
+                if self.vapid is None:
+                    self.vapid = _load_vapid(config('VAPID_PRIVATE_KEY'))
+                headers = self.vapid.sign({
+                    "sub": self.vapid_sub,
+                    "aud": origin,
+                    "exp": int(time.time()) + 12 * 60 * 60,
+                })
+                self._vapid_headers[origin] = headers
+            return dict(headers)
+
+    def send(self, subscription, message_body, title="FlowFunds"):
+        """Send one notification. Safe to call from worker threads."""
+        origin = self._origin(subscription.endpoint)
         try:
-            webpush(
-                subscription_info={
+            response = WebPusher(
+                {
                     "endpoint": subscription.endpoint,
                     "keys": {
                         "p256dh": subscription.p256dh,
                         "auth": subscription.auth
                     }
                 },
-                data=json.dumps({
+                requests_session=self._session(origin),
+            ).send(
+                json.dumps({
                     "title": title,
                     "body": message_body,
                 }),
-                vapid_private_key=config('VAPID_PRIVATE_KEY'),
-                vapid_claims={
-                    "sub": config('VAPID_MAILTO', default='mailto:admin@example.com')
-                }
+                self._headers(origin),
+                ttl=0,
+                timeout=self.timeout,
             )
+            if response.status_code > 202:
+                raise WebPushException(
+                    f"Push failed: {response.status_code} {response.reason}",
+                    response=response,
+                )
+            metrics.push_sent.inc(result='success')
+            return True
+        except WebPushException as ex:
+            logger.warning(f"[PUSH] Web Push Failed: {ex}")
+            if ex.response is not None and ex.response.status_code == 410:
+                metrics.push_sent.inc(result='gone')
+                with self._lock:
+                    self._gone.append(subscription.pk)
+            else:
+                metrics.push_sent.inc(result='failed')
+            return False
+        except Exception as e:
+            logger.error(f"[PUSH] Error sending push: {e}")
+            metrics.push_sent.inc(result='failed')
+            return False
+
+    def send_many(self, messages):
+        """
+        Send (subscription, body, title) tuples and return how many were
+        delivered. Workers only do HTTP; the database is touched once at the
+        end to remove gone subscriptions.
+        """
+        messages = list(messages)
+        with timed('push', count=len(messages)):
+            if self.max_workers <= 1:
+                results = [self.send(*message) for message in messages]
+            else:
+                with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                    results = list(pool.map(lambda message: self.send(*message), messages))
+        self.close()
+        return sum(results)
+
+    def close(self):
+        if self._gone:
+            PushSubscription.objects.filter(pk__in=self._gone).delete()
+            logger.info(f"[PUSH] Removed {len(self._gone)} expired subscriptions")
+            self._gone = []
+        for session in self._sessions.values():
+            session.close()
+        self._sessions = {}
+
+
+class NotificationService:
+    @staticmethod
+    def send_push_notification(subscription, message_body, title="FlowFunds"):
+        try:
+            with timed('push'):
+                webpush(
+                    subscription_info={
+                        "endpoint": subscription.endpoint,
+                        "keys": {
+                            "p256dh": subscription.p256dh,
+                            "auth": subscription.auth
+                        }
+                    },
+                    data=json.dumps({
+                        "title": title,
+                        "body": message_body,
+                    }),
+                    vapid_private_key=config('VAPID_PRIVATE_KEY'),
+                    vapid_claims={
+                        "sub": config('VAPID_MAILTO', default='mailto:admin@example.com')
+                    },
+                    timeout=settings.PUSH_TIMEOUT,
+                )
+            metrics.push_sent.inc(result='success')
             return True
         except WebPushException as ex:
             print(f"Web Push Failed: {ex}")
             # If 410 Gone, remove subscription
-            if ex.response and ex.response.status_code == 410:
+            if ex.response is not None and ex.response.status_code == 410:
+                metrics.push_sent.inc(result='gone')
                 subscription.delete()
+            else:
+                metrics.push_sent.inc(result='failed')
             return False
         except Exception as e:
             print(f"Error sending push: {e}")
+            metrics.push_sent.inc(result='failed')
             return False
 
     @staticmethod
     def send_morning_reminders():
-        subscriptions = PushSubscription.objects.all()
+        subscriptions = PushSubscription.objects.only('id', 'endpoint', 'p256dh', 'auth')
         message = "Good morning! ☀️ Don't forget to track your expenses today to stay on budget."
-        
-        count = 0
-        for sub in subscriptions:
-            if NotificationService.send_push_notification(sub, message, "Daily Reminder"):
-                count += 1
-        return count
+
+        dispatcher = PushDispatcher()
+        return dispatcher.send_many(
+            (sub, message, "Daily Reminder") for sub in subscriptions.iterator()
+        )
 
     @staticmethod
     def send_evening_summary():
-        subscriptions = PushSubscription.objects.all()
-        
-        count = 0
-        today = datetime.now().date()
-        
-        for sub in subscriptions:
-            user = sub.user
-            # Get today's expenses
-            expenses = Transaction.objects.filter(
-                user=user, 
-                type='expense', 
-                date__date=today
+        # Subscriptions grouped by user, so multi-device users get one insight
+        subscriptions_by_user = defaultdict(list)
+        for sub in PushSubscription.objects.all():
+            subscriptions_by_user[sub.user_id].append(sub)
+        if not subscriptions_by_user:
+            return 0
+
+        # Today's expense totals per user and category, from the daily aggregates
+        totals = (
+            DailyAggregate.objects.filter(
+                Exists(PushSubscription.objects.filter(user_id=OuterRef('user_id'))),
+                type='expense',
+                day=timezone.localdate(),
             )
-            total_spent = sum(t.amount for t in expenses)
-            
-            # Create breakdown
-            breakdown = {}
-            for t in expenses:
-                cat = t.category or "Uncategorized"
-                breakdown[cat] = breakdown.get(cat, 0) + t.amount
-            
-            message = generate_daily_insight(total_spent, breakdown)
-                
-            if NotificationService.send_push_notification(sub, message, "Daily Summary"):
-                count += 1
-        return count
+            .values('user_id', 'category')
+            .annotate(total=Sum('total'))
+        )
+        breakdowns = defaultdict(dict)
+        for row in totals:
+            cat = row['category'] or "Uncategorized"
+            breakdown = breakdowns[row['user_id']]
+            breakdown[cat] = breakdown.get(cat, 0) + row['total']
+
+        summaries = {}
+        for user_id in subscriptions_by_user:
+            breakdown = breakdowns.get(user_id, {})
+            summaries[user_id] = (sum(breakdown.values()), breakdown)
+        insights = generate_daily_insights(summaries)
+
+        messages = []
+        for user_id, subs in subscriptions_by_user.items():
+            messages.extend((sub, insights[user_id], "Daily Summary") for sub in subs)
+
+        return PushDispatcher().send_many(messages)
@@ -0,0 +1,20 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from core.models import Transaction, Account
+from core.services.ai_context_service import AIContextService
+from core.services.analytics_service import AnalyticsService
+
+
+@receiver([post_save, post_delete], sender=Transaction)
+@receiver([post_save, post_delete], sender=Account)
+def invalidate_ai_context(sender, instance, **kwargs):
+    # Wait for commit so a concurrent chat request can't re-cache old data
+    user_id = instance.user_id
+    transaction.on_commit(lambda: AIContextService.invalidate(user_id))
+
+
+@receiver([post_save, post_delete], sender=Transaction)
+def invalidate_analytics(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: AnalyticsService.invalidate(user_id))
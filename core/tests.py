@@ -1,3 +1,1098 @@
-from django.test import TestCase
+import base64
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock, skipUnless
+from urllib.parse import parse_qs, urlparse
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib import admin as django_admin
+from django.contrib.auth.models import Permission
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count, Sum
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from decouple import UndefinedValueError
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.api.serializers.auth_serializer import RegisterSerializer
+from core.api.serializers.transaction_serializer import TransactionSerializer
+from core.api.views import ai_view
+from core.management import population, routes
+from core.management.commands.benchmark_startup import PROBE
+from core.models import (
+    User, Account, Transaction, DailyAggregate, BudgetLimit, PushSubscription, RequestProfile, CategoryCacheEntry,
+    CategoryKeyword, FAQEntry,
+)
+from core.services import categorization_service, notification_service
+from core.services.aggregate_service import AggregateService
+from core.services.ai_context_service import AIContextService
+from core.services.ledger_service import InsufficientFunds, LedgerService
+from core.services.notification_service import NotificationService, PushDispatcher
+from core.utils import ai_helper, metrics, perf
+from core.utils.category_cache import category_cache
+from core.utils.llm_client import CircuitBreaker, CircuitOpenError, LLMClient
+from core.utils.faq_cache import faq_cache, needs_user_data
+from core.utils.keyword_classifier import KeywordClassifier
+from core.utils.profiler import ProfileSession
+from utils.ai_service import AIServiceError, AIStreamError
+from utils.prompt_builder import PromptBuilder, estimate_tokens
 
-# Create your tests here.
+
+def _without_vapid_keys():
+    """Patch config() as in a checkout whose environment has no VAPID keys."""
+    def config(name, default=None, **kwargs):
+        if name.startswith('VAPID_') and default is None:
+            raise UndefinedValueError(f'{name} not found')
+        return default
+    return mock.patch.object(notification_service, 'config', side_effect=config)
+
+
+class PushDispatcherTest(TestCase):
+    """The VAPID key is only read once there is something to send."""
+
+    def test_reminders_without_subscriptions_need_no_key(self):
+        with _without_vapid_keys():
+            call_command('send_reminders', '--type=morning', stdout=io.StringIO())
+            self.assertEqual(PushDispatcher().send_many([]), 0)
+
+    def test_key_can_be_a_file_path(self):
+        from py_vapid import Vapid
+        with tempfile.TemporaryDirectory() as keys:
+            path = os.path.join(keys, 'private_key.pem')
+            vapid = Vapid()
+            vapid.generate_keys()
+            vapid.save_key(path)
+            with mock.patch.object(notification_service, 'config', side_effect=lambda name, default=None: (
+                path if name == 'VAPID_PRIVATE_KEY' else default
+            )):
+                headers = PushDispatcher()._headers('https://push.example.com')
+        self.assertTrue(headers['Authorization'].startswith('vapid t='))
+
+
+class TransactionCursorPaginationTest(TestCase):
+    """History pages are stable when dates tie and edited cursors are rejected."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('677000006', 'password')
+        account = Account.objects.create(user=self.user, name='MoMo', number='677000006', type='momo')
+        date = timezone.now()
+        self.rows = [
+            Transaction.objects.create(
+                user=self.user, account=account, type='income', amount=Decimal(100), reason='Tie', date=date,
+            )
+            for _ in range(5)
+        ]
+        self.rows.sort(key=lambda row: row.id)
+        self.rows.append(Transaction.objects.create(
+            user=self.user, account=account, type='income', amount=Decimal(100), reason='Older', date=date - timedelta(days=1),
+        ))
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {RefreshToken.for_user(self.user).access_token}'
+
+    def test_equal_dates_are_paged_in_id_order(self):
+        ids, url = [], '/api/transactions/?page_size=2'
+        while url:
+            page = self.client.get(url).json()
+            ids.extend(row['id'] for row in page['results'])
+            url = page['next']
+        self.assertEqual(ids, [str(row.id) for row in self.rows])
+
+    def test_malformed_or_edited_cursor_is_rejected(self):
+        cursor = parse_qs(urlparse(self.client.get('/api/transactions/?page_size=2').json()['next']).query)['cursor'][0]
+        # Point the cursor at another row while keeping it well formed
+        raw = base64.urlsafe_b64decode(cursor).decode().replace(str(self.rows[1].id), str(self.rows[3].id))
+        edited = base64.urlsafe_b64encode(raw.encode()).decode()
+        for bad in ('not-a-cursor', base64.urlsafe_b64encode(b'2026-01-01|x').decode(), edited):
+            with self.subTest(bad), self.assertNoLogs('core.api.views.transaction_view', level='ERROR'):
+                self.assertEqual(self.client.get('/api/transactions/', {'cursor': bad}).status_code, 404)
+        self.assertEqual(self.client.get('/api/transactions/', {'cursor': cursor}).status_code, 200)
+
+
+class PromptBuilderTest(SimpleTestCase):
+    """An oversized context is cut to the token budget, lowest priority first; the question never is."""
+    CONTEXT = {
+        'user_name': 'Ada',
+        'total_balance': 250000,
+        'accounts': [{'name': f'Account {i}', 'type': 'momo', 'balance': i * 1000} for i in range(20)],
+        'categories': [{'category': f'Category {i}', 'total': i * 500, 'count': i} for i in range(20)],
+        'transactions': [
+            {'type': 'expense', 'amount': 100 + i, 'reason': f'Lunch number {i}', 'date': '2026-10-01T12:00:00Z'}
+            for i in range(100)
+        ],
+    }
+    QUESTION = 'How much did I spend on food this month?'
+
+    def _build(self, budget, question=QUESTION):
+        return PromptBuilder('You are the FlowFunds assistant.', budget).build(question, self.CONTEXT)
+
+    def test_context_is_cut_to_the_budget(self):
+        full = self._build(100000)
+        self.assertEqual(full.omitted, {})
+        for budget in range(full.total_tokens // 4, full.total_tokens, 50):
+            prompt = self._build(budget)
+            self.assertLessEqual(prompt.total_tokens, budget)
+            self.assertTrue(prompt.omitted)
+
+    def test_sections_are_cut_in_priority_order(self):
+        full = self._build(100000)
+        for budget in range(full.total_tokens // 4, full.total_tokens, 50):
+            omitted = self._build(budget).omitted
+            kept = [len(self.CONTEXT[name]) - omitted.get(name, 0) for name in PromptBuilder.SECTION_PRIORITY]
+            for name, later in zip(PromptBuilder.SECTION_PRIORITY, kept[1:]):
+                # Nothing of a section is shown while the one before it is cut
+                if omitted.get(name):
+                    self.assertEqual(later, 0, (budget, omitted))
+
+        prompt = self._build(full.total_tokens // 2)
+        self.assertNotIn('accounts', prompt.omitted)
+        self.assertIn('transactions', prompt.omitted)
+        self.assertIn(f"... {prompt.omitted['transactions']} more not shown", prompt.messages[1]['content'])
+
+    def test_question_is_never_cut(self):
+        question = ' '.join(['Why did my balance drop so much?'] * 200)
+        prompt = self._build(500, question=question)
+        self.assertTrue(prompt.messages[1]['content'].endswith(f'USER QUESTION:\n{question}'))
+        self.assertEqual(prompt.question_tokens, estimate_tokens(f'USER QUESTION:\n{question}'))
+        self.assertEqual(prompt.omitted, {name: len(self.CONTEXT[name]) for name in PromptBuilder.SECTION_PRIORITY})
+
+
+class FAQCacheTest(TestCase):
+    """Near-miss how-to questions and personal questions don't get a shared answer."""
+
+    def setUp(self):
+        faq_cache.invalidate()
+        self.addCleanup(faq_cache.invalidate)
+
+    def test_near_miss_questions_are_not_served(self):
+        cases = (
+            ('How do I add money?', 'To record income'),
+            ('How can I save money?', "Use the 'Save'"),
+            ('How do I add an account?', 'Go to the Accounts page'),
+            ('How do I delete money?', None),
+            ('How do I track savings?', None),
+            ('How do I add an expense category?', None),
+        )
+        for question, answer in cases:
+            with self.subTest(question):
+                cached = faq_cache.lookup(question)
+                self.assertEqual(cached and cached[:len(answer)], answer)
+
+    def test_questions_about_own_data_are_personal(self):
+        for question in ('What did I buy at the market?', 'I paid rent twice?', 'Where did my money go?'):
+            with self.subTest(question):
+                self.assertTrue(needs_user_data(question))
+        self.assertFalse(needs_user_data('How do I add money?'))
+
+    @override_settings(FAQ_LEARN_ENABLED=True, FAQ_LEARNED_MAX=2)
+    def test_learned_entries_are_indexed_in_place_and_capped(self):
+        faq_cache.lookup('How do I add money?')
+        for question in ('How do I export a report?', 'How do I reset the password?', 'How do I rename a category?'):
+            faq_cache.learn(question, f'Answer to {question}')
+
+        with CaptureQueriesContext(connection) as queries:
+            answer = faq_cache.lookup('How can I rename a category?')
+        self.assertEqual(answer, 'Answer to How do I rename a category?')
+        self.assertEqual(len(queries.captured_queries), 1)  # the hit counter, no reload
+        self.assertEqual(FAQEntry.objects.filter(source='learned').count(), 2)
+
+
+class AIChatLearningTest(TestCase):
+    """Only a complete answer reaches the client as `done` and the shared FAQ cache."""
+
+    QUESTION = 'How do I export a yearly report?'
+
+    def setUp(self):
+        faq_cache.invalidate()
+        self.addCleanup(faq_cache.invalidate)
+        user = User.objects.create_user('677000008', 'password')
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {RefreshToken.for_user(user).access_token}'
+
+    def _service(self, *deltas, fail=False):
+        async def achat_stream(question, context):
+            for delta in deltas:
+                yield delta
+            if fail:
+                raise AIStreamError('connection reset')
+
+        return mock.Mock(ERROR_MESSAGE='error', achat_stream=achat_stream)
+
+    def _stream(self, service):
+        with mock.patch.object(ai_view, 'get_ai_service', return_value=service):
+            response = self.client.post('/api/ai/chat/?stream=1', {'question': self.QUESTION}, content_type='application/json')
+            body = async_to_sync(_read_stream)(response).decode()
+        return [line.removeprefix('event: ') for line in body.splitlines() if line.startswith('event: ')]
+
+    @override_settings(FAQ_LEARN_ENABLED=True)
+    def test_stream_failing_part_way_sends_error_and_is_not_learned(self):
+        self.assertEqual(self._stream(self._service('Open Reports, ', fail=True)), ['token', 'error'])
+        self.assertFalse(FAQEntry.objects.filter(source='learned').exists())
+
+    @override_settings(FAQ_LEARN_ENABLED=True)
+    def test_failed_answer_is_not_learned(self):
+        service = mock.Mock(ERROR_MESSAGE='error', achat=mock.AsyncMock(side_effect=AIServiceError('timeout')))
+        with mock.patch.object(ai_view, 'get_ai_service', return_value=service):
+            response = self.client.post('/api/ai/chat/', {'question': self.QUESTION}, content_type='application/json')
+
+        self.assertEqual(response.json()['answer'], 'error')
+        self.assertFalse(FAQEntry.objects.filter(source='learned').exists())
+
+    @override_settings(FAQ_LEARN_ENABLED=True)
+    def test_complete_stream_is_learned(self):
+        self.assertEqual(self._stream(self._service('Open Reports, ', 'then Export.')), ['token', 'token', 'done'])
+        self.assertEqual(FAQEntry.objects.get(source='learned').answer, 'Open Reports, then Export.')
+
+
+class AIContextInvalidationTest(TestCase):
+    """Saving a transaction or an account drops the user's cached AI context once committed."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('677000011', 'password')
+        self.account = Account.objects.create(user=self.user, name='MoMo', number='677000011', type='momo')
+        self.key = AIContextService.cache_key(self.user.pk)
+        cache.delete(self.key)
+        self.addCleanup(cache.delete, self.key)
+
+    def test_saved_transaction_invalidates(self):
+        AIContextService.get(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            Transaction.objects.create(
+                user=self.user, account=self.account, type='income', amount=Decimal(100), reason='Salary',
+                date=timezone.now(),
+            )
+        self.assertIsNone(cache.get(self.key))
+        self.assertEqual([txn['reason'] for txn in AIContextService.get(self.user)['transactions']], ['Salary'])
+
+    def test_saved_account_invalidates(self):
+        async_to_sync(AIContextService.aget)(self.user)
+        self.assertIsNotNone(cache.get(self.key))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.account.name = 'Orange Money'
+            self.account.save()
+        self.assertIsNone(cache.get(self.key))
+        self.assertEqual(AIContextService.get(self.user)['accounts'][0]['name'], 'Orange Money')
+
+
+class EveningSummaryQueryCountTest(TestCase):
+    """send_evening_summary must not issue queries per user or per device."""
+
+    def _add_users(self, count, devices=2):
+        for _ in range(count):
+            index = User.objects.count()
+            user = User.objects.create_user(f'6770{index:05d}', 'password')
+            account = Account.objects.create(user=user, name='MoMo', number=user.phone_number, type='momo')
+            for category, amount in (('Food', 1500), ('Transport', 500), ('Food', 1000)):
+                AggregateService.record(Transaction.objects.create(
+                    user=user, account=account, type='expense', amount=Decimal(amount),
+                    category=category, reason=category, date=timezone.now(),
+                ))
+            for device in range(devices):
+                PushSubscription.objects.create(
+                    user=user, endpoint=f'https://push.example.com/{index}/{device}', p256dh='key', auth='auth',
+                )
+
+    def _send(self):
+        with _without_vapid_keys(), \
+                mock.patch.object(PushDispatcher, 'send', return_value=True) as send, \
+                mock.patch.object(
+                    notification_service, 'generate_daily_insights',
+                    side_effect=lambda summaries: {key: 'Summary' for key in summaries},
+                ) as insight, \
+                CaptureQueriesContext(connection) as queries:
+            sent = NotificationService.send_evening_summary()
+        return sent, len(queries.captured_queries), insight, send
+
+    def test_query_count_is_constant_in_number_of_users(self):
+        self._add_users(2)
+        sent_small, queries_small, insight, _ = self._send()
+        self.assertEqual(sent_small, 4)
+        self.assertEqual(len(insight.call_args.args[0]), 2)
+
+        self._add_users(10)
+        sent_large, queries_large, insight, _ = self._send()
+        self.assertEqual(sent_large, 24)
+        self.assertEqual(queries_large, queries_small)
+
+    def test_insight_is_generated_once_per_user_with_grouped_totals(self):
+        self._add_users(1, devices=3)
+        sent, _, insight, send = self._send()
+
+        self.assertEqual(sent, 3)
+        summaries = insight.call_args.args[0]
+        self.assertEqual(list(summaries.values()), [
+            (Decimal('3000'), {'Food': Decimal('2500'), 'Transport': Decimal('500')}),
+        ])
+        insight.assert_called_once()
+        self.assertEqual(send.call_count, 3)
+
+
+class StartupImportTest(SimpleTestCase):
+    """Worker startup must not import the AI or push SDKs."""
+
+    def test_setup_and_urlconf_do_not_import_heavy_sdks(self):
+        result = subprocess.run(
+            [sys.executable, '-c', PROBE],
+            cwd=settings.BASE_DIR, env=os.environ.copy(), capture_output=True, text=True,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        probe = json.loads(result.stdout.strip().splitlines()[-1])
+        self.assertEqual(probe['loaded'], [])
+
+
+class ASGIMiddlewareTest(SimpleTestCase):
+    """Under ASGI no middleware is sync-only, so async views never wait in a thread."""
+
+    @override_settings(DEBUG=True)  # Django only logs adaptations in DEBUG
+    def test_no_middleware_is_adapted(self):
+        with self.assertNoLogs('django.request', level='DEBUG'):
+            ASGIHandler()
+
+
+class MetricsAggregationTest(SimpleTestCase):
+    """In multi-process mode a scrape sums the values every process wrote."""
+
+    def test_scrape_sums_all_process_files(self):
+        metrics.push_sent.inc(result='gone')
+        local = metrics.push_sent.collect()[('gone',)]
+        with tempfile.TemporaryDirectory() as shared, override_settings(METRICS_MULTIPROC_DIR=shared):
+            with open(os.path.join(shared, f'metrics_{os.getppid()}_1.json'), 'w') as other_worker:
+                json.dump({
+                    'flowfunds_push_sent_total': [[['gone'], 3]],
+                    'flowfunds_llm_request_duration_seconds': [[['chat'], [[0] * 12 + [1], 45.0, 1]]],
+                }, other_worker)
+            text = metrics.registry.render()
+
+        self.assertIn(f'flowfunds_push_sent_total{{result="gone"}} {local + 3}', text)
+        self.assertIn('flowfunds_llm_request_duration_seconds_bucket{operation="chat",le="30.0"} 0', text)
+        self.assertIn('flowfunds_llm_request_duration_seconds_bucket{operation="chat",le="+Inf"} 1', text)
+
+    def test_exited_process_files_are_archived(self):
+        metrics.push_sent.inc(result='failed')
+        local = metrics.push_sent.collect()[('failed',)]
+        exited = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'], capture_output=True, text=True)
+        with tempfile.TemporaryDirectory() as shared, override_settings(METRICS_MULTIPROC_DIR=shared):
+            for started in (1, 2):
+                # The same pid reused by a later cron run writes a second file instead of overwriting
+                with open(os.path.join(shared, f'metrics_{exited.stdout.strip()}_{started}.json'), 'w') as cron_run:
+                    json.dump({'flowfunds_push_sent_total': [[['failed'], 2]]}, cron_run)
+            first = metrics.registry.render()
+            second = metrics.registry.render()
+            files = sorted(os.listdir(shared))
+
+        expected = f'flowfunds_push_sent_total{{result="failed"}} {local + 4}'
+        self.assertIn(expected, first)
+        self.assertIn(expected, second)
+        self.assertCountEqual(files, ['metrics.lock', metrics.registry.ARCHIVE, metrics.registry.filename])
+
+
+class ServerTimingMiddlewareTest(TestCase):
+    """Each request reports its own DB and total time in Server-Timing, and leaves nothing bound."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('677000010', 'password')
+        self.token = RefreshToken.for_user(self.user).access_token
+
+    @staticmethod
+    def _timings(response):
+        """{'db': (ms, count), 'total': (ms, None)} from the Server-Timing header."""
+        timings = {}
+        for entry in response['Server-Timing'].split(', '):
+            name, *params = entry.split(';')
+            params = dict(param.split('=', 1) for param in params)
+            timings[name] = (float(params['dur']), int(params['desc'].strip('"')) if 'desc' in params else None)
+        return timings
+
+    def _get(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/accounts/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.assertEqual(response.status_code, 200)
+        return self._timings(response), len(queries.captured_queries)
+
+    def test_header_has_db_and_total_time(self):
+        timings, queries = self._get()
+        self.assertEqual(timings['db'][1], queries)
+        self.assertGreater(queries, 0)
+        self.assertGreaterEqual(timings['total'][0], timings['db'][0])
+
+    def test_metrics_do_not_carry_over_between_requests(self):
+        first, queries = self._get()
+        self.assertIsNone(perf.current())
+        second, _ = self._get()
+        self.assertIsNone(perf.current())
+        self.assertEqual(second['db'][1], first['db'][1])
+
+        # Nor into an async request served on the same thread
+        response = async_to_sync(self.async_client.get)('/api/accounts/', AUTHORIZATION=f'Bearer {self.token}')
+        self.assertEqual(self._timings(response)['db'][1], queries)
+        self.assertIsNone(perf.current())
+
+
+class MetricsEndpointTest(SimpleTestCase):
+    """/metrics needs METRICS_TOKEN; without one it is only served in DEBUG."""
+
+    @override_settings(METRICS_TOKEN='', DEBUG=False)
+    def test_closed_without_a_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    @override_settings(METRICS_TOKEN='', DEBUG=True)
+    def test_open_without_a_token_in_debug(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    @override_settings(METRICS_TOKEN='scrape-token')
+    def test_token_is_required(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-token').status_code, 200)
+
+
+class ProfilerMiddlewareTest(TestCase):
+    """Only staff can profile a request; X-Profile-As runs it as another user."""
+
+    def setUp(self):
+        self.staff = User.objects.create_user('677000001', 'password', is_staff=True)
+        self.staff.user_permissions.set(Permission.objects.filter(
+            content_type__app_label='core', codename__in=['add_requestprofile', 'view_transaction'],
+        ))
+        self.user = User.objects.create_user('677000002', 'password')
+        Account.objects.create(user=self.user, name='MoMo', number='677000002', type='momo')
+
+    def _get(self, user, query='_profile=1', **headers):
+        token = RefreshToken.for_user(user).access_token
+        return self.client.get(f'/api/accounts/?{query}', HTTP_AUTHORIZATION=f'Bearer {token}', **headers)
+
+    def test_non_staff_request_is_not_profiled(self):
+        response = self._get(self.user)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_staff_profiles_request_as_user(self):
+        response = self._get(self.staff, HTTP_X_PROFILE_AS=self.user.phone_number)
+        self.assertEqual([account['name'] for account in response.json()], ['MoMo'])
+
+        profile = RequestProfile.objects.get(pk=response['X-Profile-Id'])
+        self.assertEqual((profile.user, profile.requested_by), (self.user, self.staff))
+        self.assertEqual(profile.query_count, len(profile.queries))
+        self.assertIn('core_account', profile.queries[-1]['sql'])
+        self.assertIn('account_view.py', profile.summary)
+
+    def test_profiling_as_another_user_needs_permissions(self):
+        staff = User.objects.create_user('677000009', 'password', is_staff=True)
+        response = self._get(staff, HTTP_X_PROFILE_AS=self.user.phone_number)
+        self.assertEqual(response.json(), [])
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_flag_must_be_its_own_query_parameter(self):
+        response = self._get(self.staff, query='x_profile=1')
+        self.assertNotIn('X-Profile-Id', response)
+
+
+class SeedPopulationTest(TestCase):
+    """Seeded balances are the sum of the generated transactions; cleanup only removes seeded users."""
+
+    def test_balances_match_transactions_and_numbers_get_their_carrier(self):
+        created = population.seed_population(20, 50, days=60, method='orm', chunk_rows=300)
+
+        self.assertEqual(created['users'], 20)
+        self.assertEqual(Transaction.objects.count(), created['transactions'])
+        self.assertFalse(population.balance_mismatches().exists())
+        self.assertFalse(Account.objects.filter(balance__lt=0).exists())
+        for account in Account.objects.filter(name='My Account'):
+            self.assertEqual(account.type, RegisterSerializer.get_carrier_from_number(account.number))
+        # Numbers already taken are skipped when the population grows
+        self.assertEqual(population.seed_population(25, 10, days=60, method='orm')['users'], 5)
+
+    @skipUnless(connection.vendor == 'postgresql', 'COPY needs PostgreSQL')
+    def test_copy_balances_and_aggregates_match_transactions(self):
+        created = population.seed_population(20, 50, days=60, method='copy', chunk_rows=300)
+        # The COPY path leaves foreign keys to be checked at commit, which a TestCase never reaches
+        connection.check_constraints()
+
+        self.assertEqual(created['users'], 20)
+        self.assertEqual(population.population_size(), 20)
+        self.assertEqual(Transaction.objects.count(), created['transactions'])
+        self.assertFalse(population.balance_mismatches().exists())
+        self.assertEqual(
+            DailyAggregate.objects.aggregate(total=Sum('total'), count=Sum('count')),
+            Transaction.objects.aggregate(total=Sum('amount'), count=Count('id')),
+        )
+
+    def test_delete_spares_real_users_that_look_seeded(self):
+        population.seed_population(3, 5, days=10, method='orm')
+        lookalikes = [
+            User.objects.create_user('677999001', 'password', last_name=population.SEED_LAST_NAME),
+            User.objects.create_user(f'{population.PREFIX}677999002', 'password'),
+        ]
+
+        self.assertEqual(population.population_size(), 3)
+        population.delete_population()
+        self.assertEqual(list(User.objects.order_by('phone_number')), sorted(lookalikes, key=lambda user: user.phone_number))
+
+
+async def _read_stream(response):
+    return b''.join([chunk async for chunk in response.streaming_content])
+
+
+def _record_queries(run):
+    """Call run() and return its queries, each with the app frames that issued it."""
+    with ProfileSession().recording(connection) as session:
+        run()
+    return session.queries
+
+
+class TimeseriesTest(TestCase):
+    """Buckets are zero-filled, sums are exact and closed ranges revalidate with an ETag."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('677000003', 'password')
+        self.account = Account.objects.create(user=self.user, name='MoMo', number='677000003', type='momo')
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {RefreshToken.for_user(self.user).access_token}'
+
+    def _add(self, type, amount, date):
+        AggregateService.record(Transaction.objects.create(
+            user=self.user, account=self.account, type=type, amount=Decimal(amount),
+            reason='Test', date=datetime.fromisoformat(date).replace(tzinfo=dt_timezone.utc),
+        ))
+
+    def test_weekly_buckets(self):
+        self._add('income', '0.10', '2026-03-02T08:00:00')
+        self._add('income', '0.20', '2026-03-08T23:59:59')
+        self._add('expense', '1500.05', '2026-03-17T12:00:00')
+        self._add('expense', '99.00', '2026-03-23T00:00:00')  # next week, outside the range
+
+        response = self.client.get('/api/analytics/timeseries/?granularity=week&start=2026-03-04&end=2026-03-18')
+        data = response.json()
+
+        self.assertEqual((data['start'], data['end']), ('2026-03-02', '2026-03-22'))
+        self.assertEqual(
+            [(b['start'], b['income'], b['expense'], b['net'], b['count']) for b in data['buckets']],
+            [
+                ('2026-03-02', '0.30', '0.00', '0.30', 2),
+                ('2026-03-09', '0.00', '0.00', '0.00', 0),
+                ('2026-03-16', '0.00', '1500.05', '-1500.05', 1),
+            ],
+        )
+        self.assertEqual(data['totals']['net'], '-1499.75')
+
+    def test_closed_range_is_revalidated_until_a_transaction_changes(self):
+        self._add('expense', '500', '2026-01-15T12:00:00')
+        url = '/api/analytics/timeseries/?granularity=month&start=2026-01-01&end=2026-01-31'
+
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._add('expense', '250', '2026-01-20T12:00:00')  # back-dated
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['totals']['expense'], '750.00')
+
+
+class LedgerTest(TestCase):
+    """Debits check the funds in the UPDATE itself, so a drained account can't be overdrawn."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('677000007', 'password')
+        self.account = Account.objects.create(
+            user=self.user, name='MoMo', number='677000007', type='momo', balance=Decimal('100'),
+        )
+
+    def test_debit_that_would_overdraw_is_refused(self):
+        with self.assertRaises(InsufficientFunds):
+            LedgerService.debit(self.account.pk, Decimal('100.01'))
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('100'))
+
+    def test_two_debits_that_together_overdraw_leave_the_balance_covered(self):
+        # Both would pass a check against the balance read before either ran
+        LedgerService.debit(self.account.pk, Decimal('70'))
+        with self.assertRaises(InsufficientFunds):
+            LedgerService.debit(self.account.pk, Decimal('70'))
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('30'))
+
+    def test_account_drained_after_validation_gives_400_and_no_row(self):
+        validate = TransactionSerializer.validate
+
+        def validate_then_drain(serializer, attrs):
+            attrs = validate(serializer, attrs)
+            # A concurrent request spends the money between validate() and the debit
+            Account.objects.filter(pk=self.account.pk).update(balance=Decimal('50'))
+            return attrs
+
+        token = RefreshToken.for_user(self.user).access_token
+        with mock.patch.object(TransactionSerializer, 'validate', validate_then_drain), \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/transactions/', {
+                'type': 'expense', 'amount': 80, 'category': 'Food', 'reason': 'Lunch',
+                'date': timezone.now().isoformat(), 'account_id': str(self.account.pk),
+            }, content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('amount', response.json())
+        self.assertFalse(Transaction.objects.exists())
+        self.assertFalse(DailyAggregate.objects.exists())
+        # The chosen category is not remembered for a transaction that was refused
+        self.assertFalse(CategoryCacheEntry.objects.exists())
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('50'))
+
+
+class DailyAggregateTest(TestCase):
+    """Aggregates follow created and categorized transactions and match a rebuild."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('677000004', 'password')
+        self.account = Account.objects.create(
+            user=self.user, name='MoMo', number='677000004', type='momo', balance=Decimal('10000'),
+        )
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {RefreshToken.for_user(self.user).access_token}'
+
+    def _post(self, type, amount, reason, category=None):
+        body = {'type': type, 'amount': amount, 'reason': reason, 'date': timezone.now().isoformat(), 'account_id': str(self.account.pk)}
+        if category:
+            body['category'] = category
+        self.assertEqual(self.client.post('/api/transactions/', body, content_type='application/json').status_code, 201)
+
+    def _rows(self):
+        return sorted(
+            DailyAggregate.objects.values_list('account_id', 'day', 'type', 'category', 'total', 'count')
+        )
+
+    def test_increments_and_categorization_match_a_rebuild(self):
+        self._post('expense', 1000, 'Lunch', 'Food')
+        self._post('expense', 1500, 'Dinner', 'Food')
+        self._post('expense', 500, 'Taxi')
+        self._post('income', 2000, 'Salary', 'Salary')
+        with mock.patch.object(
+            categorization_service, 'categorize_transactions',
+            side_effect=lambda reasons, **kwargs: ['Transport'] * len(reasons),
+        ):
+            categorization_service.CategorizationService.process_pending()
+
+        today = timezone.localdate()
+        self.assertEqual(self._rows(), sorted([
+            (self.account.pk, today, 'expense', 'Food', Decimal('2500.00'), 2),
+            (self.account.pk, today, 'expense', 'Transport', Decimal('500.00'), 1),
+            (self.account.pk, today, 'income', 'Salary', Decimal('2000.00'), 1),
+        ]))
+        incremented = self._rows()
+        call_command('rebuild_daily_aggregates', stdout=io.StringIO())
+        self.assertEqual(self._rows(), incremented)
+
+    def test_admin_edits_and_deletes_keep_the_aggregates_in_step(self):
+        self._post('expense', 1000, 'Lunch', 'Food')
+        self._post('expense', 1500, 'Dinner', 'Food')
+        transaction_admin = django_admin.site._registry[Transaction]
+        lunch, dinner = Transaction.objects.order_by('amount')
+
+        lunch.amount, lunch.category = Decimal('800'), 'Transport'
+        lunch.date -= timedelta(days=1)
+        transaction_admin.save_model(None, lunch, None, True)
+        yesterday = timezone.localdate(lunch.date)
+        self.assertEqual(self._rows(), sorted([
+            (self.account.pk, yesterday, 'expense', 'Transport', Decimal('800.00'), 1),
+            (self.account.pk, timezone.localdate(), 'expense', 'Food', Decimal('1500.00'), 1),
+        ]))
+
+        transaction_admin.delete_model(None, dinner)
+        transaction_admin.delete_queryset(None, Transaction.objects.filter(pk=lunch.pk))
+        self.assertEqual(self._rows(), [])
+
+
+class CategoryCacheTest(TestCase):
+    """Lookups hit the process LRU, then the shared table; a user's override beats the shared entry."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('677000008', 'password')
+        category_cache.lru.clear()
+        self.addCleanup(category_cache.lru.clear)
+
+    def test_lru_hit_needs_no_query(self):
+        category_cache.set('Taxi to town', 'Transport')
+        with self.assertNumQueries(0):
+            self.assertEqual(category_cache.get('TAXI to town 500'), 'Transport')
+
+    def test_db_entry_fills_the_lru(self):
+        category_cache.set('Taxi to town', 'Transport')
+        category_cache.lru.clear()
+        with self.assertNumQueries(2):  # lookup and hit count
+            self.assertEqual(category_cache.get('taxi to town'), 'Transport')
+        with self.assertNumQueries(0):
+            self.assertEqual(category_cache.get('taxi to town'), 'Transport')
+        self.assertEqual(CategoryCacheEntry.objects.get(key='taxi to town').hits, 1)
+
+    def test_user_override_wins(self):
+        category_cache.set('Gift for mum', 'Shopping')
+        category_cache.set_override(self.user.pk, 'Gift for mum', 'Family')
+        category_cache.lru.clear()
+        self.assertEqual(category_cache.get('gift for mum', user_id=self.user.pk), 'Family')
+        self.assertEqual(category_cache.get('gift for mum'), 'Shopping')
+        self.assertEqual(
+            category_cache.get_many(['gift for mum'] * 2, [self.user.pk, None]), ['Family', 'Shopping'],
+        )
+
+    def test_prune_deletes_expired_entries_and_clears_the_lru(self):
+        category_cache.set('Taxi to town', 'Transport')
+        CategoryCacheEntry.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(category_cache.prune(), 1)
+        self.assertEqual(len(category_cache.lru), 0)
+        self.assertIsNone(category_cache.get('taxi to town'))
+
+    def test_saved_transaction_records_the_override(self):
+        account = Account.objects.create(user=self.user, name='MoMo', number='677000008', type='momo', balance=100)
+        token = RefreshToken.for_user(self.user).access_token
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/transactions/', {
+                'type': 'expense', 'amount': 20, 'category': 'Family', 'reason': 'Gift for mum',
+                'date': timezone.now().isoformat(), 'account_id': str(account.pk),
+            }, content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(category_cache.get('gift for mum', user_id=self.user.pk), 'Family')
+
+
+class KeywordClassifierTest(TestCase):
+    """Keywords match whole words; weak or contested matches are left to the LLM."""
+
+    def setUp(self):
+        CategoryKeyword.objects.all().delete()
+        for keyword, category, weight in (
+            ('rent', 'Rent', 1), ('taxi', 'Transport', 1), ('bus ticket', 'Transport', 1),
+            ('ticket', 'Entertainment', 1), ('tip', 'Other', Decimal('0.5')),
+        ):
+            CategoryKeyword.objects.create(keyword=keyword, category=category, weight=weight)
+        self.classifier = KeywordClassifier()
+        # Answers asked from the LLM are cached per process
+        category_cache.lru.clear()
+        self.addCleanup(category_cache.lru.clear)
+
+    def _categorize(self, reason):
+        with mock.patch.object(ai_helper, 'keyword_classifier', self.classifier), \
+                mock.patch.object(ai_helper, '_ask_category', return_value='Asked') as ask:
+            return ai_helper.categorize_transaction(reason), ask.called
+
+    def test_keywords_match_whole_words_only(self):
+        self.assertEqual(self.classifier.classify('Rent for March'), 'Rent')
+        self.assertEqual(self.classifier.scores('Gift for parents'), {})
+        self.assertEqual(self.classifier.scores('Rental car'), {})
+
+    def test_score_below_threshold_falls_through_to_the_llm(self):
+        self.assertEqual(self.classifier.scores('Tip'), {'Other': 0.5})
+        self.assertEqual(self._categorize('Tip for the waiter'), ('Asked', True))
+        self.assertEqual(self._categorize('Taxi to town'), ('Transport', False))
+
+    def test_contested_match_falls_through_to_the_llm(self):
+        # Equal scores: neither category clearly wins
+        self.assertEqual(self.classifier.scores('Taxi and rent'), {'Transport': 1.0, 'Rent': 1.0})
+        self.assertEqual(self._categorize('Taxi and rent'), ('Asked', True))
+
+    def test_phrase_beats_the_word_it_contains(self):
+        # "bus ticket" counts per word, so it outweighs "ticket" by the margin
+        self.assertEqual(self.classifier.scores('Bus ticket'), {'Transport': 2.0, 'Entertainment': 1.0})
+        self.assertEqual(self.classifier.classify('Bus ticket'), 'Transport')
+
+
+class CategorizationClaimTest(TestCase):
+    """A batch claimed by one worker is skipped by the others until it is released or expires."""
+
+    def setUp(self):
+        user = User.objects.create_user('677000005', 'password')
+        account = Account.objects.create(user=user, name='MoMo', number='677000005', type='momo')
+        for reason in ('Lunch', 'Taxi'):
+            AggregateService.record(Transaction.objects.create(
+                user=user, account=account, type='expense', amount=Decimal(1000),
+                category=Transaction.CATEGORY_PENDING, reason=reason, date=timezone.now(),
+            ))
+
+    def test_claimed_rows_are_skipped(self):
+        service = categorization_service.CategorizationService
+        with mock.patch.object(
+            categorization_service, 'categorize_transactions',
+            side_effect=lambda reasons, **kwargs: ['Food'] * len(reasons),
+        ) as categorize:
+            # Another worker holds the oldest row while its LLM call runs
+            (claimed, _, _), = service._claim(1)
+            self.assertEqual(service.process_pending(), 1)
+            self.assertEqual(categorize.call_args.args[0], ['Taxi'])
+
+            Transaction.objects.filter(pk=claimed).update(claimed_until=timezone.now() - timedelta(seconds=1))
+            self.assertEqual(service.process_pending(), 1)
+        self.assertFalse(Transaction.objects.filter(category=Transaction.CATEGORY_PENDING).exists())
+
+    def test_failed_batch_is_released(self):
+        with mock.patch.object(categorization_service, 'categorize_transactions', side_effect=RuntimeError('down')):
+            with self.assertRaises(RuntimeError):
+                categorization_service.CategorizationService.process_pending()
+        self.assertFalse(Transaction.objects.filter(claimed_until__isnull=False).exists())
+
+
+class CategorizeTransactionsTest(TestCase):
+    """Batch categorization reads the cache per batch and doesn't multiply calls in an outage."""
+
+    def test_overrides_are_read_in_one_query(self):
+        users = [User.objects.create_user(f'67700001{i}', 'password') for i in range(3)]
+        for user in users:
+            CategoryCacheEntry.objects.create(key='gift for mum', user=user, category=f'Family {user.phone_number}')
+        with CaptureQueriesContext(connection) as queries:
+            categories = ai_helper.categorize_transactions(
+                ['Gift for mum'] * 3, user_ids=[user.pk for user in users], skip_cache=True,
+            )
+        self.assertEqual(categories, [f'Family {user.phone_number}' for user in users])
+        self.assertEqual(len(queries.captured_queries), 1)
+
+    def test_failed_batch_call_is_not_retried_per_item(self):
+        llm = mock.Mock(complete=mock.Mock(side_effect=ConnectionError('down')))
+        with mock.patch.object(ai_helper, 'get_llm_client', return_value=llm), \
+                mock.patch.object(ai_helper, '_ask_category') as single:
+            categories = ai_helper.categorize_transactions(['zzq one', 'zzq two', 'zzq three'], batch_size=3)
+        self.assertEqual(categories, ['Other'] * 3)
+        self.assertEqual(llm.complete.call_count, 1)
+        single.assert_not_called()
+
+
+class CircuitBreakerTest(SimpleTestCase):
+    """The breaker opens on consecutive failures and lets one trial through after the cooldown."""
+
+    def setUp(self):
+        self.breaker = CircuitBreaker(threshold=3, reset_timeout=60)
+
+    def _open(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+
+    def _cool_down(self):
+        self.breaker._opened_at -= 61
+
+    def test_opens_after_threshold_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertFalse(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.allow()
+
+    def test_success_resets_the_failure_count(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_one_trial_after_cooldown(self):
+        self._open()
+        self._cool_down()
+        self.assertTrue(self.breaker.allow())
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.allow()
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertFalse(self.breaker.allow())
+
+    def test_failed_trial_opens_again(self):
+        self._open()
+        self._cool_down()
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.allow()
+
+
+@override_settings(LLM_MAX_RETRIES=2, LLM_BREAKER_THRESHOLD=3, LLM_BREAKER_RESET=60)
+class LLMClientTest(SimpleTestCase):
+    """Provider errors are retried with backoff; rejected requests and mid-stream errors are not double counted."""
+
+    def setUp(self):
+        import httpx
+        from openai import APIConnectionError
+        self.llm = LLMClient()
+        self.llm._client = mock.Mock()
+        self.create = self.llm._client.chat.completions.create
+        self.down = APIConnectionError(request=httpx.Request('POST', 'http://llm.test/chat/completions'))
+        backoff = mock.patch.object(LLMClient, '_backoff', return_value=0)
+        self.backoff = backoff.start()
+        self.addCleanup(backoff.stop)
+
+    def test_retries_provider_errors_with_backoff(self):
+        self.create.side_effect = [self.down, self.down, 'answer']
+        self.assertEqual(self.llm.complete('test'), 'answer')
+        self.assertEqual(self.create.call_count, 3)
+        self.assertEqual([call.args for call in self.backoff.call_args_list], [(0,), (1,)])
+        self.assertEqual(self.llm.stats()['retries'], 2)
+        self.assertEqual(self.llm.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_rejected_request_is_not_retried(self):
+        self.create.side_effect = ValueError('bad request')
+        with self.assertRaises(ValueError):
+            self.llm.complete('test')
+        self.assertEqual(self.create.call_count, 1)
+        self.backoff.assert_not_called()
+        self.assertEqual(self.llm.breaker.snapshot()['consecutive_failures'], 0)
+
+    def test_exhausted_retries_count_one_failure_and_open_the_breaker(self):
+        self.create.side_effect = self.down
+        for _ in range(3):
+            with self.assertRaises(type(self.down)):
+                self.llm.complete('test')
+        self.assertEqual(self.create.call_count, 9)
+        self.assertEqual(self.llm.stats()['failures'], 3)
+        with self.assertRaises(CircuitOpenError):
+            self.llm.complete('test')
+        self.assertEqual(self.create.call_count, 9)
+
+    def test_mid_stream_error_counts_once(self):
+        def chunks():
+            yield 'first'
+            raise self.down
+
+        self.create.return_value = chunks()
+        received = []
+        with self.assertRaises(type(self.down)):
+            for chunk in self.llm.stream('test'):
+                received.append(chunk)
+        stats = self.llm.stats()
+        self.assertEqual(received, ['first'])
+        self.assertEqual(self.create.call_count, 1)
+        self.assertEqual(stats['failures'], 1)
+        self.assertEqual(self.llm.breaker.snapshot()['consecutive_failures'], 1)
+        self.assertEqual(stats['latency']['samples'], 0)
+
+
+class QueryBudgetTest(TestCase):
+    """
+    Every API route and management command has a query budget. Each one runs
+    against a small and a large data set and must stay within its budget at
+    the same count for both, so a query per row (an N+1) fails here. The
+    failure lists the queries of the larger run with the code that issued them.
+
+    The benchmark_* commands are load tools and aren't budgeted.
+    """
+    SIZES = (2, 8)
+
+    # The API routes of core/management/routes.py, plus the scrape endpoint ('scraper' sends METRICS_TOKEN)
+    ENDPOINTS = routes.ROUTES + (
+        ('GET /metrics', 0, 'GET', lambda c: '/metrics', None, 'scraper'),
+    )
+
+    # (command line, query budget); formatted with the case context, so {size} is the data size of the run
+    COMMANDS = (
+        ('categorize_pending', 10),
+        ('recategorize_transactions --all', 8),
+        ('prune_category_cache', 1),
+        ('send_reminders --type=morning', 1),
+        ('send_reminders --type=evening', 2),
+        ('seed_data --users=3 --transactions=5 --offset={size}00 --method=orm', 13),
+        ('rebuild_daily_aggregates --user={user.phone_number}', 6),
+    )
+
+    def setUp(self):
+        self.staff = User.objects.create_user('650000000', 'password', is_staff=True)
+
+    def _populate(self, size):
+        """One user owning `size` of everything, plus `size` other users with pending transactions."""
+        index = User.objects.count()
+        user = User.objects.create_user(f'6770{index:05d}', 'password')
+        accounts = [
+            Account.objects.create(user=user, name=f'Wallet {i}', number=user.phone_number, type='momo', balance=Decimal('100000'))
+            for i in range(size)
+        ]
+        for account in accounts:
+            for category, reason in (('Food', 'Lunch'), ('Transport', 'Taxi')):
+                AggregateService.record(Transaction.objects.create(
+                    user=user, account=account, type='expense', amount=Decimal(1000),
+                    category=category, reason=reason, date=timezone.now(),
+                ))
+        limits = [BudgetLimit.objects.create(user=user, category=f'Category {i}', amount=Decimal(5000)) for i in range(size)]
+        subscriptions = [
+            PushSubscription.objects.create(user=user, endpoint=f'https://push.example.com/{index}/{i}', p256dh='key', auth='auth')
+            for i in range(size)
+        ]
+        for i in range(size):
+            other = User.objects.create_user(f'6780{index:03d}{i:02d}', 'password')
+            account = Account.objects.create(user=other, name='MoMo', number=other.phone_number, type='momo')
+            AggregateService.record(Transaction.objects.create(
+                user=other, account=account, type='expense', amount=Decimal(1000),
+                category=Transaction.CATEGORY_PENDING, reason=f'Reason {i}', date=timezone.now(),
+            ))
+            PushSubscription.objects.create(user=other, endpoint=f'https://push.example.com/o{index}/{i}', p256dh='key', auth='auth')
+        spare = Account.objects.create(user=user, name='Spare', number='0000', type='cash')
+        return {
+            'size': size, 'user': user, 'phone_number': user.phone_number, 'password': 'password',
+            'refresh': str(RefreshToken.for_user(user)), 'account': accounts[0].pk, 'spare': spare.pk,
+            'limit': limits[0].pk, 'subscription': subscriptions[0].pk,
+            'new_phone': f'699{size:06d}', 'new_number': '0001', 'push_url': 'https://push.example.com',
+        }
+
+    def _request(self, method, path, body, who, context):
+        headers = {}
+        if who == 'scraper':
+            headers['HTTP_AUTHORIZATION'] = f'Bearer {settings.METRICS_TOKEN}'
+        elif who:
+            token = RefreshToken.for_user(self.staff if who == 'staff' else context['user']).access_token
+            headers['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+        kwargs = {'data': json.dumps(body(context)), 'content_type': 'application/json'} if body else {}
+        response = getattr(self.client, method.lower())(path(context), **kwargs, **headers)
+        self.assertLess(response.status_code, 400, f'{method} {path(context)}: {response.content[:500]}')
+
+    def _check(self, name, budget, runs):
+        counts = [len(queries) for queries in runs]
+        if counts[0] == counts[-1] and counts[-1] <= budget:
+            return
+        # Repeats of one statement are the usual culprit, so group them
+        grouped = {}
+        for query in runs[-1]:
+            grouped.setdefault(query['sql'], []).append(query)
+        self.fail(
+            f'{name} ran {" and ".join(map(str, counts))} queries at sizes {self.SIZES}, budget {budget}. '
+            f'Queries at size {self.SIZES[-1]}:\n'
+            + ''.join(
+                f'\n{len(queries)}x {sql}\n' + ''.join(f'    {frame}\n' for frame in queries[0]['stack'])
+                for sql, queries in grouped.items()
+            )
+        )
+
+    def test_route_table_matches_the_urlconf(self):
+        self.assertEqual({route.split(' ', 1)[1] for route, *_ in routes.ROUTES}, routes.api_routes())
+
+    @override_settings(METRICS_TOKEN='scrape-token')
+    def test_endpoints_stay_within_budget(self):
+        runs = {route: [] for route, *_ in self.ENDPOINTS}
+        chat = mock.Mock(ERROR_MESSAGE='error', achat=mock.AsyncMock(return_value='You spent 2,000 XAF.'))
+        with mock.patch.object(ai_view, 'get_ai_service', return_value=chat):
+            for size in self.SIZES:
+                context = self._populate(size)
+                for route, _, method, path, body, who in self.ENDPOINTS:
+                    runs[route].append(_record_queries(lambda: self._request(method, path, body, who, context)))
+        for route, budget, *_ in self.ENDPOINTS:
+            with self.subTest(route):
+                self._check(route, budget, runs[route])
+
+    def test_commands_stay_within_budget(self):
+        runs = {command: [] for command, _ in self.COMMANDS}
+        with _without_vapid_keys(), \
+                mock.patch.object(PushDispatcher, 'send', return_value=True), \
+                mock.patch.object(
+                    notification_service, 'generate_daily_insights',
+                    side_effect=lambda summaries: {key: 'Summary' for key in summaries},
+                ), \
+                mock.patch.object(
+                    categorization_service, 'categorize_transactions',
+                    side_effect=lambda reasons, **kwargs: ['Food'] * len(reasons),
+                ):
+            for size in self.SIZES:
+                context = self._populate(size)
+                for command, _ in self.COMMANDS:
+                    arguments = command.format(**context).split()
+                    runs[command].append(_record_queries(lambda: call_command(*arguments, stdout=io.StringIO())))
+        for command, budget in self.COMMANDS:
+            with self.subTest(command):
+                self._check(command, budget, runs[command])
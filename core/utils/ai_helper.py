@@ -1,25 +1,50 @@
 "use client";
 import os
-from openai import OpenAI
-from decouple import config
+import json
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from core.utils.category_cache import category_cache, normalize_reason
+from core.utils.keyword_classifier import keyword_classifier
+from core.utils.llm_client import get_llm_client
 
-# Using DeepSeek via OpenAI SDK as it's OpenAI compatible
-client = OpenAI(
-    api_key=config('DEEPSEEK_API_KEY'),
-    base_url="https://api.deepseek.com"
-)
+logger = logging.getLogger(__name__)
 
-def categorize_transaction(reason):
+ZERO_SPENT_INSIGHT = "You spent 0 XAF today! That's a great step towards your savings goals. 🚀"
+
+def categorize_transaction(reason, user_id=None):
     """
     Categorizes a transaction based on the reason/description.
+
+    Repeat reasons are answered from the category cache (the user's own
+    override wins over the shared entry), then by the local keyword
+    classifier. The LLM is only asked when neither has a confident answer.
     """
     if not reason:
         return "Other"
-        
+
+    cached = category_cache.get(reason, user_id=user_id)
+    if cached:
+        return cached
+
+    matched = keyword_classifier.classify(reason)
+    if matched:
+        return matched
+
+    category = _ask_category(reason)
+    if category is None:
+        return "Other"
+    category_cache.set(reason, category)
+    return category
+
+def _ask_category(reason):
+    """Ask the LLM for a category. Returns None when the call fails."""
     prompt = f"Categorize this transaction based on the reason: '{reason}'. Reply with only the category name (one or two words). Common categories: Food, Transport, Rent, Entertainment, Health, Utilities, Shopping, Salary, Investment, Other."
     
     try:
-        response = client.chat.completions.create(
+        response = get_llm_client().complete(
+            'categorize',
             model="deepseek-chat",
             messages=[
                 {"role": "system", "content": "You are a financial assistant that categorizes transactions into concise categories."},
@@ -28,35 +53,221 @@ def categorize_transaction(reason):
             max_tokens=20,
             temperature=0.3
         )
-        return response.choices[0].message.content.strip().replace('.', '')
+        return response.choices[0].message.content.strip().replace('.', '') or None
     except Exception as e:
-        print(f"AI Categorization Error: {e}")
-        return "Other"
+        logger.warning(f"[CATEGORIZE] LLM call failed: {e}")
+        return None
 
-def generate_daily_insight(total_spent, category_breakdown):
+def categorize_transactions(reasons, user_ids=None, batch_size=None, concurrency=None, skip_cache=False):
     """
-    Generates a short, engaging daily summary based on spending.
+    Categorizes many reasons at once. Returns categories in input order.
+
+    Reasons resolved by the cache or the keyword classifier never reach the
+    LLM; the rest are de-duplicated and sent as numbered lists of
+    `batch_size` reasons per chat completion, `concurrency` completions at a
+    time. Items the model answers unparseably are retried one by one; a
+    failed call is not, so an outage costs one call per batch.
+    `skip_cache` ignores cached answers (user overrides still apply), for
+    re-categorizing rows the cache may have got wrong.
     """
-    if total_spent == 0:
-        return "You spent 0 XAF today! That's a great step towards your savings goals. 🚀"
+    batch_size = batch_size or settings.CATEGORIZATION_LLM_BATCH_SIZE
+    concurrency = concurrency or settings.CATEGORIZATION_LLM_CONCURRENCY
+    user_ids = user_ids or [None] * len(reasons)
 
-    breakdown_text = ", ".join([f"{k}: {v}" for k, v in category_breakdown.items()])
-    prompt = f"Write a 1-sentence friendly push notification summary for someone who spent {total_spent} XAF today. Breakdown: {breakdown_text}. Be encouraging or humorous. Emoji allowed."
+    # Cached answers for the whole batch in one or two queries
+    if skip_cache:
+        cached = category_cache.get_overrides(reasons, user_ids)
+    else:
+        cached = category_cache.get_many(reasons, user_ids)
+
+    results = [None] * len(reasons)
+    unresolved = {}
+    for index, reason in enumerate(reasons):
+        if not reason:
+            results[index] = "Other"
+            continue
+        category = cached[index] or keyword_classifier.classify(reason)
+        if category:
+            results[index] = category
+        else:
+            # Reasons differing only in case, accents or amounts are asked once
+            key = normalize_reason(reason) or reason
+            unresolved.setdefault(key, (reason, []))[1].append(index)
+
+    pending = [reason for reason, _ in unresolved.values()]
+    chunks = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    # Worker threads only talk to the LLM; cache writes stay on this thread
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(chunks) or 1))) as pool:
+        answers = list(pool.map(_ask_categories, chunks))
+
+    for chunk, categories in zip(chunks, answers):
+        for reason, category in zip(chunk, categories):
+            if category is None:
+                category = "Other"
+            else:
+                category_cache.set(reason, category)
+            for index in unresolved[normalize_reason(reason) or reason][1]:
+                results[index] = category
+    return results
+
+def _ask_categories(reasons):
+    """
+    Ask the LLM to categorize a list of reasons in one call. Returns a list
+    aligned with `reasons`; None marks items that could not be categorized.
+    """
+    numbered = "\n".join(f"{i + 1}. {reason}" for i, reason in enumerate(reasons))
+    prompt = f"Categorize each of these {len(reasons)} transactions based on its reason:\n{numbered}\n\nReply with only a JSON array of {len(reasons)} strings, one category name (one or two words) per transaction, in the same order. Common categories: Food, Transport, Rent, Entertainment, Health, Utilities, Shopping, Salary, Investment, Other."
 
     try:
-        response = client.chat.completions.create(
+        response = get_llm_client().complete(
+            'categorize',
             model="deepseek-chat",
             messages=[
-                {"role": "system", "content": "You are a friendly financial assistant."},
+                {"role": "system", "content": "You are a financial assistant that categorizes transactions into concise categories."},
                 {"role": "user", "content": prompt}
             ],
-            max_tokens=60,
-            temperature=0.7
+            max_tokens=20 + 10 * len(reasons),
+            temperature=0.3
         )
+    except Exception as e:
+        # Transport errors and an open breaker would fail item by item too
+        logger.warning(f"[CATEGORIZE] Batch LLM call failed for {len(reasons)} reasons: {e}")
+        return [None] * len(reasons)
+
+    categories = _parse_category_array(response.choices[0].message.content)
+    if categories is None or len(categories) != len(reasons):
+        categories = [None] * len(reasons)
+    # Anything the batch answer didn't cover is asked individually
+    return [
+        category if category else _ask_category(reason)
+        for reason, category in zip(reasons, categories)
+    ]
+
+def _parse_category_array(content):
+    """Extract a JSON array of category strings from a model reply."""
+    if not content:
+        return None
+    start, end = content.find('['), content.rfind(']')
+    if start == -1 or end <= start:
+        return None
+    try:
+        items = json.loads(content[start:end + 1])
+    except ValueError:
+        return None
+    if not isinstance(items, list):
+        return None
+    return [
+        item.strip().replace('.', '') or None if isinstance(item, str) else None
+        for item in items
+    ]
+
+def generate_daily_insight(total_spent, category_breakdown):
+    """
+    Generates a short, engaging daily summary based on spending.
+    """
+    if total_spent == 0:
+        return ZERO_SPENT_INSIGHT
+
+    try:
+        response = get_llm_client().complete('insight', **_insight_request(total_spent, category_breakdown))
         return response.choices[0].message.content.strip()
     except Exception as e:
-        print(f"AI Insight Error: {e}")
-        return f"You spent {total_spent:,.0f} XAF today. Keep tracking! 📝"
+        logger.warning(f"[INSIGHT] LLM call failed, using the template: {e}")
+        return _insight_fallback(total_spent)
+
+def generate_daily_insights(summaries):
+    """
+    Generates daily summaries for many users concurrently.
+
+    `summaries` maps any key (e.g. user id) to (total_spent, category_breakdown);
+    returns the same keys mapped to messages. At most INSIGHT_CONCURRENCY
+    calls are in flight and at most INSIGHT_RATE_LIMIT start per second.
+    A call that fails or exceeds INSIGHT_CALL_TIMEOUT, or is still waiting
+    when INSIGHT_BATCH_TIMEOUT runs out, gets the template fallback, so the
+    whole batch has a bounded wall-clock time.
+    """
+    return asyncio.run(_generate_daily_insights(summaries))
+
+async def _generate_daily_insights(summaries):
+    results = {}
+    pending = {}
+    for key, (total_spent, breakdown) in summaries.items():
+        if total_spent == 0:
+            results[key] = ZERO_SPENT_INSIGHT
+        else:
+            pending[key] = (total_spent, breakdown)
+    if not pending:
+        return results
+
+    semaphore = asyncio.Semaphore(settings.INSIGHT_CONCURRENCY)
+    limiter = _RateLimiter(settings.INSIGHT_RATE_LIMIT)
+
+    llm = get_llm_client()
+
+    async def generate(total_spent, breakdown):
+        async with semaphore:
+            await limiter.wait()
+            response = await asyncio.wait_for(
+                llm.acomplete('insight', **_insight_request(total_spent, breakdown)),
+                timeout=settings.INSIGHT_CALL_TIMEOUT,
+            )
+            return response.choices[0].message.content.strip()
+
+    tasks = {
+        asyncio.ensure_future(generate(total_spent, breakdown)): key
+        for key, (total_spent, breakdown) in pending.items()
+    }
+    done, not_done = await asyncio.wait(tasks, timeout=settings.INSIGHT_BATCH_TIMEOUT)
+    for task in not_done:
+        task.cancel()
+    if not_done:
+        await asyncio.gather(*not_done, return_exceptions=True)
+        logger.warning(f"[INSIGHT] Batch deadline reached, {len(not_done)} calls cancelled")
+
+    failures = 0
+    for task, key in tasks.items():
+        if task in done and task.exception() is None and task.result():
+            results[key] = task.result()
+        else:
+            failures += 1
+            results[key] = _insight_fallback(pending[key][0])
+    if failures:
+        logger.warning(f"[INSIGHT] {failures}/{len(tasks)} insights fell back to the template")
+    return results
+
+class _RateLimiter:
+    """Spaces call starts so no more than `rate` begin per second."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+def _insight_request(total_spent, category_breakdown):
+    breakdown_text = ", ".join([f"{k}: {v}" for k, v in category_breakdown.items()])
+    prompt = f"Write a 1-sentence friendly push notification summary for someone who spent {total_spent} XAF today. Breakdown: {breakdown_text}. Be encouraging or humorous. Emoji allowed."
+    return {
+        "model": "deepseek-chat",
+        "messages": [
+            {"role": "system", "content": "You are a friendly financial assistant."},
+            {"role": "user", "content": prompt}
+        ],
+        "max_tokens": 60,
+        "temperature": 0.7,
+    }
+
+def _insight_fallback(total_spent):
+    return f"You spent {total_spent:,.0f} XAF today. Keep tracking! 📝"
 
 def get_budget_advice(spending_data):
     """
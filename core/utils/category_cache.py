@@ -0,0 +1,243 @@
+"""
+Two-tier memo cache for transaction categories.
+
+Tier 1 is a per-process LRU, tier 2 the CategoryCacheEntry table shared by
+all workers. Keys are normalized reasons, so "Taxi ", "taxi" and "TAXI 500"
+share one entry. Per-user overrides are looked up together with the global
+entry and always win.
+"""
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import F, Q
+from django.utils import timezone
+from core.models import CategoryCacheEntry
+from core.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_reason(reason):
+    """Lowercase, strip accents and punctuation, and drop pure numbers."""
+    if not reason:
+        return ''
+    text = unicodedata.normalize('NFKD', reason)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    tokens = [tok for tok in _NON_WORD.split(text) if tok and not tok.isdigit()]
+    return ' '.join(tokens)[:255]
+
+
+class _LRUCache:
+    """Thread-safe LRU with a per-entry time-to-live."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class CategoryCache:
+    # stats key -> result label in /metrics
+    RESULTS = {'lru_hits': 'lru_hit', 'db_hits': 'db_hit', 'misses': 'miss'}
+
+    def __init__(self):
+        self._lru = None
+        self._stats_lock = threading.Lock()
+        self._stats = {'lru_hits': 0, 'db_hits': 0, 'misses': 0}
+
+    @property
+    def lru(self):
+        if self._lru is None:
+            self._lru = _LRUCache(
+                settings.CATEGORY_CACHE_LRU_SIZE,
+                settings.CATEGORY_CACHE_LRU_TTL,
+            )
+        return self._lru
+
+    def _count(self, stat):
+        with self._stats_lock:
+            self._stats[stat] += 1
+        metrics.cache_lookups.inc(cache='category', result=self.RESULTS[stat])
+
+    def stats(self):
+        """Hit/miss counters for this process since start (or last reset)."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = sum(stats.values())
+        stats['lookups'] = lookups
+        stats['hit_ratio'] = (stats['lru_hits'] + stats['db_hits']) / lookups if lookups else 0.0
+        stats['lru_size'] = len(self.lru)
+        return stats
+
+    def reset_stats(self):
+        with self._stats_lock:
+            for stat in self._stats:
+                self._stats[stat] = 0
+
+    def get(self, reason, user_id=None):
+        """Return the cached category for a reason, or None on a miss."""
+        key = normalize_reason(reason)
+        if not key:
+            return None
+
+        lru_key = (user_id, key)
+        category = self.lru.get(lru_key)
+        if category is not None:
+            self._count('lru_hits')
+            return category
+
+        owners = Q(user__isnull=True)
+        if user_id is not None:
+            owners |= Q(user_id=user_id)
+        entries = list(
+            CategoryCacheEntry.objects.filter(owners, key=key)
+            .filter(Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now()))
+            .values('id', 'user_id', 'category')
+        )
+        if not entries:
+            self._count('misses')
+            return None
+
+        # A user's own override beats the shared entry
+        entry = max(entries, key=lambda e: e['user_id'] is not None)
+        CategoryCacheEntry.objects.filter(id=entry['id']).update(hits=F('hits') + 1)
+        self.lru.set(lru_key, entry['category'])
+        self._count('db_hits')
+        return entry['category']
+
+    def get_many(self, reasons, user_ids):
+        """
+        get() for many (reason, user_id) pairs: LRU misses are looked up in
+        one query and their hits counted in one more. Returns categories
+        aligned with `reasons`, None for misses.
+        """
+        results = [None] * len(reasons)
+        missing = {}
+        for index, (reason, user_id) in enumerate(zip(reasons, user_ids)):
+            key = normalize_reason(reason)
+            if not key:
+                continue
+            category = self.lru.get((user_id, key))
+            if category is not None:
+                self._count('lru_hits')
+                results[index] = category
+            else:
+                missing.setdefault((user_id, key), []).append(index)
+        if not missing:
+            return results
+
+        owners = {user_id for user_id, _ in missing if user_id is not None}
+        entries = (
+            CategoryCacheEntry.objects
+            .filter(Q(user__isnull=True) | Q(user_id__in=owners), key__in={key for _, key in missing})
+            .filter(Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now()))
+            .values('id', 'user_id', 'key', 'category')
+        )
+        by_owner = {(entry['user_id'], entry['key']): entry for entry in entries}
+        hit_ids = set()
+        for (user_id, key), indexes in missing.items():
+            # A user's own override beats the shared entry
+            entry = by_owner.get((user_id, key)) or by_owner.get((None, key))
+            for index in indexes:
+                self._count('db_hits' if entry else 'misses')
+            if entry:
+                hit_ids.add(entry['id'])
+                self.lru.set((user_id, key), entry['category'])
+                for index in indexes:
+                    results[index] = entry['category']
+        if hit_ids:
+            CategoryCacheEntry.objects.filter(id__in=hit_ids).update(hits=F('hits') + 1)
+        return results
+
+    def get_overrides(self, reasons, user_ids):
+        """
+        Only the users' own overrides for many (reason, user_id) pairs, in one
+        query. Returns categories aligned with `reasons`, None where unset.
+        """
+        keys = [normalize_reason(reason) for reason in reasons]
+        wanted = {(user_id, key) for user_id, key in zip(user_ids, keys) if key and user_id is not None}
+        if not wanted:
+            return [None] * len(reasons)
+        overrides = {
+            (user_id, key): category
+            for user_id, key, category in CategoryCacheEntry.objects.filter(
+                user_id__in={user_id for user_id, _ in wanted}, key__in={key for _, key in wanted},
+            ).values_list('user_id', 'key', 'category')
+        }
+        return [overrides.get((user_id, key)) for user_id, key in zip(user_ids, keys)]
+
+    def set(self, reason, category):
+        """Store a shared category for a reason (e.g. an LLM answer)."""
+        key = normalize_reason(reason)
+        if not key or not category:
+            return
+        expires_at = timezone.now() + timedelta(days=settings.CATEGORY_CACHE_TTL_DAYS)
+        self._upsert(key, None, category, expires_at)
+        self.lru.set((None, key), category)
+
+    def set_override(self, user_id, reason, category):
+        """
+        Record the category a user chose for a reason. Overrides never expire.
+        """
+        key = normalize_reason(reason)
+        if not key or not category:
+            return
+        if self.get(reason, user_id=user_id) == category:
+            return
+        self._upsert(key, user_id, category, None)
+        self.lru.set((user_id, key), category)
+
+    def _upsert(self, key, user_id, category, expires_at):
+        try:
+            CategoryCacheEntry.objects.update_or_create(
+                key=key,
+                user_id=user_id,
+                defaults={'category': category, 'expires_at': expires_at},
+            )
+        except IntegrityError:
+            # Another worker inserted the same key first; its answer is as good
+            logger.debug("[CATEGORY_CACHE] Concurrent insert for key: %s", key)
+
+    def prune(self):
+        """Delete expired shared entries. Returns the number removed."""
+        deleted, _ = CategoryCacheEntry.objects.filter(expires_at__lte=timezone.now()).delete()
+        self.lru.clear()
+        return deleted
+
+
+category_cache = CategoryCache()
@@ -0,0 +1,219 @@
+"""
+Answer cache for app how-to questions in AI chat.
+
+Questions are reduced to a set of normalized tokens (accents, punctuation
+and function words removed, plurals folded) and matched against active
+FAQEntry rows by Jaccard similarity. Token sets are only 2-4 words long, so
+a match also needs the same action and object words: "delete money" never
+gets the "add money" answer. Only questions that don't ask about the user's
+own data are eligible, so cached answers are safe to share.
+"""
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+from django.conf import settings
+from django.db.models import F
+from core.models import FAQEntry
+from core.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+STOP_WORDS = {
+    # English
+    'a', 'an', 'the', 'is', 'are', 'do', 'does', 'can', 'to', 'in', 'on', 'of',
+    'for', 'and', 'or', 'it', 'this', 'that', 'with', 'please', 'you', 'your',
+    'be', 'there', 'any', 'some', 'app', 'how', 'what', 'where', 'when', 'why',
+    'which', 'who', 'i', 'we', 'should', 'could', 'would', 'will', 'at', 'from',
+    'into', 'by', 'as', 'if',
+    # French
+    'le', 'la', 'les', 'un', 'une', 'des', 'du', 'de', 'd', 'l', 'est', 'et',
+    'ou', 'je', 'j', 'on', 'pour', 'dans', 'sur', 'ce', 'cette', 'qu', 'que', 'quoi',
+    'comment', 'vous', 'tu', 'il', 'peux', 'peut', 'application', 'quand',
+    'pourquoi', 'quel', 'quelle', 'nous', 'au', 'aux', 'en', 'faire',
+}
+
+# Action and object words (after plural folding). A cached answer is only
+# served when the question has exactly the same ones as the entry.
+INTENT_WORDS = {
+    # English
+    'add', 'record', 'enter', 'create', 'delete', 'remove', 'edit', 'change',
+    'update', 'rename', 'track', 'save', 'transfer', 'move', 'send', 'withdraw',
+    'deposit', 'export', 'download', 'reset', 'link', 'see', 'view',
+    'money', 'account', 'expense', 'income', 'saving', 'transaction', 'budget',
+    'category', 'categorie', 'password', 'notification', 'reminder', 'graph',
+    'chart', 'report', 'limit',
+    # French
+    'ajouter', 'enregistrer', 'creer', 'supprimer', 'effacer', 'modifier',
+    'changer', 'suivre', 'epargner', 'economiser', 'transferer', 'envoyer',
+    'retirer', 'exporter', 'voir', 'argent', 'compte', 'depense', 'revenu',
+    'epargne', 'mot', 'passe', 'rappel', 'graphique',
+}
+
+# Words that mean the question is about the user's own money
+PERSONAL_WORDS = {
+    'my', 'mine', 'me', 'am', 'spent', 'spend', 'spending', 'balance', 'much',
+    'biggest', 'largest', 'total', 'today', 'yesterday', 'week', 'month', 'year',
+    'afford', 'budget', 'left', 'owe', 'earned', 'income', 'expenses',
+    'did', 'bought', 'paid', 'received', 'sent', 'got', 'last', 'recent',
+    'mon', 'ma', 'mes', 'moi', 'solde', 'combien', 'depense', 'depenses',
+    'aujourd', 'hier', 'semaine', 'mois', 'reste', 'ai', 'achete', 'paye',
+    'recu', 'envoye', 'dernier', 'derniere',
+}
+# A first-person question is only general when it asks how to do something
+FIRST_PERSON_WORDS = {'i', 'we', 'je', 'j', 'nous'}
+HOW_TO_OPENERS = {'how', 'can', 'where', 'comment', 'ou', 'puis', 'peux', 'est'}
+
+
+def normalize_question(question):
+    """Return the sorted, space-joined token set for a question."""
+    if not question:
+        return ''
+    text = unicodedata.normalize('NFKD', question)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    tokens = set()
+    for tok in _NON_WORD.split(text):
+        if not tok or tok in STOP_WORDS:
+            continue
+        if len(tok) > 3 and tok.endswith('s'):
+            tok = tok[:-1]
+        tokens.add(tok)
+    return ' '.join(sorted(tokens))[:500]
+
+
+def needs_user_data(question):
+    """
+    True unless the question is clearly general: no personal words, and
+    first-person questions must open like a how-to ("How do I", "Can I").
+    """
+    text = unicodedata.normalize('NFKD', question or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    tokens = [tok for tok in _NON_WORD.split(text) if tok]
+    if any(tok in PERSONAL_WORDS for tok in tokens):
+        return True
+    return bool(FIRST_PERSON_WORDS.intersection(tokens)) and tokens[0] not in HOW_TO_OPENERS
+
+
+class FAQCache:
+    def __init__(self):
+        self._entries = None
+        self._index = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'learned': 0}
+
+    def invalidate(self):
+        """Reload entries from the database on next lookup."""
+        self._entries = None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['lookups'] = lookups
+        stats['hit_ratio'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+    def _count(self, stat):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def _load(self):
+        if self._entries is not None and time.monotonic() - self._loaded_at < settings.FAQ_CACHE_REFRESH:
+            return self._entries, self._index
+        entries = []
+        index = defaultdict(list)
+        for pk, normalized, answer in FAQEntry.objects.filter(status=1).values_list('id', 'normalized', 'answer'):
+            tokens = frozenset(normalized.split())
+            if not tokens:
+                continue
+            position = len(entries)
+            entries.append((pk, tokens, answer))
+            for tok in tokens:
+                index[tok].append(position)
+        with self._lock:
+            self._entries, self._index = entries, index
+            self._loaded_at = time.monotonic()
+        return entries, index
+
+    def lookup(self, question):
+        """Return a cached answer for a general question, or None."""
+        tokens = frozenset(normalize_question(question).split())
+        if not tokens:
+            return None
+        entries, index = self._load()
+
+        best, best_score = None, 0.0
+        intent = tokens & INTENT_WORDS
+        candidates = {position for tok in tokens for position in index.get(tok, ())}
+        for position in candidates:
+            pk, entry_tokens, answer = entries[position]
+            if entry_tokens & INTENT_WORDS != intent:
+                continue
+            score = len(tokens & entry_tokens) / len(tokens | entry_tokens)
+            if score > best_score:
+                best, best_score = entries[position], score
+
+        if best is None or best_score < settings.FAQ_SIMILARITY_THRESHOLD:
+            self._count('misses')
+            metrics.cache_lookups.inc(cache='faq', result='miss')
+            return None
+
+        self._count('hits')
+        metrics.cache_lookups.inc(cache='faq', result='hit')
+        FAQEntry.objects.filter(pk=best[0]).update(hits=F('hits') + 1)
+        logger.debug("[FAQ_CACHE] Hit (score %.2f) for: %s", best_score, question[:50])
+        return best[2]
+
+    def learn(self, question, answer):
+        """
+        Store a context-free answer so the next similar question is served
+        locally. An existing inactive entry means an admin blocked it.
+
+        The entry is added to this process's index in place (other processes
+        pick it up on their next refresh), and only the FAQ_LEARNED_MAX most
+        used learned entries are kept.
+        """
+        if not settings.FAQ_LEARN_ENABLED or not answer:
+            return
+        normalized = normalize_question(question)
+        if not normalized:
+            return
+        entry = FAQEntry.objects.filter(normalized=normalized).first()
+        if entry is None:
+            entry = FAQEntry.objects.create(
+                question=question[:500], normalized=normalized, answer=answer, source='learned'
+            )
+            stale = (
+                FAQEntry.objects.filter(source='learned', status=1)
+                .order_by('-hits', '-modified')
+                .values_list('pk', flat=True)[settings.FAQ_LEARNED_MAX:]
+            )
+            FAQEntry.objects.filter(pk__in=list(stale)).delete()
+        elif entry.source == 'learned' and entry.status == 1:
+            entry.answer = answer
+            entry.save(update_fields=['answer', 'modified'])
+        else:
+            return
+        self._count('learned')
+        self._add(entry.pk, frozenset(normalized.split()), answer)
+
+    def _add(self, pk, tokens, answer):
+        """Add or replace one entry in the loaded index."""
+        with self._lock:
+            if self._entries is None:
+                return
+            for position in self._index.get(next(iter(tokens)), ()):
+                if self._entries[position][0] == pk:
+                    self._entries[position] = (pk, tokens, answer)
+                    return
+            self._entries.append((pk, tokens, answer))
+            for tok in tokens:
+                self._index[tok].append(len(self._entries) - 1)
+
+
+faq_cache = FAQCache()
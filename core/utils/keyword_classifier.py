@@ -0,0 +1,136 @@
+"""
+Deterministic keyword classifier for transaction reasons.
+
+Active CategoryKeyword rows are compiled into an Aho-Corasick automaton, so
+one pass over a normalized reason finds every keyword and phrase it
+contains, however many keywords are configured. Each match adds
+weight x word count to its category; the classifier only answers when the
+best category clearly beats the runner-up, and returns None otherwise so
+the caller can fall back to the LLM.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from django.conf import settings
+from core.models import CategoryKeyword
+from core.utils.category_cache import normalize_reason
+
+logger = logging.getLogger(__name__)
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over whole-word keywords."""
+
+    def __init__(self, keywords):
+        # keywords: iterable of (pattern, category, score)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for pattern, category, score in keywords:
+            self._add(pattern, category, score)
+        self._build_failure_links()
+
+    def _add(self, pattern, category, score):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(pattern), category, score))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def scores(self, text):
+        """Return {category: score} for whole-word matches in normalized text."""
+        result = defaultdict(float)
+        state = 0
+        goto, fail, out = self._goto, self._fail, self._out
+        last = len(text) - 1
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+            # Only count matches that end on a word boundary...
+            if i != last and text[i + 1] != ' ':
+                continue
+            for length, category, score in out[state]:
+                # ...and start on one
+                start = i - length + 1
+                if start == 0 or text[start - 1] == ' ':
+                    result[category] += score
+        return result
+
+
+class KeywordClassifier:
+    def __init__(self):
+        self._automaton = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Force a rebuild from the database on next use."""
+        self._automaton = None
+
+    def _get_automaton(self):
+        automaton = self._automaton
+        if automaton is not None and time.monotonic() - self._loaded_at < settings.KEYWORD_CLASSIFIER_REFRESH:
+            return automaton
+        with self._lock:
+            if self._automaton is None or time.monotonic() - self._loaded_at >= settings.KEYWORD_CLASSIFIER_REFRESH:
+                self._automaton = self._build()
+                self._loaded_at = time.monotonic()
+            return self._automaton
+
+    def _build(self):
+        keywords = []
+        rows = CategoryKeyword.objects.filter(status=1).values_list(
+            'keyword', 'category', 'weight'
+        )
+        for keyword, category, weight in rows:
+            pattern = normalize_reason(keyword)
+            if pattern:
+                # Phrases are more specific than single words
+                keywords.append((pattern, category, float(weight) * len(pattern.split())))
+        logger.debug("[KEYWORD_CLASSIFIER] Compiled %s keywords", len(keywords))
+        return KeywordAutomaton(keywords)
+
+    def scores(self, reason):
+        text = normalize_reason(reason)
+        if not text:
+            return {}
+        return dict(self._get_automaton().scores(text))
+
+    def classify(self, reason):
+        """Return a category when the match is confident, else None."""
+        scores = self.scores(reason)
+        if not scores:
+            return None
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        best_category, best = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        if best < settings.KEYWORD_CLASSIFIER_MIN_SCORE:
+            return None
+        if runner_up and best < runner_up * settings.KEYWORD_CLASSIFIER_MARGIN:
+            return None
+        return best_category
+
+
+keyword_classifier = KeywordClassifier()
@@ -0,0 +1,337 @@
+"""
+Shared client for DeepSeek chat completions.
+
+Every LLM call in the app (categorization, insights, AI chat) goes through
+one LLMClient so they share connection pools, timeouts, retry policy and a
+circuit breaker. When the provider keeps failing the breaker opens and
+calls fail immediately with CircuitOpenError; callers already catch errors
+and fall back to their template answers, so users get those right away
+instead of waiting out timeouts.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from django.conf import settings
+from core.utils import metrics
+from core.utils.perf import timed
+
+# openai and httpx are imported on first use: the SDK takes most of a
+# second to import, which every worker and management command would
+# otherwise pay at startup.
+
+logger = logging.getLogger(__name__)
+
+
+def _retryable_errors():
+    """Errors that say the provider is struggling rather than the request being wrong"""
+    from openai import APIConnectionError, InternalServerError, RateLimitError
+    return (APIConnectionError, RateLimitError, InternalServerError)
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures. After `reset_timeout`
+    seconds one trial call is let through (half-open): success closes the
+    breaker, failure opens it again.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, threshold, reset_timeout):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def allow(self):
+        """
+        Raise CircuitOpenError unless a call may go out now. Returns True
+        when the call is the half-open trial.
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return False
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+        raise CircuitOpenError('LLM provider circuit is open')
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("[LLM] Circuit closed")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.threshold:
+                if self._state != self.OPEN:
+                    logger.warning(f"[LLM] Circuit opened after {self._failures} consecutive failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def release(self):
+        """Free the half-open trial slot when a call ends without a verdict."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def snapshot(self):
+        with self._lock:
+            state = self._current_state()
+            return {
+                'state': state,
+                'consecutive_failures': self._failures,
+                'retry_in': max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at)) if state == self.OPEN else 0.0,
+            }
+
+
+class LLMClient:
+    def __init__(self):
+        import httpx
+        self.timeout = httpx.Timeout(settings.LLM_READ_TIMEOUT, connect=settings.LLM_CONNECT_TIMEOUT)
+        self.limits = httpx.Limits(max_connections=settings.LLM_MAX_CONNECTIONS)
+        self.retryable_errors = _retryable_errors()
+        self.max_retries = settings.LLM_MAX_RETRIES
+        self.breaker = CircuitBreaker(settings.LLM_BREAKER_THRESHOLD, settings.LLM_BREAKER_RESET)
+        self._client = None
+        # httpx async pools are tied to the event loop that opened them
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=500)
+        self._counts = {'calls': 0, 'failures': 0, 'retries': 0, 'rejected': 0}
+
+    def _client_options(self):
+        # Retries are ours (with jitter and breaker accounting), not the SDK's
+        return {
+            'api_key': settings.DEEPSEEK_API_KEY,
+            'base_url': settings.DEEPSEEK_BASE_URL,
+            'timeout': self.timeout,
+            'max_retries': 0,
+        }
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import httpx
+                    from openai import OpenAI
+                    self._client = OpenAI(
+                        http_client=httpx.Client(timeout=self.timeout, limits=self.limits),
+                        **self._client_options(),
+                    )
+        return self._client
+
+    @property
+    def async_client(self):
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            import httpx
+            from openai import AsyncOpenAI
+            client = AsyncOpenAI(
+                http_client=httpx.AsyncClient(timeout=self.timeout, limits=self.limits),
+                **self._client_options(),
+            )
+            self._async_clients[loop] = client
+        return client
+
+    def _backoff(self, attempt):
+        """Full jitter: uniform between 0 and the exponential step."""
+        return random.uniform(0, min(settings.LLM_RETRY_BACKOFF * 2 ** attempt, 8.0))
+
+    def _count(self, stat):
+        with self._lock:
+            self._counts[stat] += 1
+
+    def _admit(self, operation):
+        try:
+            trial = self.breaker.allow()
+        except CircuitOpenError:
+            self._count('rejected')
+            metrics.llm_requests.inc(operation=operation, outcome='rejected')
+            raise
+        self._count('calls')
+        return trial
+
+    def _succeeded(self, operation, started):
+        self.breaker.record_success()
+        elapsed = time.monotonic() - started
+        with self._lock:
+            self._latencies.append(elapsed)
+        metrics.llm_requests.inc(operation=operation, outcome='success')
+        metrics.llm_request_duration.observe(elapsed, operation=operation)
+
+    def _failed(self, operation):
+        self.breaker.record_failure()
+        self._count('failures')
+        metrics.llm_requests.inc(operation=operation, outcome='error')
+
+    def _rejected(self, operation):
+        # The provider answered; the request itself was refused, so the breaker sees a healthy provider
+        self.breaker.record_success()
+        metrics.llm_requests.inc(operation=operation, outcome='error')
+
+    def _create(self, operation, request):
+        """chat.completions.create with retries; a final failure is recorded here."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                with timed('llm'):
+                    return self.client.chat.completions.create(**request)
+            except self.retryable_errors as e:
+                if attempt == self.max_retries:
+                    self._failed(operation)
+                    raise
+                self._count('retries')
+                logger.warning(f"[LLM] {type(e).__name__}, retrying (attempt {attempt + 1}/{self.max_retries})")
+                time.sleep(self._backoff(attempt))
+            except Exception:
+                self._rejected(operation)
+                raise
+
+    async def _acreate(self, operation, request):
+        """Async variant of _create()."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                with timed('llm'):
+                    return await self.async_client.chat.completions.create(**request)
+            except self.retryable_errors as e:
+                if attempt == self.max_retries:
+                    self._failed(operation)
+                    raise
+                self._count('retries')
+                logger.warning(f"[LLM] {type(e).__name__}, retrying (attempt {attempt + 1}/{self.max_retries})")
+                await asyncio.sleep(self._backoff(attempt))
+            except Exception:
+                self._rejected(operation)
+                raise
+
+    def complete(self, operation='other', **request):
+        """
+        chat.completions.create with retries, under the circuit breaker.
+        `operation` (categorize, insight, chat) labels the call in /metrics.
+        """
+        trial = self._admit(operation)
+        started = time.monotonic()
+        try:
+            response = self._create(operation, request)
+            self._succeeded(operation, started)
+            return response
+        finally:
+            if trial:
+                self.breaker.release()
+
+    async def acomplete(self, operation='other', **request):
+        """Async variant of complete()."""
+        trial = self._admit(operation)
+        started = time.monotonic()
+        try:
+            response = await self._acreate(operation, request)
+            self._succeeded(operation, started)
+            return response
+        finally:
+            # Also reached when the caller cancels (e.g. a batch deadline)
+            if trial:
+                self.breaker.release()
+
+    def stream(self, operation='other', **request):
+        """
+        Streaming completion. Opening the stream is retried like complete();
+        the outcome is recorded once, when the stream ends, so an error
+        between chunks counts as one failure and no success.
+        """
+        trial = self._admit(operation)
+        started = time.monotonic()
+        try:
+            chunks = self._create(operation, dict(request, stream=True))
+            try:
+                yield from chunks
+            except Exception:
+                self._failed(operation)
+                raise
+            self._succeeded(operation, started)
+        finally:
+            # Also reached when the consumer stops reading early
+            if trial:
+                self.breaker.release()
+
+    async def astream(self, operation='other', **request):
+        """Async variant of stream()."""
+        trial = self._admit(operation)
+        started = time.monotonic()
+        try:
+            chunks = await self._acreate(operation, dict(request, stream=True))
+            try:
+                async for chunk in chunks:
+                    yield chunk
+            except Exception:
+                self._failed(operation)
+                raise
+            self._succeeded(operation, started)
+        finally:
+            if trial:
+                self.breaker.release()
+
+    def stats(self):
+        """Breaker state, call counters and recent latency, for monitoring."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            counts = dict(self._counts)
+
+        def percentile(pct):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * pct / 100))], 3)
+
+        return {
+            'breaker': self.breaker.snapshot(),
+            **counts,
+            'latency': {
+                'samples': len(latencies),
+                'p50': percentile(50),
+                'p95': percentile(95),
+                'p99': percentile(99),
+            },
+        }
+
+
+_llm_client = None
+_llm_client_lock = threading.Lock()
+
+
+def get_llm_client():
+    """Return the process-wide LLM client, creating it on first use."""
+    global _llm_client
+    if _llm_client is None:
+        with _llm_client_lock:
+            if _llm_client is None:
+                _llm_client = LLMClient()
+    return _llm_client
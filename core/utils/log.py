@@ -0,0 +1,44 @@
+"""
+Logging helpers.
+
+QueueStreamHandler formats records in the calling thread but hands the
+write to a background thread, so a slow or blocked stderr never stalls a
+request. lazy() wraps a log argument that costs something to compute (a
+query, a stats snapshot) so it only runs when the record is emitted:
+
+    logger.debug("[X] Balance: %s", lazy(get_balance, account_id))
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+
+
+class lazy:
+    __slots__ = ('func', 'args', 'kwargs')
+
+    def __init__(self, func, *args, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    def __str__(self):
+        return str(self.func(*self.args, **self.kwargs))
+
+
+class QueueStreamHandler(logging.handlers.QueueHandler):
+    """Formats with its own formatter, writes to `stream` (stderr) off-thread."""
+
+    def __init__(self, stream=None):
+        super().__init__(queue.SimpleQueue())
+        target = logging.StreamHandler(stream)
+        target.setFormatter(logging.Formatter('%(message)s'))
+        self.listener = logging.handlers.QueueListener(self.queue, target)
+        self.listener.start()
+        atexit.register(self.listener.stop)
+
+    def close(self):
+        # dictConfig closes replaced handlers; flush what is queued first
+        if self.listener._thread is not None:
+            self.listener.stop()
+        super().close()
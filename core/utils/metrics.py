@@ -0,0 +1,331 @@
+"""
+In-process metrics in the Prometheus text format, served at /metrics.
+
+Counters and histograms live in plain dicts behind a per-metric lock, so
+recording is a dict update and safe from any thread. Each process counts
+for itself; with several gunicorn workers set METRICS_MULTIPROC_DIR to a
+directory shared by all of them (and by cron's management commands). Every
+process then writes its values there every METRICS_FLUSH_INTERVAL seconds
+and at exit, to a file named after its pid and start time, and a scrape
+sums the files of all processes, past and present. The files of processes
+that have exited are folded into metrics_archive.json on the next scrape,
+so the directory doesn't grow with every cron run. Clear the directory
+when the service starts.
+
+Ratios (cache hit ratio, LLM error rate) are left to the query side:
+
+    sum(rate(flowfunds_cache_lookups_total{result!="miss"}[5m]))
+      / sum(rate(flowfunds_cache_lookups_total[5m]))
+"""
+import atexit
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def collect(self):
+        """{label values: value} snapshot of this process."""
+        with self._lock:
+            return {key: self._copy(value) for key, value in self._values.items()}
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    @staticmethod
+    def merge(total, value):
+        return (total or 0) + value
+
+    def samples(self, key, value):
+        yield self.name, key, (), value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # per-bucket counts (last one is +Inf), sum, count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @staticmethod
+    def _copy(value):
+        return [list(value[0]), value[1], value[2]]
+
+    @staticmethod
+    def merge(total, value):
+        if total is None:
+            return [list(value[0]), value[1], value[2]]
+        return [[a + b for a, b in zip(total[0], value[0])], total[1] + value[1], total[2] + value[2]]
+
+    def samples(self, key, value):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), value[0]):
+            cumulative += count
+            yield f'{self.name}_bucket', key, (('le', _format_bound(bound)),), cumulative
+        yield f'{self.name}_sum', key, (), value[1]
+        yield f'{self.name}_count', key, (), value[2]
+
+
+def _format_bound(bound):
+    return bound if isinstance(bound, str) else repr(float(bound))
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Registry:
+    # Values of exited processes, folded together by aggregate()
+    ARCHIVE = 'metrics_archive.json'
+
+    def __init__(self):
+        self.metrics = {}
+        self._flusher = None
+        self._flush_lock = threading.Lock()
+        self._pid = None
+        self._filename = None
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+
+    def collect(self):
+        """{metric name: {label values: value}} for this process."""
+        return {name: metric.collect() for name, metric in self.metrics.items()}
+
+    # Multi-process mode
+
+    @property
+    def multiproc_dir(self):
+        return settings.METRICS_MULTIPROC_DIR
+
+    @property
+    def filename(self):
+        """metrics_<pid>_<start ms>.json, unique even when a pid is reused."""
+        if self._pid != os.getpid():
+            # Also renamed in a forked child, so it never overwrites its parent's file
+            self._pid = os.getpid()
+            self._filename = f'metrics_{self._pid}_{time.time_ns() // 1_000_000}.json'
+        return self._filename
+
+    def flush(self):
+        """Write this process's values to its file in METRICS_MULTIPROC_DIR."""
+        values = {
+            name: [[list(key), value] for key, value in samples.items()]
+            for name, samples in self.collect().items() if samples
+        }
+        if not values:
+            return
+        path = os.path.join(self.multiproc_dir, self.filename)
+        with self._flush_lock:
+            try:
+                self._write(path, values)
+            except OSError as e:
+                logger.warning(f"[METRICS] Could not write {path}: {e}")
+
+    @staticmethod
+    def _write(path, data):
+        with open(f'{path}.tmp', 'w') as out:
+            json.dump(data, out)
+        os.replace(f'{path}.tmp', path)
+
+    def start_flusher(self):
+        """Flush periodically from a daemon thread, and once more at exit."""
+        if not self.multiproc_dir or self._flusher is not None:
+            return
+        os.makedirs(self.multiproc_dir, exist_ok=True)
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(settings.METRICS_FLUSH_INTERVAL):
+                self.flush()
+
+        self._flusher = threading.Thread(target=run, name='metrics-flush', daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+        atexit.register(stop.set)
+
+    def aggregate(self):
+        """Sum the values written by every process into one collect()-shaped dict."""
+        self.flush()
+        # One scrape at a time, so an archive rewrite never races another scrape's read
+        with open(os.path.join(self.multiproc_dir, 'metrics.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            archive = self._archive()
+            totals = {name: {} for name in self.metrics}
+            self._merge(totals, archive['values'])
+            for filename in self._process_files():
+                if filename not in archive['merged']:
+                    self._merge(totals, self._read(filename))
+            return totals
+
+    def _archive(self):
+        """
+        Fold the files of exited processes into the archive and return it.
+        The archive lists the files it holds, so a file whose delete was
+        interrupted is skipped rather than counted twice.
+        """
+        path = os.path.join(self.multiproc_dir, self.ARCHIVE)
+        try:
+            with open(path) as source:
+                archive = json.load(source)
+        except FileNotFoundError:
+            archive = {'merged': [], 'values': {}}
+        except (OSError, ValueError) as e:
+            logger.warning(f"[METRICS] Skipping unreadable {self.ARCHIVE}: {e}")
+            return {'merged': [], 'values': {}}
+
+        present = self._process_files()
+        dead = [name for name in present if name not in archive['merged'] and not self._alive(name)]
+        if not dead:
+            return archive
+        totals = self._merge({}, archive['values'])
+        for filename in dead:
+            self._merge(totals, self._read(filename))
+        archive = {
+            'merged': [name for name in archive['merged'] if name in present] + dead,
+            'values': {name: [[list(key), value] for key, value in samples.items()]
+                       for name, samples in totals.items()},
+        }
+        try:
+            self._write(path, archive)
+        except OSError as e:
+            logger.warning(f"[METRICS] Could not write {path}: {e}")
+            return archive
+        for filename in dead:
+            try:
+                os.remove(os.path.join(self.multiproc_dir, filename))
+            except OSError:
+                pass
+        return archive
+
+    def _process_files(self):
+        return sorted(
+            filename for filename in os.listdir(self.multiproc_dir)
+            if filename.startswith('metrics_') and filename.endswith('.json') and filename != self.ARCHIVE
+        )
+
+    @staticmethod
+    def _alive(filename):
+        try:
+            pid = int(filename.split('_')[1].removesuffix('.json'))
+        except ValueError:
+            return True
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        # A reused pid only delays archiving; the file names differ, so nothing is overwritten
+        return True
+
+    def _read(self, filename):
+        try:
+            with open(os.path.join(self.multiproc_dir, filename)) as source:
+                return json.load(source)
+        except (OSError, ValueError) as e:
+            logger.warning(f"[METRICS] Skipping unreadable {filename}: {e}")
+            return {}
+
+    def _merge(self, totals, values):
+        for name, samples in values.items():
+            metric = self.metrics.get(name)
+            if metric is None:
+                continue
+            merged = totals.setdefault(name, {})
+            for key, value in samples:
+                key = tuple(key)
+                merged[key] = metric.merge(merged.get(key), value)
+        return totals
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        values = self.aggregate() if self.multiproc_dir else self.collect()
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            for key, value in sorted(values.get(name, {}).items()):
+                for sample, label_values, extra, number in metric.samples(key, value):
+                    labels = [f'{label}="{_escape(v)}"' for label, v in zip(metric.labelnames, label_values)]
+                    labels += [f'{label}="{v}"' for label, v in extra]
+                    label_text = '{' + ','.join(labels) + '}' if labels else ''
+                    lines.append(f'{sample}{label_text} {number}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+http_requests = Counter(
+    'flowfunds_http_requests_total', 'HTTP requests by route and status.', ('method', 'route', 'status'),
+)
+http_request_duration = Histogram(
+    'flowfunds_http_request_duration_seconds', 'HTTP request latency by route.', ('method', 'route'),
+)
+http_request_queries = Histogram(
+    'flowfunds_http_request_db_queries', 'Database queries issued per HTTP request.', ('method', 'route'),
+    buckets=QUERY_BUCKETS,
+)
+llm_requests = Counter(
+    'flowfunds_llm_requests_total',
+    'LLM calls by operation and outcome (success, error, rejected by the open circuit).',
+    ('operation', 'outcome'),
+)
+llm_request_duration = Histogram(
+    'flowfunds_llm_request_duration_seconds', 'Latency of successful LLM calls, retries included.', ('operation',),
+)
+push_sent = Counter(
+    'flowfunds_push_sent_total', 'Push deliveries by result (success, gone, failed).', ('result',),
+)
+cache_lookups = Counter(
+    'flowfunds_cache_lookups_total', 'Cache lookups by cache and result.', ('cache', 'result'),
+)
@@ -0,0 +1,138 @@
+"""
+Per-request (or per-command) performance counters.
+
+A Metrics object is bound to the current context while a request or a
+measured command runs. Code on the hot paths records into it through
+timed() and the database execute wrapper; with nothing bound both reduce
+to one ContextVar lookup, so unmeasured work pays next to nothing.
+
+Categories: db (every SQL statement), llm (LLMClient calls), push (push
+delivery) and serialize (response rendering).
+"""
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('perf_metrics', default=None)
+
+CATEGORIES = ('db', 'llm', 'push', 'serialize')
+
+
+class Metrics:
+    __slots__ = ('started', 'seconds', 'counts')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.seconds = dict.fromkeys(CATEGORIES, 0.0)
+        self.counts = dict.fromkeys(CATEGORIES, 0)
+
+    def add(self, category, seconds, count=1):
+        self.seconds[category] += seconds
+        self.counts[category] += count
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self, total):
+        """Value for the Server-Timing response header (durations in ms)."""
+        parts = [
+            f'{category};dur={self.seconds[category] * 1000:.1f};desc="{self.counts[category]}"'
+            for category in CATEGORIES if self.counts[category]
+        ]
+        parts.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(parts)
+
+
+def current():
+    return _current.get()
+
+
+def bind(metrics):
+    """Bind `metrics` to the current context; returns a token for unbind()."""
+    return _current.set(metrics)
+
+
+def unbind(token):
+    _current.reset(token)
+
+
+@contextmanager
+def timed(category, count=1):
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add(category, time.perf_counter() - start, count)
+
+
+@contextmanager
+def measure(label):
+    """Measure a block outside the request cycle (e.g. a management command) and report it."""
+    if not settings.PERF_INSTRUMENTATION_ENABLED:
+        yield None
+        return
+    metrics = Metrics()
+    token = bind(metrics)
+    try:
+        yield metrics
+    finally:
+        unbind(token)
+        report(label, metrics, metrics.elapsed)
+
+
+def report(label, metrics, total, status=None):
+    """Write one structured line; slow or query-heavy work is logged as a warning."""
+    fields = {
+        'endpoint': label,
+        'status': status,
+        'total_ms': round(total * 1000, 1),
+        'queries': metrics.counts['db'],
+        'db_ms': round(metrics.seconds['db'] * 1000, 1),
+        'llm_calls': metrics.counts['llm'],
+        'llm_ms': round(metrics.seconds['llm'] * 1000, 1),
+        'push_sent': metrics.counts['push'],
+        'push_ms': round(metrics.seconds['push'] * 1000, 1),
+        'serialize_ms': round(metrics.seconds['serialize'] * 1000, 1),
+    }
+    flags = []
+    if total * 1000 > settings.PERF_SLOW_REQUEST_MS:
+        flags.append('slow')
+    if metrics.counts['db'] > settings.PERF_QUERY_BUDGET:
+        flags.append('over_query_budget')
+    if flags:
+        fields['flags'] = flags
+        logger.warning("[PERF] %s", json.dumps(fields))
+    else:
+        logger.info("[PERF] %s", json.dumps(fields))
+
+
+def _db_timer(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add('db', time.perf_counter() - start)
+
+
+def _install_db_timer(sender, connection, **kwargs):
+    if _db_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_db_timer)
+
+
+def install():
+    """Time SQL on every database connection opened from now on."""
+    connection_created.connect(_install_db_timer, dispatch_uid='core.perf.db_timer')
@@ -0,0 +1,122 @@
+"""
+On-demand profiling of single requests.
+
+A ProfileSession holds a cProfile.Profile for the view and the SQL the
+request ran. While a session is bound to the current context every query
+is recorded with its duration and the app frames that issued it, so an
+N+1 shows up as the same line repeated. Unprofiled requests pay one
+ContextVar lookup per query.
+"""
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import time
+import traceback
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+_session = ContextVar('profile_session', default=None)
+
+_APP_DIRS = tuple(os.path.join(str(settings.BASE_DIR), name) + os.sep for name in ('core', 'utils'))
+# Instrumentation frames that sit between every query and the code that ran it
+_SKIPPED_FILES = {
+    os.path.join(str(settings.BASE_DIR), 'core', 'middleware.py'),
+    os.path.join(str(settings.BASE_DIR), 'core', 'utils', 'perf.py'),
+    os.path.join(str(settings.BASE_DIR), 'core', 'utils', 'profiler.py'),
+}
+
+
+class ProfileSession:
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.profiled = False
+        self.queries = []
+        self.query_count = 0
+        self.started = time.perf_counter()
+        self.duration = None
+
+    @contextmanager
+    def profiling(self):
+        """Run the block under cProfile (this thread only)."""
+        self.profiled = True
+        self.profiler.enable()
+        try:
+            yield
+        finally:
+            self.profiler.disable()
+
+    @contextmanager
+    def bound(self):
+        """Record SQL from this context (and threads it hands work to)."""
+        token = _session.set(self)
+        try:
+            yield self
+        finally:
+            _session.reset(token)
+            self.duration = time.perf_counter() - self.started
+
+    def record_query(self, sql, params, many, seconds):
+        self.query_count += 1
+        if len(self.queries) >= settings.PROFILER_MAX_QUERIES:
+            return
+        stack = [
+            f"{frame.filename.removeprefix(str(settings.BASE_DIR) + os.sep)}:{frame.lineno} in {frame.name}"
+            for frame in traceback.extract_stack()
+            if frame.filename.startswith(_APP_DIRS) and frame.filename not in _SKIPPED_FILES
+        ]
+        self.queries.append({
+            'sql': sql,
+            'params': repr(params)[:500],
+            'many': many,
+            'ms': round(seconds * 1000, 2),
+            'stack': stack[-5:],
+        })
+
+    @contextmanager
+    def recording(self, connection):
+        """Record the SQL run on `connection` in this block, with or without install()."""
+        def record(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                self.record_query(sql, params, many, time.perf_counter() - start)
+
+        with connection.execute_wrapper(record):
+            yield self
+
+    def dump(self):
+        """pstats file contents (open with snakeviz, or pstats.Stats(path))."""
+        self.profiler.create_stats()
+        return marshal.dumps(self.profiler.stats)
+
+    def summary(self, limit=40):
+        """Top functions by cumulative time, as pstats prints them."""
+        out = io.StringIO()
+        pstats.Stats(self.profiler, stream=out).strip_dirs().sort_stats('cumulative').print_stats(limit)
+        return out.getvalue()
+
+
+def _sql_recorder(execute, sql, params, many, context):
+    session = _session.get()
+    if session is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        session.record_query(sql, params, many, time.perf_counter() - start)
+
+
+def _install_sql_recorder(sender, connection, **kwargs):
+    if _sql_recorder not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_sql_recorder)
+
+
+def install():
+    """Record SQL for profiled requests on every connection opened from now on."""
+    connection_created.connect(_install_sql_recorder, dispatch_uid='core.profiler.sql_recorder')
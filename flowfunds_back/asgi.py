@@ -3,6 +3,13 @@ ASGI config for flowfunds_back project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Production runs it under gunicorn with uvicorn workers (see docker-compose.yml):
+
+    gunicorn flowfunds_back.asgi:application -k uvicorn_worker.UvicornWorker
+
+Async views such as the AI chat then wait on the LLM as coroutines; sync
+views run in Django's thread pool as before.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
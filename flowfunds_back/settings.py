@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 
 from pathlib import Path
 import os
+import shlex
 from decouple import config, Csv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -38,6 +39,98 @@ CORS_ALLOWED_ORIGINS = [
 
 # DeepSeek AI Configuration
 DEEPSEEK_API_KEY = config('DEEPSEEK_API_KEY', default='')
+DEEPSEEK_BASE_URL = config('DEEPSEEK_BASE_URL', default='https://api.deepseek.com')
+
+# Shared LLM client (core/utils/llm_client.py)
+LLM_CONNECT_TIMEOUT = config('LLM_CONNECT_TIMEOUT', default=5.0, cast=float)  # seconds
+LLM_READ_TIMEOUT = config('LLM_READ_TIMEOUT', default=30.0, cast=float)  # seconds
+LLM_MAX_CONNECTIONS = config('LLM_MAX_CONNECTIONS', default=20, cast=int)  # per process
+LLM_MAX_RETRIES = config('LLM_MAX_RETRIES', default=2, cast=int)
+LLM_RETRY_BACKOFF = config('LLM_RETRY_BACKOFF', default=0.5, cast=float)  # seconds, doubled per retry, full jitter
+LLM_BREAKER_THRESHOLD = config('LLM_BREAKER_THRESHOLD', default=5, cast=int)  # consecutive failures to open
+LLM_BREAKER_RESET = config('LLM_BREAKER_RESET', default=30, cast=int)  # seconds open before a trial call
+
+# Cache: shared Redis when configured, per-process memory otherwise.
+# REDIS_URL is required once more than one worker process serves requests:
+# the AI context and analytics caches are invalidated on writes, and locmem
+# only drops the entry in the process that made the write, so the other
+# workers keep answering from stale data until the TTL runs out.
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# AI chat context
+AI_CONTEXT_CACHE_TTL = config('AI_CONTEXT_CACHE_TTL', default=300, cast=int)  # seconds
+AI_CONTEXT_TRANSACTION_LIMIT = config('AI_CONTEXT_TRANSACTION_LIMIT', default=20, cast=int)
+AI_PROMPT_TOKEN_BUDGET = config('AI_PROMPT_TOKEN_BUDGET', default=2500, cast=int)  # estimated input tokens per chat call
+
+# Per-request performance instrumentation (Server-Timing header + [PERF] log line)
+PERF_INSTRUMENTATION_ENABLED = config('PERF_INSTRUMENTATION_ENABLED', default=True, cast=bool)
+PERF_SLOW_REQUEST_MS = config('PERF_SLOW_REQUEST_MS', default=500, cast=int)
+PERF_QUERY_BUDGET = config('PERF_QUERY_BUDGET', default=20, cast=int)  # queries per request
+
+# On-demand request profiling for staff (X-Profile: 1 header or ?_profile=1)
+PROFILER_ENABLED = config('PROFILER_ENABLED', default=True, cast=bool)
+PROFILER_MAX_QUERIES = config('PROFILER_MAX_QUERIES', default=2000, cast=int)  # SQL statements kept per profile
+PROFILER_KEEP = config('PROFILER_KEEP', default=100, cast=int)  # most recent profiles kept
+
+# Prometheus metrics at /metrics
+METRICS_TOKEN = config('METRICS_TOKEN', default='')  # Bearer token for scrapers; empty serves /metrics only in DEBUG
+METRICS_MULTIPROC_DIR = config('METRICS_MULTIPROC_DIR', default='')  # shared dir to sum all workers; empty = per process
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5, cast=int)  # seconds between writes to the shared dir
+
+# Transaction history pagination
+TRANSACTION_PAGE_SIZE = config('TRANSACTION_PAGE_SIZE', default=50, cast=int)
+TRANSACTION_MAX_PAGE_SIZE = config('TRANSACTION_MAX_PAGE_SIZE', default=200, cast=int)
+
+# Income/expense time series at /api/analytics/timeseries/
+ANALYTICS_MAX_BUCKETS = config('ANALYTICS_MAX_BUCKETS', default=400, cast=int)  # per response
+ANALYTICS_CACHE_TTL = config('ANALYTICS_CACHE_TTL', default=86400, cast=int)  # seconds, ranges that ended before today
+
+# Background transaction categorization
+CATEGORIZATION_WORKER_ENABLED = config('CATEGORIZATION_WORKER_ENABLED', default=True, cast=bool)
+CATEGORIZATION_BATCH_SIZE = config('CATEGORIZATION_BATCH_SIZE', default=50, cast=int)
+CATEGORIZATION_POLL_INTERVAL = config('CATEGORIZATION_POLL_INTERVAL', default=30, cast=int)  # seconds
+CATEGORIZATION_CLAIM_TIMEOUT = config('CATEGORIZATION_CLAIM_TIMEOUT', default=300, cast=int)  # seconds a claimed batch is skipped by other workers
+CATEGORIZATION_LLM_BATCH_SIZE = config('CATEGORIZATION_LLM_BATCH_SIZE', default=25, cast=int)  # reasons per completion
+CATEGORIZATION_LLM_CONCURRENCY = config('CATEGORIZATION_LLM_CONCURRENCY', default=4, cast=int)
+
+# Category memo cache (in-process LRU in front of the CategoryCacheEntry table)
+CATEGORY_CACHE_LRU_SIZE = config('CATEGORY_CACHE_LRU_SIZE', default=10000, cast=int)
+CATEGORY_CACHE_LRU_TTL = config('CATEGORY_CACHE_LRU_TTL', default=600, cast=int)  # seconds
+CATEGORY_CACHE_TTL_DAYS = config('CATEGORY_CACHE_TTL_DAYS', default=30, cast=int)
+
+# Push notifications
+PUSH_DISPATCH_WORKERS = config('PUSH_DISPATCH_WORKERS', default=8, cast=int)  # 1 = sequential
+PUSH_TIMEOUT = config('PUSH_TIMEOUT', default=10, cast=int)  # seconds
+
+# Daily insight generation (evening summary)
+INSIGHT_CONCURRENCY = config('INSIGHT_CONCURRENCY', default=10, cast=int)  # calls in flight
+INSIGHT_RATE_LIMIT = config('INSIGHT_RATE_LIMIT', default=5.0, cast=float)  # call starts per second, 0 = unlimited
+INSIGHT_CALL_TIMEOUT = config('INSIGHT_CALL_TIMEOUT', default=15, cast=int)  # seconds
+INSIGHT_BATCH_TIMEOUT = config('INSIGHT_BATCH_TIMEOUT', default=900, cast=int)  # seconds for the whole run
+
+# Local keyword classifier consulted before the LLM
+KEYWORD_CLASSIFIER_MIN_SCORE = config('KEYWORD_CLASSIFIER_MIN_SCORE', default=1.0, cast=float)
+KEYWORD_CLASSIFIER_MARGIN = config('KEYWORD_CLASSIFIER_MARGIN', default=2.0, cast=float)  # best / runner-up
+KEYWORD_CLASSIFIER_REFRESH = config('KEYWORD_CLASSIFIER_REFRESH', default=300, cast=int)  # seconds
+
+# Answer cache for general (non-personal) AI chat questions
+FAQ_SIMILARITY_THRESHOLD = config('FAQ_SIMILARITY_THRESHOLD', default=0.65, cast=float)  # Jaccard over question tokens
+FAQ_CACHE_REFRESH = config('FAQ_CACHE_REFRESH', default=300, cast=int)  # seconds
+FAQ_LEARN_ENABLED = config('FAQ_LEARN_ENABLED', default=True, cast=bool)
+FAQ_LEARNED_MAX = config('FAQ_LEARNED_MAX', default=500, cast=int)  # active learned entries kept, most used first
 
 
 
@@ -61,8 +154,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.StaticFilesMiddleware',  # WhiteNoise, without a sync hop for every ASGI request
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -70,6 +164,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'flowfunds_back.urls'
@@ -162,6 +257,10 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.api.renderers.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
@@ -220,6 +319,9 @@ JAZZMIN_SETTINGS = {
     "show_ui_builder": False,
 }
 
+# Level for the app's own loggers; DEBUG lines are formatted only when enabled
+LOG_LEVEL = config('LOG_LEVEL', default='DEBUG' if DEBUG else 'INFO')
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -236,7 +338,8 @@ LOGGING = {
     'handlers': {
         'console': {
             'level': 'DEBUG',
-            'class': 'logging.StreamHandler',
+            # Writes to stderr from a background thread
+            'class': 'core.utils.log.QueueStreamHandler',
             'formatter': 'verbose',
         },
     },
@@ -245,10 +348,9 @@ LOGGING = {
         'level': 'INFO',
     },
     'loggers': {
+        # Propagates to the root handler (a handler here too logged every line twice)
         'core': {
-            'handlers': ['console'],
-            'level': 'DEBUG',
-            'propagate': True,
+            'level': LOG_LEVEL,
         },
     },
 }
@@ -256,5 +358,11 @@ LOGGING = {
 CRONJOBS = [
     ('0 8 * * *', 'django.core.management.call_command', ['send_reminders', '--type=morning']),
     ('0 20 * * *', 'django.core.management.call_command', ['send_reminders', '--type=evening']),
+    ('*/10 * * * *', 'django.core.management.call_command', ['categorize_pending']),
+    ('30 3 * * *', 'django.core.management.call_command', ['prune_category_cache']),
+    # Retries the day's "Other" rows (failed LLM calls aren't cached); the hour of overlap covers cron jitter
+    ('0 3 * * *', 'django.core.management.call_command', ['recategorize_transactions', '--category=Other', '--since-hours=25']),
     # ('* * * * *', 'django.core.management.call_command', ['send_reminders', '--type=test']),  # Disabled - was causing timeouts
 ]
+# cron starts jobs with an empty environment; without this their metrics never reach the shared dir
+CRONTAB_COMMAND_PREFIX = f'METRICS_MULTIPROC_DIR={shlex.quote(METRICS_MULTIPROC_DIR)}' if METRICS_MULTIPROC_DIR else ''
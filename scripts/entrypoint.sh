@@ -20,6 +20,12 @@ echo "🕒 Starting Cron Service..."
 service cron start
 python manage.py crontab add
 
+if [ -n "$METRICS_MULTIPROC_DIR" ]; then
+    echo "📈 Resetting multi-process metrics in $METRICS_MULTIPROC_DIR..."
+    mkdir -p "$METRICS_MULTIPROC_DIR"
+    rm -f "$METRICS_MULTIPROC_DIR"/metrics_*.json
+fi
+
 # 🚀 Execute the container command (gunicorn, celery, etc.)
 echo "🚀 Starting: $@"
 exec "$@"
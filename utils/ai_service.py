@@ -3,27 +3,35 @@ FlowFunds AI Service
 Handles all AI-related operations using DeepSeek API
 """
 import logging
-from datetime import datetime, timedelta
+from datetime import timedelta
 from decimal import Decimal
-from typing import Dict, List, Any
+from typing import Dict, Any, AsyncIterator, Iterator
 from django.conf import settings
-from openai import OpenAI
+from core.utils.llm_client import get_llm_client
+from utils.prompt_builder import PromptBuilder
 
 logger = logging.getLogger(__name__)
 
 
+class AIServiceError(Exception):
+    """The LLM call failed; show the user FlowFundsAI.ERROR_MESSAGE instead."""
+
+
+class AIStreamError(AIServiceError):
+    """A streamed answer failed part-way; the deltas already sent are incomplete."""
+
+
 class FlowFundsAI:
     """
     AI Service for FlowFunds financial assistant
     Uses DeepSeek API for natural language understanding and responses
     """
+    ERROR_MESSAGE = "I'm sorry, I encountered an error processing your question. Please try again."
     
     def __init__(self):
-        self.client = OpenAI(
-            api_key=settings.DEEPSEEK_API_KEY,
-            base_url="https://api.deepseek.com"
-        )
+        self.llm = get_llm_client()
         self.model = "deepseek-chat"
+        self.prompt_builder = PromptBuilder(self._build_system_prompt(), settings.AI_PROMPT_TOKEN_BUDGET)
     
     def chat(self, user_question: str, user_context: Dict[str, Any]) -> str:
         """
@@ -31,27 +39,29 @@ class FlowFundsAI:
         
         Args:
             user_question: The user's natural language question
-            user_context: Dictionary containing user's financial data
+            user_context: Dictionary containing user's financial data,
+                or None for general questions about the app
         
         Returns:
             AI-generated response string
+        
+        Raises:
+            AIServiceError: if the call fails
         """
         try:
-            system_prompt = self._build_system_prompt()
-            user_prompt = self._build_user_prompt(user_question, user_context)
+            prompt = self._build_prompt(user_question, user_context)
             
             logger.info(f"[AI_CHAT] Processing question: {user_question[:50]}...")
             
-            response = self.client.chat.completions.create(
+            response = self.llm.complete(
+                'chat',
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+                messages=prompt.messages,
                 temperature=0.3,  # Lower temperature for more consistent financial advice
                 max_tokens=500
             )
             
+            self._log_usage(response.usage)
             answer = response.choices[0].message.content
             logger.info(f"[AI_CHAT] Generated response: {answer[:50]}...")
             
@@ -59,7 +69,130 @@ class FlowFundsAI:
             
         except Exception as e:
             logger.error(f"[AI_CHAT] Error: {str(e)}", exc_info=True)
-            return "I'm sorry, I encountered an error processing your question. Please try again."
+            raise AIServiceError(str(e)) from e
+    
+    def chat_stream(self, user_question: str, user_context: Dict[str, Any]) -> Iterator[str]:
+        """
+        Same as chat(), but yields the answer in chunks as the model produces them
+        
+        Args:
+            user_question: The user's natural language question
+            user_context: Dictionary containing user's financial data,
+                or None for general questions about the app
+        
+        Yields:
+            Pieces of the AI-generated response
+        
+        Raises:
+            AIStreamError: if the call fails, possibly after some pieces
+        """
+        try:
+            prompt = self._build_prompt(user_question, user_context)
+            
+            logger.info(f"[AI_CHAT] Streaming question: {user_question[:50]}...")
+            
+            stream = self.llm.stream(
+                'chat',
+                model=self.model,
+                messages=prompt.messages,
+                temperature=0.3,
+                max_tokens=500,
+                stream_options={"include_usage": True}
+            )
+            
+            for chunk in stream:
+                if chunk.usage:
+                    self._log_usage(chunk.usage)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+            
+        except Exception as e:
+            logger.error(f"[AI_CHAT] Streaming error: {str(e)}", exc_info=True)
+            raise AIStreamError(str(e)) from e
+    
+    async def achat(self, user_question: str, user_context: Dict[str, Any]) -> str:
+        """
+        Async variant of chat() for async views. Waiting on the API holds a
+        coroutine instead of a worker.
+        """
+        try:
+            prompt = self._build_prompt(user_question, user_context)
+            
+            logger.info(f"[AI_CHAT] Processing question: {user_question[:50]}...")
+            
+            response = await self.llm.acomplete(
+                'chat',
+                model=self.model,
+                messages=prompt.messages,
+                temperature=0.3,
+                max_tokens=500
+            )
+            
+            self._log_usage(response.usage)
+            answer = response.choices[0].message.content
+            logger.info(f"[AI_CHAT] Generated response: {answer[:50]}...")
+            
+            return answer
+            
+        except Exception as e:
+            logger.error(f"[AI_CHAT] Error: {str(e)}", exc_info=True)
+            raise AIServiceError(str(e)) from e
+    
+    async def achat_stream(self, user_question: str, user_context: Dict[str, Any]) -> AsyncIterator[str]:
+        """Async variant of chat_stream()"""
+        try:
+            prompt = self._build_prompt(user_question, user_context)
+            
+            logger.info(f"[AI_CHAT] Streaming question: {user_question[:50]}...")
+            
+            stream = self.llm.astream(
+                'chat',
+                model=self.model,
+                messages=prompt.messages,
+                temperature=0.3,
+                max_tokens=500,
+                stream_options={"include_usage": True}
+            )
+            
+            async for chunk in stream:
+                if chunk.usage:
+                    self._log_usage(chunk.usage)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+            
+        except Exception as e:
+            logger.error(f"[AI_CHAT] Streaming error: {str(e)}", exc_info=True)
+            raise AIStreamError(str(e)) from e
+    
+    def _build_prompt(self, user_question: str, user_context: Dict[str, Any]):
+        """Assemble messages within the token budget and log their size"""
+        prompt = self.prompt_builder.build(user_question, user_context)
+        logger.info(
+            f"[AI_CHAT] Prompt tokens (estimated): system={prompt.system_tokens}, "
+            f"context={prompt.context_tokens}, question={prompt.question_tokens}, "
+            f"total={prompt.total_tokens}/{self.prompt_builder.budget}"
+            + (f", omitted={prompt.omitted}" if prompt.omitted else "")
+        )
+        return prompt
+    
+    def _log_usage(self, usage) -> None:
+        """Log token usage reported by the API, including prefix cache hits"""
+        if usage is None:
+            return
+        # DeepSeek reports prompt_cache_hit_tokens; OpenAI-style APIs use prompt_tokens_details
+        cached = getattr(usage, 'prompt_cache_hit_tokens', None)
+        if cached is None and getattr(usage, 'prompt_tokens_details', None) is not None:
+            cached = usage.prompt_tokens_details.cached_tokens
+        logger.info(
+            f"[AI_CHAT] Token usage: prompt={usage.prompt_tokens} (cached={cached or 0}), "
+            f"completion={usage.completion_tokens}"
+        )
     
     def _build_system_prompt(self) -> str:
         """Build the system prompt that defines AI behavior"""
@@ -98,6 +231,7 @@ Response style:
 - Be positive and encouraging
 - Give ONE actionable tip when relevant
 - Never make up data - only use what's provided
+- When the user's financial data is provided, answer from it and use the actual numbers
 
 Example responses:
 Q: "What is this app about?"
@@ -110,113 +244,6 @@ Q: "How do I track expenses?"
 A: "Same as income but choose 'Expense' instead. Enter the amount, what you spent on (like 'Transport' or 'Food'), and which account you paid from. FlowFunds will track it all for you."
 
 Remember: Short, friendly, conversational. Help users understand both their finances AND how to use the app."""
-    
-    def _build_user_prompt(self, question: str, context: Dict[str, Any]) -> str:
-        """Build the user prompt with question and financial context"""
-        
-        # Extract context data
-        accounts = context.get('accounts', [])
-        transactions = context.get('transactions', [])
-        total_balance = context.get('total_balance', 0)
-        user_name = context.get('user_name', 'User')
-        
-        # Format accounts summary
-        accounts_summary = self._format_accounts(accounts)
-        
-        # Format recent transactions
-        transactions_summary = self._format_transactions(transactions)
-        
-        # Calculate key metrics
-        metrics = self._calculate_metrics(transactions)
-        
-        prompt = f"""User: {user_name}
-
-FINANCIAL OVERVIEW:
-Total Balance: {total_balance:,.0f} XAF
-
-ACCOUNTS:
-{accounts_summary}
-
-RECENT TRANSACTIONS (Last 30 days):
-{transactions_summary}
-
-KEY METRICS:
-- Total Income (30 days): {metrics['total_income']:,.0f} XAF
-- Total Expenses (30 days): {metrics['total_expenses']:,.0f} XAF
-- Net Change: {metrics['net_change']:,.0f} XAF
-- Transaction Count: {metrics['transaction_count']}
-
-USER QUESTION:
-{question}
-
-Please answer the question based on the financial data provided above. Be specific and use actual numbers from the data."""
-        
-        return prompt
-    
-    def _format_accounts(self, accounts: List[Dict]) -> str:
-        """Format accounts list for prompt"""
-        if not accounts:
-            return "No accounts found"
-        
-        lines = []
-        for acc in accounts:
-            acc_type = acc.get('type', 'unknown').upper()
-            name = acc.get('name', 'Account')
-            balance = acc.get('balance', 0)
-            lines.append(f"- {name} ({acc_type}): {float(balance):,.0f} XAF")
-        
-        return "\n".join(lines)
-    
-    def _format_transactions(self, transactions: List[Dict]) -> str:
-        """Format transactions list for prompt (last 20 transactions)"""
-        if not transactions:
-            return "No recent transactions"
-        
-        lines = []
-        for txn in transactions[:20]:  # Limit to 20 most recent
-            txn_type = txn.get('type', 'unknown')
-            amount = txn.get('amount', 0)
-            reason = txn.get('reason', 'No description')
-            date = txn.get('date', '')
-            
-            # Format date
-            try:
-                dt = datetime.fromisoformat(date.replace('Z', '+00:00'))
-                date_str = dt.strftime('%b %d')
-            except:
-                date_str = 'Unknown date'
-            
-            # Format type indicator
-            type_indicator = {
-                'income': '+',
-                'expense': '-',
-                'save': '→'
-            }.get(txn_type, '?')
-            
-            lines.append(f"{date_str}: {type_indicator}{float(amount):,.0f} XAF - {reason}")
-        
-        return "\n".join(lines)
-    
-    def _calculate_metrics(self, transactions: List[Dict]) -> Dict[str, float]:
-        """Calculate key financial metrics from transactions"""
-        total_income = 0
-        total_expenses = 0
-        
-        for txn in transactions:
-            amount = float(txn.get('amount', 0))
-            txn_type = txn.get('type', '')
-            
-            if txn_type == 'income':
-                total_income += amount
-            elif txn_type == 'expense':
-                total_expenses += amount
-        
-        return {
-            'total_income': total_income,
-            'total_expenses': total_expenses,
-            'net_change': total_income - total_expenses,
-            'transaction_count': len(transactions)
-        }
 
 
 # Singleton instance
@@ -0,0 +1,210 @@
+"""
+FlowFunds prompt assembly
+Builds chat messages within a token budget, static content first
+"""
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+_TOKEN_PIECE = re.compile(r'\w+|[^\w\s]')
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap local token estimate (no tokenizer download). Words cost one
+    token per ~4 characters and each punctuation mark costs one, which
+    tracks BPE tokenizers closely enough for budgeting.
+    """
+    if not text:
+        return 0
+    tokens = 0
+    for piece in _TOKEN_PIECE.findall(text):
+        tokens += 1 + (len(piece) - 1) // 4
+    return tokens
+
+
+@dataclass
+class Prompt:
+    messages: List[Dict[str, str]]
+    system_tokens: int
+    context_tokens: int
+    question_tokens: int
+    omitted: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.system_tokens + self.context_tokens + self.question_tokens
+
+
+class PromptBuilder:
+    """
+    Assembles the chat messages in order of how often they change:
+
+    1. the system prompt, byte-identical for every user and call, so
+       provider-side prefix caching covers it;
+    2. the user's financial context, identical across that user's calls
+       until their data changes;
+    3. the question.
+
+    Accounts, categories and transactions are cut, in that order of
+    priority, so the estimated prompt fits in `budget` tokens: once one
+    section is cut, the sections after it are left out.
+    """
+    SECTION_PRIORITY = ('accounts', 'categories', 'transactions')
+
+    def __init__(self, system_prompt: str, budget: int):
+        self.system_prompt = system_prompt
+        self.system_tokens = estimate_tokens(system_prompt)
+        self.budget = budget
+
+    def build(self, question: str, context: Optional[Dict[str, Any]]) -> Prompt:
+        question_block = f"USER QUESTION:\n{question}"
+        omitted = {}
+        if context is None:
+            # General questions are answered without any personal data, so the
+            # answer can be cached and shared
+            context_block = "This is a general question about FlowFunds. Answer it without referring to the user's own accounts or transactions."
+        else:
+            context_block, omitted = self._context_block(context, question_block)
+
+        return Prompt(
+            messages=[
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": f"{context_block}\n\n{question_block}"},
+            ],
+            system_tokens=self.system_tokens,
+            context_tokens=estimate_tokens(context_block),
+            question_tokens=estimate_tokens(question_block),
+            omitted=omitted,
+        )
+
+    def _context_block(self, context: Dict[str, Any], question_block: str):
+        metrics = context.get('metrics') or self._calculate_metrics(context.get('transactions', []))
+        sections = {
+            'accounts': self._format_accounts(context.get('accounts', [])),
+            'categories': self._format_categories(context.get('categories', [])),
+            'transactions': self._format_transactions(context.get('transactions', [])),
+        }
+
+        skeleton = self._render(context, metrics, {name: [] for name in sections})
+        remaining = self.budget - self.system_tokens - estimate_tokens(skeleton) - estimate_tokens(question_block)
+
+        kept = {}
+        omitted = {}
+        for position, name in enumerate(self.SECTION_PRIORITY):
+            lines = sections[name]
+            costs = [estimate_tokens(line) + 1 for line in lines]
+            if sum(costs) <= remaining:
+                kept[name] = lines
+                remaining -= sum(costs)
+                continue
+            # This section is cut and the later ones are dropped: leave room
+            # for each one's "... N more not shown" line
+            for later in self.SECTION_PRIORITY[position:]:
+                if sections[later]:
+                    remaining -= estimate_tokens(f"... {len(sections[later])} more not shown") + 1
+            kept[name] = []
+            for line, cost in zip(lines, costs):
+                if cost > remaining:
+                    break
+                kept[name].append(line)
+                remaining -= cost
+            for later in self.SECTION_PRIORITY[position:]:
+                if later != name:
+                    kept[later] = []
+                if len(kept[later]) < len(sections[later]):
+                    omitted[later] = len(sections[later]) - len(kept[later])
+                    kept[later].append(f"... {omitted[later]} more not shown")
+            break
+
+        return self._render(context, metrics, kept), omitted
+
+    def _render(self, context: Dict[str, Any], metrics: Dict[str, Any], sections: Dict[str, List[str]]) -> str:
+        return f"""User: {context.get('user_name', 'User')}
+
+FINANCIAL OVERVIEW:
+Total Balance: {context.get('total_balance', 0):,.0f} XAF
+
+ACCOUNTS:
+{self._join(sections['accounts'], "No accounts found")}
+
+KEY METRICS:
+- Total Income (30 days): {metrics['total_income']:,.0f} XAF
+- Total Expenses (30 days): {metrics['total_expenses']:,.0f} XAF
+- Net Change: {metrics['net_change']:,.0f} XAF
+- Transaction Count: {metrics['transaction_count']}
+
+SPENDING BY CATEGORY (30 days):
+{self._join(sections['categories'], "No expenses recorded")}
+
+RECENT TRANSACTIONS (Last 30 days):
+{self._join(sections['transactions'], "No recent transactions")}"""
+
+    @staticmethod
+    def _join(lines: List[str], empty: str) -> str:
+        return "\n".join(lines) if lines else empty
+
+    def _format_accounts(self, accounts: List[Dict]) -> List[str]:
+        """Format accounts list for prompt"""
+        lines = []
+        for acc in accounts:
+            acc_type = acc.get('type', 'unknown').upper()
+            name = acc.get('name', 'Account')
+            balance = acc.get('balance', 0)
+            lines.append(f"- {name} ({acc_type}): {float(balance):,.0f} XAF")
+        return lines
+
+    def _format_categories(self, categories: List[Dict]) -> List[str]:
+        """Format per-category expense totals for prompt"""
+        return [
+            f"- {cat['category']}: {float(cat['total']):,.0f} XAF ({cat['count']} transactions)"
+            for cat in categories
+        ]
+
+    def _format_transactions(self, transactions: List[Dict]) -> List[str]:
+        """Format transactions list for prompt, most recent first"""
+        lines = []
+        for txn in transactions:
+            txn_type = txn.get('type', 'unknown')
+            amount = txn.get('amount', 0)
+            reason = txn.get('reason', 'No description')
+            date = txn.get('date', '')
+
+            # Format date
+            try:
+                dt = date if isinstance(date, datetime) else datetime.fromisoformat(date.replace('Z', '+00:00'))
+                date_str = dt.strftime('%b %d')
+            except (AttributeError, TypeError, ValueError):
+                date_str = 'Unknown date'
+
+            # Format type indicator
+            type_indicator = {
+                'income': '+',
+                'expense': '-',
+                'save': '→'
+            }.get(txn_type, '?')
+
+            lines.append(f"{date_str}: {type_indicator}{float(amount):,.0f} XAF - {reason}")
+        return lines
+
+    def _calculate_metrics(self, transactions: List[Dict]) -> Dict[str, float]:
+        """Calculate key financial metrics from transactions"""
+        total_income = 0
+        total_expenses = 0
+
+        for txn in transactions:
+            amount = float(txn.get('amount', 0))
+            txn_type = txn.get('type', '')
+
+            if txn_type == 'income':
+                total_income += amount
+            elif txn_type == 'expense':
+                total_expenses += amount
+
+        return {
+            'total_income': total_income,
+            'total_expenses': total_expenses,
+            'net_change': total_income - total_expenses,
+            'transaction_count': len(transactions)
+        }